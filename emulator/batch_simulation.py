@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from ceng import format_ceng_response
+from location_log import DATA_LOG_PATTERN
+from propagation import MODELS, SHADOWING_SIGMA, make_propagation
+from simulation import DEFAULT_SPEED, NEAREST_TOWERS_COUNT
+from tower_db import TowerDatabase
+
+TOWERS_DATA_PATH = "250.csv"
+DEFAULT_TIME_STEP = 1.0  # Шаг по времени между отсчетами в секундах
+
+def load_route(path):
+    """Загружает маршрут как массив (N, 2) точек (долгота, широта).
+
+    Поддерживаются GPX (точки трека, маршрута и путевые точки), журнал
+    data.log со строками вида "lat: ..., lon: ..." и CSV с колонками lat/lon
+    (без заголовка колонки читаются как lon,lat).
+    """
+    if path.lower().endswith(".gpx"):
+        points = load_gpx_route(path)
+    elif path.lower().endswith(".log"):
+        points = load_data_log_route(path)
+    else:
+        points = load_csv_route(path)
+    if not points:
+        raise ValueError(f"В файле маршрута {path} нет точек")
+    return np.array(points, dtype=np.float64)
+
+
+def load_gpx_route(path):
+    points = []
+    for element in ET.parse(path).iter():
+        # Пространство имен GPX зависит от версии, сравниваем только имя тега
+        if element.tag.rsplit('}', 1)[-1] in ("trkpt", "rtept", "wpt"):
+            points.append((float(element.get("lon")), float(element.get("lat"))))
+    return points
+
+
+def load_data_log_route(path):
+    points = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = DATA_LOG_PATTERN.search(line)
+            if match:
+                points.append((float(match.group(2)), float(match.group(1))))
+    return points
+
+
+def load_csv_route(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.reader(f) if row]
+    if not rows:
+        return []
+    header = [name.strip().lower() for name in rows[0]]
+    if "lat" in header and "lon" in header:
+        lat_col, lon_col = header.index("lat"), header.index("lon")
+        return [(float(row[lon_col]), float(row[lat_col])) for row in rows[1:]]
+    return [(float(row[0]), float(row[1])) for row in rows]
+
+
+def sample_route(waypoints, spatial_index, step):
+    """Равномерно разбивает ломаную маршрута на отсчеты через step метров."""
+    waypoints = np.asarray(waypoints, dtype=np.float64)
+    x, y = spatial_index.project(waypoints[:, 0], waypoints[:, 1])
+    cumulative = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    total = cumulative[-1]
+
+    positions = np.arange(0.0, total, step) if step > 0 else np.empty(0)
+    positions = np.append(positions, total)
+    sample_x = np.interp(positions, cumulative, x)
+    sample_y = np.interp(positions, cumulative, y)
+    lons, lats = spatial_index.unproject(sample_x, sample_y)
+    return lons, lats
+
+
+def simulate_route(tower_db, waypoints, speed=DEFAULT_SPEED, time_step=DEFAULT_TIME_STEP,
+                   resample=True, k=NEAREST_TOWERS_COUNT, propagation=None):
+    """Рассчитывает весь трек целиком: позиции, ближайшие вышки, расстояния и RSSI.
+
+    При resample=False точки маршрута используются как готовые отсчеты
+    (например, при воспроизведении data.log). RSSI без шума считает
+    propagation, по умолчанию - модель DroneSimulation.
+    """
+    propagation = propagation or make_propagation(tower_db)
+    if resample:
+        lons, lats = sample_route(waypoints, tower_db.spatial_index, speed * time_step)
+    else:
+        waypoints = np.asarray(waypoints, dtype=np.float64)
+        lons, lats = waypoints[:, 0], waypoints[:, 1]
+
+    tower_indices, distances = tower_db.query_nearest_batch(lons, lats, k=k)
+    return {
+        'time': np.arange(len(lons)) * time_step,
+        'lon': lons,
+        'lat': lats,
+        'tower_index': tower_indices,
+        'distance': distances,
+        'rssi': np.round(propagation.mean_rssi(lons, lats, tower_indices, distances)).astype(int),
+    }
+
+
+def ceng_timeline(tower_db, track, propagation):
+    """Формирует ответ AT+CENG? для каждого отсчета трека; шум уровней берется из propagation."""
+    indices = track['tower_index']
+    levels = propagation.noisy_levels(-track['rssi'])
+    mccs = tower_db.mccs[indices]
+    mncs = tower_db.mncs[indices]
+    cells = tower_db.cells[indices]
+    return [
+        format_ceng_response(zip(mccs[i], mncs[i], cells[i], levels[i]))
+        for i in range(len(indices))
+    ]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Пакетный расчет трека и ответов CENG по маршруту")
+    parser.add_argument("route", help="Маршрут: GPX, CSV (lon,lat) или data.log")
+    parser.add_argument("--towers", default=TOWERS_DATA_PATH, help="CSV-файл базы вышек")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="Скорость дрона в м/с")
+    parser.add_argument("--time-step", type=float, default=DEFAULT_TIME_STEP, help="Шаг по времени в секундах")
+    parser.add_argument("--no-resample", action="store_true", help="Использовать точки маршрута как отсчеты")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора затенения и шума")
+    parser.add_argument("--model", choices=MODELS, default="log-distance", help="Модель распространения сигнала")
+    parser.add_argument("--shadowing-sigma", type=float, default=SHADOWING_SIGMA,
+                        help="СКО затенения в дБ; 0 - без затенения")
+    parser.add_argument("--output", default="ceng_timeline.jsonl", help="Файл JSONL с ответами CENG")
+    parser.add_argument("--npz", default=None, help="Сохранить массивы трека в .npz")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tower_db = TowerDatabase.from_csv(args.towers)
+    waypoints = load_route(args.route)
+
+    propagation = make_propagation(tower_db, args.model, args.shadowing_sigma, args.seed)
+    track = simulate_route(tower_db, waypoints, args.speed, args.time_step, resample=not args.no_resample,
+                           propagation=propagation)
+    responses = ceng_timeline(tower_db, track, propagation)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for t, lon, lat, response in zip(track['time'], track['lon'], track['lat'], responses):
+            f.write(json.dumps({'t': float(t), 'lon': float(lon), 'lat': float(lat), 'response': response},
+                               ensure_ascii=False) + "\n")
+    if args.npz:
+        np.savez(args.npz, **track)
+    print(f"Рассчитано отсчетов: {len(responses)}, результат записан в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
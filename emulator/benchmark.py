@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from batch_simulation import simulate_route
+from ceng import parse_ceng_batch, parse_ceng_response
+from simulation import PHYSICS_STEP, DroneSimulation
+from tower_db import TowerDatabase, build_tower_cache, cache_dir_for
+
+DEFAULT_SIZES = (2000, 100000, 1000000)
+DATA_DIR = "bench_data"
+RESULTS_PATH = "benchmark_results.json"
+MOSCOW_CENTER_LON = 37.618423
+MOSCOW_CENTER_LAT = 55.751244
+AREA_SIZE = 1.0  # Сторона квадрата синтетической базы в градусах
+QUERY_COUNT = 1000  # Число запросов в случайных точках на один замер
+FLIGHT_WAYPOINTS = 5
+FLIGHT_DURATION = 600  # Длительность полета в секундах времени симуляции
+CENG_POLL_PERIOD = 1.0  # Период запросов AT+CENG? во время полета в секундах
+
+
+def generate_towers(count, rng):
+    """Синтетическая база вышек в формате OpenCellID вокруг центра Москвы."""
+    half = AREA_SIZE / 2
+    return pd.DataFrame({
+        'radio': "GSM",
+        'mcc': 250,
+        'net': rng.integers(1, 100, count),
+        'area': rng.integers(1, 65535, count),
+        'cell': rng.permutation(count) + 1,  # Уникальные CID
+        'unit': 0,
+        'lon': np.round(MOSCOW_CENTER_LON + rng.uniform(-half, half, count), 6),
+        'lat': np.round(MOSCOW_CENTER_LAT + rng.uniform(-half, half, count), 6),
+        'range': 1000,
+        'samples': 1,
+        'changeable': 1,
+        'created': 0,
+        'updated': 0,
+        'averageSignal': 0,
+    })
+
+
+def towers_csv(data_dir, count, seed):
+    """Путь к синтетической базе заданного размера; файл создается один раз."""
+    path = os.path.join(data_dir, f"towers_{count}_{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Генерация базы из {count} вышек: {path}")
+        generate_towers(count, np.random.default_rng(seed)).to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def measure(name, size, func, repeat, ops=1):
+    """Замеряет func repeat раз, затем еще раз под tracemalloc для пика памяти."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000 / ops)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = np.array(timings)
+    result = {
+        'size': size,
+        'case': name,
+        'ops': ops,
+        'mean_ms': float(timings.mean()),
+        'min_ms': float(timings.min()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'peak_kib': peak / 1024,
+    }
+    print(f"{size:>8} {name:<28} {result['mean_ms']:10.4f} мс/оп  пик {result['peak_kib']:10.1f} КиБ")
+    return result
+
+
+def random_positions(rng, count):
+    half = AREA_SIZE / 2 * 0.9
+    return np.column_stack((
+        MOSCOW_CENTER_LON + rng.uniform(-half, half, count),
+        MOSCOW_CENTER_LAT + rng.uniform(-half, half, count),
+    ))
+
+
+def bench_size(csv_path, size, repeat, rng):
+    results = []
+    cache_dir = cache_dir_for(csv_path)
+
+    def load_cold():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        build_tower_cache(csv_path)
+        TowerDatabase.from_csv(csv_path)
+
+    results.append(measure("load_towers_cold", size, load_cold, max(1, repeat // 5)))
+    results.append(measure("load_towers_warm", size, lambda: TowerDatabase.from_csv(csv_path), repeat))
+
+    tower_db = TowerDatabase.from_csv(csv_path)
+    positions = random_positions(rng, QUERY_COUNT)
+    simulation = DroneSimulation(tower_db, tuple(positions[0]))
+
+    def nearest():
+        for lon, lat in positions:
+            simulation.set_position(lon, lat)
+            simulation.get_nearest_towers()
+
+    def ceng_moving():
+        simulation.ceng_cache.clear()
+        for lon, lat in positions:
+            simulation.set_position(lon, lat)
+            simulation.send_tower_data()
+
+    def ceng_hover():
+        simulation.set_position(*positions[0])
+        for _ in range(QUERY_COUNT):
+            simulation.send_tower_data()
+
+    results.append(measure("get_nearest_towers", size, nearest, repeat, QUERY_COUNT))
+    results.append(measure("send_tower_data_moving", size, ceng_moving, repeat, QUERY_COUNT))
+    results.append(measure("send_tower_data_hover", size, ceng_hover, repeat, QUERY_COUNT))
+
+    responses = []
+    for lon, lat in positions:
+        simulation.set_position(lon, lat)
+        responses.append(simulation.send_tower_data())
+    detected = [parse_ceng_response(response) for response in responses]
+
+    def parse():
+        for response in responses:
+            parse_ceng_response(response)
+
+    def find_coordinates():
+        for towers in detected:
+            tower_db.find_towers_coordinates(towers)
+
+    # Один буфер со всеми ответами, как файл записи сеанса модема
+    capture = "\r\nOK\r\n".join(responses).encode('utf-8')
+
+    results.append(measure("parse_ceng_response", size, parse, repeat, QUERY_COUNT))
+    results.append(measure("parse_ceng_batch", size, lambda: parse_ceng_batch(capture), repeat, QUERY_COUNT))
+    results.append(measure("lookup_ceng_records", size,
+                           lambda: tower_db.lookup_ceng_records(parse_ceng_batch(capture)), repeat, QUERY_COUNT))
+    results.append(measure("find_tower_coordinates", size, find_coordinates, repeat, QUERY_COUNT))
+
+    waypoints = [tuple(point) for point in random_positions(rng, FLIGHT_WAYPOINTS)]
+
+    def flight():
+        # Полет по часам симуляции с опросом модема раз в CENG_POLL_PERIOD
+        flight_simulation = DroneSimulation(tower_db, waypoints[0])
+        for lon, lat in waypoints:
+            flight_simulation.add_waypoint(lon, lat)
+        flight_simulation.start()
+        steps_per_poll = int(round(CENG_POLL_PERIOD / PHYSICS_STEP))
+        for _ in range(int(FLIGHT_DURATION / CENG_POLL_PERIOD)):
+            if not flight_simulation.advance(steps_per_poll):
+                break
+            flight_simulation.send_tower_data()
+
+    results.append(measure("flight", size, flight, max(1, repeat // 5)))
+    results.append(measure("batch_flight", size, lambda: simulate_route(tower_db, waypoints), repeat))
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замеры производительности эмулятора на синтетических базах вышек")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Размеры баз вышек")
+    parser.add_argument("--repeat", type=int, default=10, help="Число повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора баз и точек запросов")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Каталог для синтетических баз")
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON-файл с результатами")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+    for size in args.sizes:
+        csv_path = towers_csv(args.data_dir, size, args.seed)
+        results.extend(bench_size(csv_path, size, args.repeat, np.random.default_rng(args.seed)))
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
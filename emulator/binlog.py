@@ -0,0 +1,212 @@
+import argparse
+import os
+import re
+import struct
+import time
+from datetime import datetime
+
+import numpy as np
+
+from location_log import DATA_LOG_PATTERN, read_location_log
+
+MAGIC = b"SIMLOG\0\0"
+VERSION = 1
+HEADER_FORMAT = "<8sII48x"  # Сигнатура, версия, размер записи; заголовок 64 байта
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAX_TOWERS = 7
+BINLOG_SUFFIX = ".bin"
+
+# Вышка: идентификатор, уровень сигнала и координаты (NaN, если вышка не найдена)
+TOWER_DTYPE = np.dtype([
+    ('mcc', '<u2'),
+    ('mnc', '<u2'),
+    ('cid', '<u4'),
+    ('level', '<i4'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+], align=True)
+# Запись фиксированной длины; отсутствующие время и местоположение - NaN
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),  # Секунды Unix
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+    ('tower_count', 'u1'),
+    ('towers', TOWER_DTYPE, (MAX_TOWERS,)),
+], align=True)
+
+MAIN_PROCESS_TIME_PATTERN = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]")
+MAIN_PROCESS_TOWER_PATTERN = re.compile(r"Processing tower \d+: MCC=(\d+), MNC=(\d+), CID=(\d+), receive_level=(-?\d+)")
+MAIN_PROCESS_FOUND_PATTERN = re.compile(r"Found tower in hash table: LAT=(-?[\d.]+), LONG=(-?[\d.]+)")
+
+
+def make_records(rows):
+    """Собирает массив записей из кортежей (timestamp, lat, lon, towers).
+
+    towers - список (mcc, mnc, cid, level, lat, lon), лишние сверх 7 отбрасываются.
+    """
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    records['towers']['lat'] = np.nan
+    records['towers']['lon'] = np.nan
+    for record, (timestamp, lat, lon, towers) in zip(records, rows):
+        towers = towers[:MAX_TOWERS]
+        record['timestamp'], record['lat'], record['lon'] = timestamp, lat, lon
+        record['tower_count'] = len(towers)
+        for slot, tower in zip(record['towers'], towers):
+            slot['mcc'], slot['mnc'], slot['cid'], slot['level'], slot['lat'], slot['lon'] = tower
+    return records
+
+
+class BinaryLogWriter:
+    """Дописывает записи в конец бинарного журнала, создавая заголовок для нового файла."""
+
+    def __init__(self, path):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            read_header(path)
+            # Недописанная последняя запись отрезается, иначе новые записи сместятся
+            count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            self.file = open(path, 'r+b')
+            self.file.truncate(HEADER_SIZE + count * RECORD_DTYPE.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_DTYPE.itemsize))
+            self.file.flush()
+
+    def append(self, records):
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        self.file.write(records.tobytes())
+        self.file.flush()
+
+    def write(self, timestamp, lat, lon, towers):
+        self.append(make_records([(timestamp, lat, lon, towers)]))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path}: файл короче заголовка")
+    magic, version, record_size = struct.unpack(HEADER_FORMAT, header)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: не бинарный журнал")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: неподдерживаемая версия {version} или размер записи {record_size}")
+
+
+def read_binary_log(path):
+    """Отображает журнал в память без копирования и возвращает массив записей RECORD_DTYPE.
+
+    Недописанная последняя запись (например, после аварийного завершения) пропускается.
+    """
+    read_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def records_from_location_log(path):
+    """Записи из журнала console_display: вышки и рассчитанное местоположение, без времени."""
+    rows = []
+    for group in read_location_log(path):
+        lat, lon = group['fix'] if group['fix'] else (np.nan, np.nan)
+        rows.append((np.nan, lat, lon, group['towers']))
+    return make_records(rows)
+
+
+def records_from_data_log(path):
+    """Записи из data.log: только местоположение."""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = DATA_LOG_PATTERN.search(line)
+            if match:
+                rows.append((np.nan, float(match.group(1)), float(match.group(2)), []))
+    return make_records(rows)
+
+
+def records_from_main_process_log(path):
+    """Записи из журнала main_process: время пакета, вышки и найденные координаты."""
+    rows = []
+    towers = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if "Received data packet" in line:
+                match = MAIN_PROCESS_TIME_PATTERN.match(line)
+                timestamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp() if match else np.nan
+                towers = []
+                rows.append((timestamp, np.nan, np.nan, towers))
+                continue
+            if towers is None:
+                continue
+            match = MAIN_PROCESS_TOWER_PATTERN.search(line)
+            if match:
+                mcc, mnc, cid, level = (int(value) for value in match.groups())
+                towers.append((mcc, mnc, cid, level, np.nan, np.nan))
+                continue
+            match = MAIN_PROCESS_FOUND_PATTERN.search(line)
+            if match and towers:
+                towers[-1] = towers[-1][:4] + (float(match.group(1)), float(match.group(2)))
+    return make_records(rows)
+
+
+CONVERTERS = {
+    'location': records_from_location_log,
+    'data': records_from_data_log,
+    'main_process': records_from_main_process_log,
+}
+
+
+def detect_format(path):
+    name = os.path.basename(path)
+    if name.startswith("data"):
+        return 'data'
+    if name.startswith("main_process") or name.startswith("towers"):
+        return 'main_process'
+    return 'location'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Перевод текстовых журналов в бинарный журнал записей")
+    parser.add_argument("input", help="Текстовый журнал: location_log.txt, data.log или main_process.log")
+    parser.add_argument("output", nargs="?", default=None,
+                        help="Бинарный журнал (по умолчанию имя входного файла с расширением .bin)")
+    parser.add_argument("--format", choices=sorted(CONVERTERS), default=None,
+                        help="Формат входного журнала; по умолчанию определяется по имени файла")
+    parser.add_argument("--append", action="store_true", help="Дописать записи в существующий журнал")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = args.output or os.path.splitext(args.input)[0] + BINLOG_SUFFIX
+    log_format = args.format or detect_format(args.input)
+
+    started = time.perf_counter()
+    records = CONVERTERS[log_format](args.input)
+    parsed = time.perf_counter() - started
+    if not args.append and os.path.exists(output):
+        os.remove(output)
+    with BinaryLogWriter(output) as writer:
+        writer.append(records)
+
+    started = time.perf_counter()
+    loaded = read_binary_log(output)
+    loaded_time = time.perf_counter() - started
+    print(f"Записей: {len(records)} ({log_format}), разбор текста {parsed * 1000:.1f} мс, "
+          f"открытие {output}: {len(loaded)} записей за {loaded_time * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
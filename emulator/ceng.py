@@ -0,0 +1,213 @@
+import string
+
+import numpy as np
+
+CENG_PREFIX = b"+CENG:"
+SERVING_FIELDS = 12  # Номер строки и 11 полей обслуживающей соты
+NEIGHBOUR_FIELDS = 8  # Номер строки и 7 полей соседней соты
+# Номера полей (mcc, mnc, cellid, lac, уровень) в строке с номером строки в начале
+SERVING_LAYOUT = (4, 5, 7, 10, 2)
+NEIGHBOUR_LAYOUT = (5, 6, 4, 7, 2)
+# Наибольшее число цифр поля по основанию: значения помещаются в поля int32 CENG_DTYPE
+MAX_DIGITS = {10: 9, 16: 7}
+
+# Разобранные строки CENG: номер ответа, номер строки в ответе и параметры соты
+CENG_DTYPE = np.dtype([
+    ('response', np.int32),
+    ('index', np.int16),
+    ('serving', np.bool_),
+    ('mcc', np.int32),
+    ('mnc', np.int32),
+    ('cell', np.int64),
+    ('lac', np.int32),
+    ('level', np.int32),
+])
+
+HEX_DIGITS = np.full(256, 16, dtype=np.int64)  # 16 - не цифра ни в одном основании
+HEX_DIGITS[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+HEX_DIGITS[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+HEX_DIGITS[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+
+QUOTE = ord('"')
+LINE_END = ord(';')
+NOT_A_DIGIT = ord('x')  # Замена LINE_END в самих данных: такое поле считается неверным
+# Символы вне значений полей: кавычки (в том числе экранированные в JSON) и пробелы
+SKIPPED_CHARS = '"\\ \r\n\t'
+SKIPPED_BYTES = np.zeros(256, dtype=np.bool_)
+SKIPPED_BYTES[np.frombuffer(SKIPPED_CHARS.encode('ascii'), dtype=np.uint8)] = True
+SKIPPED_TABLE = str.maketrans("", "", SKIPPED_CHARS)
+FIELD_CHARS = {10: frozenset(string.digits), 16: frozenset(string.hexdigits)}
+
+
+def ceng_line_parts(towers):
+    """Разбивает строки ответа AT+CENG? вокруг уровня сигнала.
+
+    Для каждой вышки (mcc, mnc, cell) возвращает пару (начало, конец) строки,
+    между которыми подставляется уровень сигнала.
+    """
+    parts = []
+    for i, (mcc, mnc, cell) in enumerate(towers):
+        if i == 0:
+            # Первая (обслуживающая) вышка с дополнительной информацией
+            parts.append((f'+CENG: {i},"0034,', f',00,{mcc},{mnc},40,{cell:04x},01,05,6d07,255"'))
+        else:
+            # Соседние вышки с сокращенной информацией
+            parts.append((f'+CENG: {i},"0072,', f',44,{cell:04x},{mcc},{mnc},6d07"'))
+    return parts
+
+
+def format_ceng_lines(parts, levels):
+    """Собирает ответ AT+CENG? из частей строк и уровней сигнала."""
+    return "\n".join(f"{head}{level}{tail}" for (head, tail), level in zip(parts, levels))
+
+
+def format_ceng_response(towers):
+    """Формирует ответ AT+CENG? из списка вышек (mcc, mnc, cell, уровень сигнала)."""
+    towers = list(towers)
+    parts = ceng_line_parts([(mcc, mnc, cell) for mcc, mnc, cell, level in towers])
+    return format_ceng_lines(parts, [level for mcc, mnc, cell, level in towers])
+
+
+def digits_to_int(buf, starts, lengths, base):
+    """Переводит поля буфера (начало, длина) в целые числа заданного основания без цикла Python.
+
+    Пустые, длиннее MAX_DIGITS[base] и содержащие не цифры поля дают -1.
+    """
+    max_digits = MAX_DIGITS[base]
+    width = min(int(lengths.max(initial=0)), max_digits)
+    if width == 0:
+        return np.full(len(starts), -1, dtype=np.int64)
+    offsets = np.arange(width)
+    positions = np.minimum(starts[:, None] + offsets, len(buf) - 1)
+    powers = lengths[:, None] - 1 - offsets
+    digits = np.where(powers >= 0, HEX_DIGITS[buf[positions]], 0)
+    values = (digits * base ** np.maximum(powers, 0)).sum(axis=1)
+    invalid = (digits >= base).any(axis=1) | (lengths == 0) | (lengths > max_digits)
+    values[invalid] = -1
+    return values
+
+
+def field_to_int(text, base):
+    """Значение одного поля по тем же правилам, что digits_to_int; -1 для неверного поля."""
+    if not 0 < len(text) <= MAX_DIGITS[base] or not FIELD_CHARS[base].issuperset(text):
+        return -1
+    return int(text, base)
+
+
+def parse_ceng_batch(data):
+    """Разбирает сразу много ответов AT+CENG? (строку, байты или содержимое файла записи).
+
+    Весь буфер делится по "+CENG:" и дальше обрабатывается массивами
+    NumPy: от каждой строки берется номер и поля в кавычках, строки с 11
+    полями считаются обслуживающей сотой, с 7 - соседней, остальные
+    пропускаются. Кавычки могут быть экранированы, поэтому разбираются и
+    ответы внутри JSONL. Номер ответа растет, когда номер строки не больше
+    предыдущего, то есть начинается новый список сот.
+
+    Возвращает структурированный массив CENG_DTYPE.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    chunks = data.split(CENG_PREFIX)[1:]
+    if not chunks:
+        return np.zeros(0, dtype=CENG_DTYPE)
+
+    buf = np.frombuffer(b"".join(chunks), dtype=np.uint8).copy()
+    buf[buf == LINE_END] = NOT_A_DIGIT
+    lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+    chunk_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # Первая и вторая кавычки фрагмента ограничивают поля соты
+    quotes = np.flatnonzero(buf == QUOTE)
+    quote_chunks = np.searchsorted(chunk_starts, quotes, side='right') - 1
+    first = np.searchsorted(quote_chunks, np.arange(len(chunks)))
+    second = first + 1
+    paired = second < len(quotes)
+    paired[paired] &= quote_chunks[second[paired]] == np.flatnonzero(paired)
+    if not paired.any():
+        return np.zeros(0, dtype=CENG_DTYPE)
+    starts = chunk_starts[paired]
+    closes = quotes[second[paired]]
+
+    # Оставляем номер строки и поля до закрывающей кавычки, которая становится концом строки
+    inside = np.zeros(len(buf) + 1, dtype=np.int32)
+    inside[starts] += 1
+    inside[closes + 1] -= 1
+    keep = np.cumsum(inside[:-1], dtype=np.int32) > 0
+    buf[closes] = LINE_END
+    keep &= ~SKIPPED_BYTES[buf]
+    clean = buf[keep]
+
+    # Поля разделены запятыми, строки - LINE_END
+    separators = np.flatnonzero((clean == ord(',')) | (clean == LINE_END))
+    field_starts = np.concatenate(([0], separators[:-1] + 1))
+    field_lengths = separators - field_starts
+    line_ends = clean[separators] == LINE_END
+    line_of = np.concatenate(([0], np.cumsum(line_ends)[:-1]))
+    field_counts = np.bincount(line_of, minlength=int(line_ends.sum()))
+    line_first = np.concatenate(([0], np.cumsum(field_counts)[:-1]))
+
+    serving = field_counts == SERVING_FIELDS
+    valid = serving | (field_counts == NEIGHBOUR_FIELDS)
+    serving = serving[valid]
+    line_first = line_first[valid]
+
+    # Десятичные поля (номер строки, mcc, mnc, уровень) и 16-ричные (cellid, lac) - по одному вызову
+    layout = np.where(serving[:, None], SERVING_LAYOUT, NEIGHBOUR_LAYOUT)
+    decimal = (line_first[:, None] + np.column_stack((np.zeros(len(layout), dtype=np.int64), layout[:, [0, 1, 4]]))).ravel()
+    hexadecimal = (line_first[:, None] + layout[:, [2, 3]]).ravel()
+    decimal = digits_to_int(clean, field_starts[decimal], field_lengths[decimal], 10).reshape(-1, 4)
+    hexadecimal = digits_to_int(clean, field_starts[hexadecimal], field_lengths[hexadecimal], 16).reshape(-1, 2)
+
+    parsed = (decimal >= 0).all(axis=1) & (hexadecimal >= 0).all(axis=1)
+    decimal = decimal[parsed]
+    hexadecimal = hexadecimal[parsed]
+    serving = serving[parsed]
+
+    records = np.zeros(len(decimal), dtype=CENG_DTYPE)
+    index = decimal[:, 0]
+    records['index'] = index
+    records['serving'] = serving
+    records['mcc'] = decimal[:, 1]
+    records['mnc'] = decimal[:, 2]
+    records['level'] = decimal[:, 3]
+    records['cell'] = hexadecimal[:, 0]
+    records['lac'] = hexadecimal[:, 1]
+    records['response'] = np.concatenate(([0], np.cumsum(index[1:] <= index[:-1])))
+    return records
+
+
+def parse_ceng_file(path):
+    """Разбирает все ответы AT+CENG? в файле: журнале порта, записи сеанса или JSONL."""
+    with open(path, 'rb') as f:
+        return parse_ceng_batch(f.read())
+
+
+def parse_ceng_response(response):
+    """Парсит ответ AT+CENG? и возвращает список (mcc, mnc, cellid, signal).
+
+    Cell ID возвращается строкой в 16-ричной записи, как в ответе модема.
+    """
+    # Один ответ короче фиксированных накладных расходов parse_ceng_batch, поэтому
+    # разбирается строками Python, но по тем же правилам: фрагмент от "+CENG:" до
+    # второй кавычки, те же пропускаемые символы и та же проверка каждого поля
+    detected_towers = []
+    for chunk in response.split(CENG_PREFIX.decode('ascii'))[1:]:
+        head, _, rest = chunk.partition('"')
+        body, closed, _ = rest.partition('"')
+        if not closed:
+            continue
+        fields = (head + body).translate(SKIPPED_TABLE).split(",")
+        if len(fields) == SERVING_FIELDS:
+            layout = SERVING_LAYOUT
+        elif len(fields) == NEIGHBOUR_FIELDS:
+            layout = NEIGHBOUR_LAYOUT
+        else:
+            continue
+        mcc, mnc, cell, lac, level = (fields[position] for position in layout)
+        values = (field_to_int(fields[0], 10), field_to_int(mcc, 10), field_to_int(mnc, 10),
+                  field_to_int(level, 10), field_to_int(cell, 16), field_to_int(lac, 16))
+        if min(values) < 0:
+            continue
+        detected_towers.append((values[1], values[2], f"{values[4]:04x}", values[3]))
+    return detected_towers
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from ceng import ceng_line_parts
+
+CACHE_CELL_SIZE = 5.0  # Размер ячейки квантования позиции в метрах
+CACHE_CAPACITY = 4096  # Максимум ячеек в кэше
+
+
+class CengResponseCache:
+    """LRU-кэш ответов AT+CENG? по ячейкам метрической сетки.
+
+    Позиция дрона квантуется до ячейки cell_size метров в проекции
+    пространственного индекса. Для ячейки один раз ищутся ближайшие вышки
+    и готовятся строки ответа без уровня сигнала; уровень без шума считается
+    в центре ячейки. Зависший или медленно летящий дрон попадает в одну и ту
+    же ячейку, и запрос обходится без поиска и форматирования.
+
+    Ответ точен для центра ячейки, а не для самой позиции: она отстоит от
+    центра не больше чем на полудиагональ h = cell_size / sqrt(2) (3.5 м
+    при 5 м), на столько же могут ошибаться расстояния до вышек. Набор
+    вышек может отличаться от точного только у границы, когда k-я и
+    (k+1)-я вышки почти равноудалены: любая выданная вышка не дальше
+    точной k-й ближайшей более чем на 2h. На фоне шума уровня сигнала и
+    затенения эта погрешность пренебрежима.
+    """
+
+    def __init__(self, tower_db, propagation, k, cell_size=CACHE_CELL_SIZE, capacity=CACHE_CAPACITY):
+        self.tower_db = tower_db
+        self.propagation = propagation  # PropagationEngine: средний RSSI без шума
+        self.k = k
+        self.cell_size = cell_size
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def cell_key(self, lon, lat):
+        x, y = self.tower_db.spatial_index.project(lon, lat)
+        return int(np.floor(x / self.cell_size)), int(np.floor(y / self.cell_size))
+
+    def lookup(self, lon, lat):
+        """Возвращает (части строк ответа, уровни сигнала без шума) для ячейки позиции."""
+        key = self.cell_key(lon, lat)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = self.compute(key)
+        self.entries[key] = entry
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return entry
+
+    def compute(self, key):
+        db = self.tower_db
+        center_x = (key[0] + 0.5) * self.cell_size
+        center_y = (key[1] + 0.5) * self.cell_size
+        lon, lat = db.spatial_index.unproject(center_x, center_y)
+        indices, distances = db.query_nearest(float(lon), float(lat), k=self.k)
+        parts = ceng_line_parts(zip(db.mccs[indices], db.mncs[indices], db.cells[indices]))
+        # Уровень сигнала передается положительным числом, как у SIM800
+        base_levels = -self.propagation.mean_rssi(float(lon), float(lat), indices, distances)
+        return parts, base_levels
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from batch_simulation import load_route
+from metrics import DUMP_INTERVAL, start_metrics_dump, start_metrics_server
+from nearest_raster import DEFAULT_RASTER_CELL_SIZE, load_nearest_raster, route_bbox
+from propagation import MODELS, SHADOWING_SIGMA, make_propagation
+from simulation import DEFAULT_SPEED, DroneSimulation, SimulationClock
+from tower_db import TowerDatabase
+from uart_server import UartCommandServer, configure_raw, simulation_commands
+
+TOWERS_DATA_PATH = "250.csv"
+MANIFEST_PATH = "fleet_manifest.json"
+MOSCOW_CENTER_LON = 37.618423
+MOSCOW_CENTER_LAT = 55.751244
+ROUTE_AREA = 0.05  # Разброс случайных точек пути вокруг центра в градусах
+ROUTE_WAYPOINTS = 5
+STEP_INTERVAL = 0.01  # Пауза между опросами часов симуляции в секундах
+
+
+class Modem:
+    """Один эмулируемый модем: pty, сервер AT-команд и своя симуляция дрона."""
+
+    def __init__(self, modem_id, simulation):
+        self.modem_id = modem_id
+        self.simulation = simulation
+        self.master_fd, self.slave_fd = os.openpty()
+        # Сторона потребителя без обработки строк, иначе \r\n превратится в \n\n
+        configure_raw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        self.server = UartCommandServer(self.master_fd, simulation_commands(simulation),
+                                        name=f"модем {modem_id} ({self.port})")
+
+    def manifest_entry(self):
+        return {
+            'id': self.modem_id,
+            'port': self.port,
+            'waypoints': [[float(lon), float(lat)] for lon, lat in self.simulation.waypoints],
+        }
+
+    def close(self):
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+
+def random_route(rng, center, count=ROUTE_WAYPOINTS, area=ROUTE_AREA):
+    points = rng.uniform(-area, area, size=(count, 2)) + np.asarray(center)
+    return [tuple(point) for point in points]
+
+
+def create_fleet(tower_db, count, routes, propagation=None):
+    """Создает модемы; общий propagation дает всем дронам одно поле затенения."""
+    modems = []
+    for modem_id, route in zip(range(count), routes):
+        simulation = DroneSimulation(tower_db, route[0], propagation)
+        for lon, lat in route:
+            simulation.add_waypoint(lon, lat)
+        simulation.start()
+        modems.append(Modem(modem_id, simulation))
+    return modems
+
+
+def write_manifest(path, modems):
+    """Публикует список портов: потребители берут из него путь к своему модему."""
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'modems': [modem.manifest_entry() for modem in modems]}, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+async def fly(modems, interval, clock):
+    """Шагает все дроны флота по общим часам; по завершении маршрута дрон начинает его заново."""
+    clock.start()
+    while True:
+        steps = clock.advance()
+        for modem in modems:
+            simulation = modem.simulation
+            if not simulation.advance(steps) and simulation.waypoints:
+                simulation.set_position(*simulation.waypoints[0])
+                simulation.start()
+        await asyncio.sleep(interval)
+
+
+async def run_fleet(modems, interval, clock):
+    await asyncio.gather(fly(modems, interval, clock), *(modem.server.serve() for modem in modems))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Эмуляция флота модемов SIM800 на собственных pty")
+    parser.add_argument("--count", type=int, default=4, help="Число модемов")
+    parser.add_argument("--towers", default=TOWERS_DATA_PATH, help="CSV-файл базы вышек")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Файл со списком портов модемов")
+    parser.add_argument("--route", default=None, help="Общий маршрут для всех дронов вместо случайных")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="Скорость дронов в м/с")
+    parser.add_argument("--interval", type=float, default=STEP_INTERVAL,
+                        help="Пауза между опросами часов симуляции в секундах")
+    parser.add_argument("--time-warp", type=float, default=1.0, help="Ускорение времени (1, 10, 1000)")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора маршрутов, затенения и шума")
+    parser.add_argument("--model", choices=MODELS, default="log-distance", help="Модель распространения сигнала")
+    parser.add_argument("--shadowing-sigma", type=float, default=SHADOWING_SIGMA,
+                        help="СКО затенения в дБ; 0 - без затенения")
+    parser.add_argument("--raster", default=None,
+                        help="Каталог растра ближайших вышек; строится по области маршрутов, если устарел")
+    parser.add_argument("--raster-cell", type=float, default=DEFAULT_RASTER_CELL_SIZE,
+                        help="Сторона ячейки растра в метрах")
+    parser.add_argument("--metrics-json", default=None, help="Файл для периодической записи метрик задержек")
+    parser.add_argument("--metrics-interval", type=float, default=DUMP_INTERVAL,
+                        help="Период записи метрик в секундах")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Порт HTTP для метрик (/metrics)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tower_db = TowerDatabase.from_csv(args.towers)
+    print(f"Загружено вышек: {len(tower_db)}")
+
+    if args.route:
+        route = [tuple(point) for point in load_route(args.route)]
+        routes = [route] * args.count
+    else:
+        rng = np.random.default_rng(args.seed)
+        routes = [random_route(rng, (MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT)) for _ in range(args.count)]
+
+    if args.raster:
+        bbox = route_bbox([point for route in routes for point in route])
+        tower_db.nearest_raster = load_nearest_raster(tower_db.spatial_index, args.raster, bbox, args.raster_cell)
+
+    propagation = make_propagation(tower_db, args.model, args.shadowing_sigma, args.seed)
+    modems = create_fleet(tower_db, args.count, routes, propagation)
+    for modem in modems:
+        modem.simulation.speed = args.speed
+        print(f"Модем {modem.modem_id}: {modem.port}")
+    write_manifest(args.manifest, modems)
+    print(f"Список портов записан в {args.manifest}")
+    if args.metrics_json:
+        start_metrics_dump(args.metrics_json, args.metrics_interval)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    try:
+        asyncio.run(run_fleet(modems, args.interval, SimulationClock(args.time_warp)))
+    except KeyboardInterrupt:
+        print("Флот остановлен.")
+    finally:
+        for modem in modems:
+            modem.close()
+
+
+if __name__ == "__main__":
+    main()
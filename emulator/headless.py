@@ -0,0 +1,100 @@
+import argparse
+import time
+
+from batch_simulation import load_route
+from metrics import DUMP_INTERVAL, start_metrics_dump, start_metrics_server
+from nearest_raster import DEFAULT_RASTER_CELL_SIZE, load_nearest_raster, route_bbox
+from propagation import MODELS, SHADOWING_SIGMA, make_propagation
+from simulation import DEFAULT_SPEED, MAX_STEPS_PER_ADVANCE, DroneSimulation, SimulationClock
+from tower_db import TowerDatabase
+from uart_server import start_uart_listener
+
+TOWERS_DATA_PATH = "250.csv"
+MOSCOW_CENTER_LON = 37.618423
+MOSCOW_CENTER_LAT = 55.751244
+UART_PORT = "/dev/pts/6"
+BAUD_RATE = 9600
+STEP_INTERVAL = 0.01  # Пауза между опросами часов симуляции в секундах
+
+
+def parse_waypoint(value):
+    lon, lat = value.split(",")
+    return float(lon), float(lat)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Эмулятор SIM800 без графического интерфейса")
+    parser.add_argument("--towers", default=TOWERS_DATA_PATH, help="CSV-файл базы вышек")
+    parser.add_argument("--port", default=UART_PORT, help="UART-порт для приема команд")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE)
+    parser.add_argument("--waypoint", type=parse_waypoint, action="append", default=[],
+                        help="Точка пути в виде lon,lat; можно указать несколько раз")
+    parser.add_argument("--route", default=None, help="Файл маршрута: GPX, CSV (lon,lat) или data.log")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="Скорость дрона в м/с")
+    parser.add_argument("--interval", type=float, default=STEP_INTERVAL,
+                        help="Пауза между опросами часов симуляции в секундах")
+    parser.add_argument("--time-warp", type=float, default=1.0,
+                        help="Ускорение времени (1, 10, 1000); 0 - шагать с максимальной скоростью")
+    parser.add_argument("--loop", action="store_true", help="Повторять маршрут после завершения")
+    parser.add_argument("--model", choices=MODELS, default="log-distance", help="Модель распространения сигнала")
+    parser.add_argument("--shadowing-sigma", type=float, default=SHADOWING_SIGMA,
+                        help="СКО затенения в дБ; 0 - без затенения")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора затенения и шума")
+    parser.add_argument("--raster", default=None,
+                        help="Каталог растра ближайших вышек; строится по области маршрута, если устарел")
+    parser.add_argument("--raster-cell", type=float, default=DEFAULT_RASTER_CELL_SIZE,
+                        help="Сторона ячейки растра в метрах")
+    parser.add_argument("--metrics-json", default=None, help="Файл для периодической записи метрик задержек")
+    parser.add_argument("--metrics-interval", type=float, default=DUMP_INTERVAL,
+                        help="Период записи метрик в секундах")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Порт HTTP для метрик (/metrics)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    tower_db = TowerDatabase.from_csv(args.towers)
+    print(f"Загружено вышек: {len(tower_db)}")
+    propagation = make_propagation(tower_db, args.model, args.shadowing_sigma, args.seed)
+    simulation = DroneSimulation(tower_db, (MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT), propagation)
+    simulation.speed = args.speed
+    waypoints = list(args.waypoint)
+    if args.route:
+        waypoints.extend(map(tuple, load_route(args.route)))
+    for lon, lat in waypoints:
+        simulation.add_waypoint(lon, lat)
+    if args.raster:
+        bbox = route_bbox(waypoints or [(MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT)])
+        tower_db.nearest_raster = load_nearest_raster(tower_db.spatial_index, args.raster, bbox, args.raster_cell)
+
+    start_uart_listener(args.port, args.baud, simulation)
+    if args.metrics_json:
+        start_metrics_dump(args.metrics_json, args.metrics_interval)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    if not simulation.start():
+        print("Не установлены точки пути для симуляции, дрон остается на месте.")
+
+    clock = SimulationClock(args.time_warp)
+    clock.start()
+    try:
+        while True:
+            steps = clock.advance() if args.time_warp > 0 else MAX_STEPS_PER_ADVANCE
+            if simulation.advance(steps):
+                if args.time_warp > 0:
+                    time.sleep(args.interval)
+            elif args.loop and simulation.waypoints:
+                simulation.set_position(*simulation.waypoints[0])
+                simulation.start()
+            else:
+                # Маршрут завершен: продолжаем только отвечать на команды
+                time.sleep(1)
+    except KeyboardInterrupt:
+        print("Эмулятор остановлен.")
+        print(f"Кэш ответов AT+CENG?: {simulation.ceng_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import re
+
+LOCATION_LOG_PATH = "../location_log.txt"
+
+# Строки журнала console_display (exe/console_display.c)
+TOWER_LINE_PATTERN = re.compile(
+    r"Вышка (\d+): MCC=(\d+), MNC=(\d+), CID=(\d+), Уровень сигнала=(-?\d+), "
+    r"LAT=(-?[\d.]+), LONG=(-?[\d.]+)"
+)
+FIX_LINE_PATTERN = re.compile(r"Рассчитанное местоположение устройства: LAT=(-?[\d.]+|-?nan), LONG=(-?[\d.]+|-?nan)")
+# Строки журнала местоположений data.log
+DATA_LOG_PATTERN = re.compile(r"lat:\s*(-?[\d.]+),\s*lon:\s*(-?[\d.]+)")
+
+
+def read_location_log(path=LOCATION_LOG_PATH):
+    """Читает журнал location_log.txt и возвращает список замеров.
+
+    Замер - словарь с ключами 'towers' (список кортежей
+    (mcc, mnc, cid, level, lat, lon)) и 'fix' ((lat, lon) рассчитанного
+    местоположения или None, если строки с ним нет). Новый замер начинается
+    со строки "Вышка 1" или после строки с местоположением.
+    """
+    groups = []
+    towers = []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = TOWER_LINE_PATTERN.search(line)
+            if match:
+                if match.group(1) == "1" and towers:
+                    groups.append({'towers': towers, 'fix': None})
+                    towers = []
+                mcc, mnc, cid, level = (int(value) for value in match.group(2, 3, 4, 5))
+                lat, lon = float(match.group(6)), float(match.group(7))
+                towers.append((mcc, mnc, cid, level, lat, lon))
+                continue
+
+            match = FIX_LINE_PATTERN.search(line)
+            if match:
+                groups.append({'towers': towers, 'fix': (float(match.group(1)), float(match.group(2)))})
+                towers = []
+    if towers:
+        groups.append({'towers': towers, 'fix': None})
+    return groups
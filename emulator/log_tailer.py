@@ -0,0 +1,146 @@
+import argparse
+import json
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from location_log import FIX_LINE_PATTERN, LOCATION_LOG_PATH, TOWER_LINE_PATTERN
+
+HTTP_HOST = "127.0.0.1"
+HTTP_PORT = 8081
+COORDS_PATHS = ("/get_coords", "/get_coords.php")
+
+
+class LocationLogTailer:
+    """Инкрементальное чтение журнала location_log.txt.
+
+    Запоминает смещение в байтах и при каждом poll разбирает только
+    дописанные строки, поэтому стоимость опроса зависит от объема новых
+    данных, а не от размера журнала. Незавершенная последняя строка
+    откладывается до следующего опроса. Если файл усечен или заменен
+    (другой inode), чтение начинается с начала.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.inode = None
+        self.partial = b""
+        self.towers = []  # Вышки текущего, еще не завершенного замера
+        self.latest_towers = []
+        self.latest_fix = None
+
+    def poll(self):
+        """Дочитывает новые строки журнала; возвращает False, если файла нет."""
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self.inode = stat.st_ino
+                self.offset = 0
+                self.partial = b""
+                self.towers = []
+            if stat.st_size == self.offset:
+                return True
+
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(stat.st_size - self.offset)
+            self.offset += len(data)
+
+            lines = (self.partial + data).split(b"\n")
+            self.partial = lines.pop()
+            for line in lines:
+                self.parse_line(line.decode('utf-8', errors='replace'))
+            return True
+
+    def parse_line(self, line):
+        match = TOWER_LINE_PATTERN.search(line)
+        if match:
+            # "Вышка 1" начинает новый замер
+            if match.group(1) == "1" and self.towers:
+                self.finish_group()
+            self.towers.append({
+                'CID': int(match.group(4)),
+                'Signal': int(match.group(5)),
+                'lat': float(match.group(6)),
+                'lon': float(match.group(7)),
+            })
+            return
+
+        match = FIX_LINE_PATTERN.search(line)
+        if match:
+            lat, lon = float(match.group(1)), float(match.group(2))
+            if math.isfinite(lat) and math.isfinite(lon):
+                self.latest_fix = {'lat': lat, 'lon': lon}
+            self.finish_group()
+
+    def finish_group(self):
+        if self.towers:
+            self.latest_towers = self.towers
+        self.towers = []
+
+    def snapshot(self):
+        """Последние местоположение и набор вышек в формате get_coords.php."""
+        with self.lock:
+            return {
+                'device_location': self.latest_fix or {
+                    'error': "Не удалось найти рассчитанное местоположение устройства"
+                },
+                'towers': list(self.latest_towers),
+            }
+
+
+def make_handler(tailer):
+    class CoordsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in COORDS_PATHS:
+                self.send_error(404)
+                return
+            if tailer.poll():
+                body = tailer.snapshot()
+            else:
+                body = {'error': "Файл не найден"}
+            data = json.dumps(body, ensure_ascii=False, indent=4).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Браузер опрашивает постоянно, не засоряем вывод
+
+    return CoordsHandler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="HTTP-сервер координат из журнала location_log.txt")
+    parser.add_argument("--log", default=os.environ.get("PATH_TO_LOG", LOCATION_LOG_PATH),
+                        help="Журнал console_display (по умолчанию PATH_TO_LOG из окружения)")
+    parser.add_argument("--host", default=HTTP_HOST)
+    parser.add_argument("--port", type=int, default=HTTP_PORT)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tailer = LocationLogTailer(args.log)
+    tailer.poll()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(tailer))
+    print(f"Координаты доступны по адресу http://{args.host}:{args.port}/get_coords")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Сервер остановлен.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,25 @@
 import sys
-import pandas as pd
-import numpy as np
 import os
 import serial
-from PyQt5 import QtWidgets, QtGui, QtCore
+from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 import glob
-import time
-import threading
 
-MAP_IMAGE_PATH = "alidade_satellite.jpg"
+from ceng import parse_ceng_response
+from map_tiles import MAP_IMAGE_PATH, MAP_TILES_PATH, TileLayer, read_tiles_meta
+from simulation import DEFAULT_SPEED, DroneSimulation, SimulationClock
+from tower_db import TowerDatabase
+from tower_layer import TowerLayer
+from uart_server import start_uart_listener
+from uart_worker import UartWorker
+
 TOWERS_DATA_PATH = "250.csv"
-MAX_TOWERS_DISPLAY = 2000
+MAX_TOWERS_DISPLAY = 2000  # Максимум точек вышек, одновременно отдаваемых на отрисовку
 MOSCOW_CENTER_LON = 37.618423
 MOSCOW_CENTER_LAT = 55.751244
 MAP_ZOOM = 13
+PHYSICS_INTERVAL_MS = 10  # Период опроса часов симуляции
+RENDER_INTERVAL_MS = 16  # Период перерисовки сцены (~60 кадров в секунду)
 
 UART_PORT = "/dev/pts/7"  # Укажите правильный порт, например, /dev/pts/3, если используете виртуальный порт с socat
 BAUD_RATE = 9600
@@ -43,6 +48,12 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         control_layout.addWidget(QtWidgets.QLabel("Скорость:"))
         control_layout.addWidget(self.speed_input)
 
+        # Ускорение времени: 1 - реальное время, 1000 - долгий полет за секунды
+        self.time_warp_input = QtWidgets.QLineEdit()
+        self.time_warp_input.setPlaceholderText("Ускорение (1, 10, 1000)")
+        control_layout.addWidget(QtWidgets.QLabel("Ускорение:"))
+        control_layout.addWidget(self.time_warp_input)
+
         # Кнопка "Начать симуляцию"
         self.start_button = QtWidgets.QPushButton("Начать симуляцию")
         self.start_button.clicked.connect(self.start_simulation)
@@ -66,18 +77,22 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         self.map_view.setAspectLocked(True)
         self.map_view.setRange(QtCore.QRectF(MOSCOW_CENTER_LON - 0.04, MOSCOW_CENTER_LAT - 0.04, 0.08, 0.08))
 
-        self.towers = None
         self.add_background_image()
         self.load_towers()
         self.init_drone()
 
-        self.waypoints = []
-        self.trajectory_lines = []
-        self.drone_marker = None
-        self.current_waypoint_index = 0
-        self.is_moving = False
+        # Элементы сцены создаются один раз и далее обновляются на месте
+        self.trajectory_line = pg.PlotDataItem(pen=pg.mkPen(color=(255, 255, 0), width=2))
+        self.map_view.addItem(self.trajectory_line)
+        # Вышки из последнего ответа AT+CENG?: один элемент, данные заменяются через setData
+        self.detected_towers_scatter = pg.ScatterPlotItem(pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0), size=8)
+        self.map_view.addItem(self.detected_towers_scatter)
         self.detection_radius = 0
-        self.detection_circle = None
+        self.detection_circle = pg.CircleROI(
+            pos=(0, 0), size=(1, 1), pen=pg.mkPen(color=(255, 0, 0), width=1), movable=False
+        )
+        self.detection_circle.setVisible(False)
+        self.map_view.addItem(self.detection_circle)
         self.detected_towers_set = set()
         self.map_view.scene().sigMouseClicked.connect(self.add_waypoint)
 
@@ -92,14 +107,25 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         self.start_uart_listener()
         self.command_timer.start(1000)
 
-        try:
-            with serial.Serial(self.send_port, BAUD_RATE, timeout=1) as ser:
-                print(f"Подключение к порту {self.send_port}")
+        # Отрисовка идет с частотой обновления экрана, независимо от шагов симуляции
+        self.scene_dirty = False
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.timeout.connect(self.render_scene)
+        self.render_timer.start(RENDER_INTERVAL_MS)
 
-                # Отправляем команду для настройки
-                self.send_command(ser, "AT+CENG=1,1")
-        except serial.SerialException as e:
-            print(f"Ошибка при подключении к UART: {e}")
+        # Постоянное соединение для запросов к модему в отдельном потоке
+        self.uart_worker = UartWorker(self.send_port, self.baud_rate, self)
+        self.uart_worker.response_received.connect(self.on_uart_response)
+        self.uart_worker.start()
+
+        # Отправляем команду для настройки
+        self.uart_worker.request("AT+CENG=1,1")
+
+    def closeEvent(self, event):
+        self.uart_worker.stop()
+        if self.tile_layer is not None:
+            self.tile_layer.stop()
+        super().closeEvent(event)
 
     def add_waypoint(self, event):
         """Добавляет точки пути и активирует кнопку запуска после добавления точки."""
@@ -107,7 +133,7 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         waypoint_lon = mouse_point.x()
         waypoint_lat = mouse_point.y()
 
-        self.waypoints.append((waypoint_lon, waypoint_lat))
+        self.simulation.add_waypoint(waypoint_lon, waypoint_lat)
 
         waypoint_item = pg.ScatterPlotItem(
             x=[waypoint_lon], y=[waypoint_lat], pen=pg.mkPen(None), brush=pg.mkBrush(255, 255, 0, 255), size=10
@@ -130,22 +156,13 @@ class Sim800Emulator(QtWidgets.QMainWindow):
             self.map_view.removeItem(marker)
         self.tower_markers.clear()
 
-        for line in self.trajectory_lines:
-            self.map_view.removeItem(line)
-        self.trajectory_lines = []
-
-        if self.drone_marker:
-            self.map_view.removeItem(self.drone_marker)
-            self.drone_marker = None
-
-        if self.detection_circle:
-            self.map_view.removeItem(self.detection_circle)
-            self.detection_circle = None
+        self.trajectory_line.setData(x=[], y=[])
+        self.detected_towers_scatter.setData(x=[], y=[])
+        self.drone_marker.setData(x=[], y=[])
+        self.detection_circle.setVisible(False)
 
         # Сбрасываем состояние симуляции
-        self.waypoints.clear()
-        self.current_waypoint_index = 0
-        self.is_moving = False
+        self.simulation.reset()
         print("Симуляция сброшена.")
 
     def setup_uart_connections(self):
@@ -153,209 +170,59 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         try:
             self.receive_connection = serial.Serial(self.receive_port, self.baud_rate, timeout=1)
             print(f"Прием на UART порту {self.receive_port}")
-            self.send_connection = serial.Serial(self.send_port, self.baud_rate, timeout=1)
-            print(f"Отправка на UART порту {self.send_port}")
         except serial.SerialException as e:
             print(f"Ошибка при подключении к UART: {e}")
 
     def start_uart_listener(self):
         """Запускает поток для постоянного прослушивания UART-порта."""
-        uart_thread = threading.Thread(target=self.respond_to_uart_commands, daemon=True)
-        uart_thread.start()
-
-    def respond_to_uart_commands(self):
-        """Поток, который непрерывно слушает UART-порт для получения команд и немедленно отвечает."""
-        UART_PORT = self.receive_port
-        BAUD_RATE = self.baud_rate
+        start_uart_listener(self.receive_port, self.baud_rate, self.simulation)
 
-        try:
-            with serial.Serial(UART_PORT, BAUD_RATE, timeout=1) as ser:
-                print(f"Прослушивание команд на {UART_PORT}...")
-
-                # Очистка входного буфера при старте
-                ser.reset_input_buffer()
-
-                # Непрерывное чтение команд
-                while True:
-                    if ser.in_waiting > 0:
-                        # Чтение команды
-                        command = ser.readline().decode('utf-8').strip()
-                        print(f"Получена команда: {command}")
-
-                        # Обработка команды
-                        if command == "AT+CENG?":
-                            # Если команда AT+CENG?, отправляем данные вышек
-                            response = self.send_tower_data()
-                        elif command == "AT+CENG=1,1":
-                            # Команда активации режима отчета о сотах
-                            response = "OK"
-                        else:
-                            # Ответ по умолчанию на нераспознанные команды
-                            response = "ERROR"
-
-                        # Отправляем ответ
-                        ser.write((response + "\r\n").encode('utf-8'))
-                        print(f"Отправка ответа: {response}")
-
-                    # Короткая задержка для предотвращения чрезмерного использования ресурсов
-                    time.sleep(0.05)
-
-        except serial.SerialException as e:
-            print(f"Ошибка при подключении к UART: {e}")
-
-    def send_tower_data(self):
-        """Возвращает данные о 7 ближайших вышках в формате CENG."""
-        if self.drone_position is None or not isinstance(self.drone_position, np.ndarray):
-            print("Ошибка: координаты дрона не установлены.")
-            return "ERROR"
-
-        # Вычисляем расстояние от дрона до каждой вышки и сортируем по ближайшим
-        towers_with_distance = [
-            (lon, lat, mcc, mnc, cell, np.linalg.norm(self.drone_position - np.array([lon, lat])))
-            for lon, lat, mcc, mnc, cell in self.towers
-        ]
-        towers_with_distance.sort(key=lambda x: x[5])  # Сортируем по расстоянию
-        nearest_towers = towers_with_distance[:7]  # Берем 7 ближайших вышек
-
-        # Формируем данные о вышках в требуемом формате
-        tower_data_lines = []
-        for i, (lon, lat, mcc, mnc, cell, distance) in enumerate(nearest_towers):
-            if i == 0:
-                # Первая вышка с дополнительной информацией
-                line = f'+CENG: {i},"0034,{int(distance)},00,{mcc},{mnc},40,{cell:04x},01,05,6d07,255"'
-            else:
-                # Остальные вышки с сокращенной информацией
-                line = f'+CENG: {i},"0072,{int(distance)},44,{cell:04x},{mcc},{mnc},6d07"'
-            tower_data_lines.append(line)
-
-        # Объединяем строки с вышками и добавляем "OK" в конце
-        tower_data = "\n".join(tower_data_lines)
-        
-        print("Отправлены данные о вышках:\n" + tower_data)
-        return tower_data  # Возвращаем все данные как единую строку
+    def load_towers(self):
+        # Колонки базы отображаются в память из бинарного кэша
+        self.tower_db = TowerDatabase.from_csv(TOWERS_DATA_PATH)
 
+        # На карту попадают только вышки в области просмотра
+        self.tower_layer = TowerLayer(self.map_view, self.tower_db.spatial_index, MAX_TOWERS_DISPLAY)
 
+    def update_tower_colors(self):
+        """Запрашивает данные о вышках по UART; ответ обрабатывается в on_uart_response."""
+        # Если предыдущий запрос еще выполняется, новый не ставится в очередь
+        self.uart_worker.request("AT+CENG?")
 
-    def load_towers(self):
-        self.towers_df = pd.read_csv(TOWERS_DATA_PATH)
-        if len(self.towers_df) > MAX_TOWERS_DISPLAY:
-            self.towers_df = self.towers_df.sample(n=MAX_TOWERS_DISPLAY, random_state=1)
-    
-        latitudes = self.towers_df['lat'].values
-        longitudes = self.towers_df['lon'].values
-        mccs = self.towers_df['mcc'].values
-        mncs = self.towers_df['area'].values  # Получаем MNC
-        cells = self.towers_df['cell'].values
-    
-        self.tower_scatter = pg.ScatterPlotItem(
-            x=longitudes, y=latitudes, pen=pg.mkPen(None), brush=pg.mkBrush(0, 0, 255, 120), size=5
-        )
-        self.map_view.addItem(self.tower_scatter)
-        self.towers = list(zip(longitudes, latitudes, mccs, mncs, cells))  # Добавляем MNC в список вышек
+    def on_uart_response(self, command, response):
+        """Принимает ответ модема из потока UART."""
+        if command == "AT+CENG?":
+            print(f"Получены данные о вышках: {response}")
+            self.show_detected_towers(response)
 
-    def update_tower_colors(self):
+    def show_detected_towers(self, response):
         """Обновляет цвета вышек на карте, отображая только вышки, полученные по UART, с сопоставлением в БД."""
-        # Удаляем старые маркеры вышек, оставляя другие элементы
-        for marker in self.tower_markers:
-            self.map_view.removeItem(marker)
-        self.tower_markers.clear()
-        
-        detected_towers = []  # Список для хранения обнаруженных вышек с координатами
+        # Парсим данные о вышках из ответа
+        detected_tower_data = parse_ceng_response(response)  # Для координат вышек
+        detected_tower_text = []  # Для текстового отображения
 
-        # Запрашиваем данные о вышках по UART
-        try:
-            with serial.Serial(self.send_port, self.baud_rate, timeout=1) as ser:
-                print(f"Подключение к порту {self.send_port}")
-                
-                # Отправляем команду для запроса данных о вышках и получаем ответ
-                response = self.send_command(ser, "AT+CENG?")
-                print(f"Получены данные о вышках: {response}")
-                
-                # Парсим данные о вышках из ответа
-                detected_tower_data = []  # Для координат вышек
-                detected_tower_text = []  # Для текстового отображения
-                
-                lines = response.strip().splitlines()
-                for line in lines:
-                    if line.startswith("+CENG:"):
-                        try:
-                            parts = line.split(",", 1)
-                            if len(parts) < 2:
-                                continue
-                            
-                            # Извлекаем данные для первой вышки и остальных вышек с учетом формата
-                            cell_info = parts[1].strip('"').split(',')
-                            if len(cell_info) == 11:
-                                signal = int(cell_info[1])
-                                mcc = int(cell_info[3])
-                                mnc = int(cell_info[4])
-                                cellid = cell_info[6]
-                            elif len(cell_info) == 7:
-                                signal = int(cell_info[1])
-                                cellid = cell_info[3]
-                                mcc = int(cell_info[4])
-                                mnc = int(cell_info[5])
-                            else:
-                                print(f"Неподдерживаемый формат строки вышки: {line}")
-                                continue
-
-                            # Сохраняем данные о вышке
-                            detected_tower_data.append((mcc, mnc, cellid, signal))
-
-                        except (ValueError, IndexError) as e:
-                            print(f"Ошибка обработки строки вышки: {line} - {e}")
-                
-                # Получаем координаты для обнаруженных вышек и отображаем их на карте
-                for mcc, mnc, cellid, signal in detected_tower_data:
-                    tower_coordinates = self.find_tower_coordinates(mcc, mnc, cellid)
-                    if tower_coordinates:
-                        lon, lat = tower_coordinates
-                        brush = pg.mkBrush(255, 0, 0)  # Красный для всех полученных вышек
-                        tower_marker = pg.ScatterPlotItem(
-                            x=[lon], y=[lat], pen=pg.mkPen(None), brush=brush, size=8
-                        )
-                        self.map_view.addItem(tower_marker)
-                        self.tower_markers.append(tower_marker)  # Добавляем только маркеры вышек в список
-
-                        # Добавляем текстовую информацию
-                        detected_tower_text.append(f"Координаты: ({lon}, {lat}), Сигнал: {signal}")
-
-                # Отображаем текстовую информацию о вышках
-                self.display_detected_towers(detected_tower_text)
+        # Получаем координаты для обнаруженных вышек одним запросом к индексу
+        detected_coordinates = self.tower_db.find_towers_coordinates(detected_tower_data)
+        detected_lons = []
+        detected_lats = []
+        for (mcc, mnc, cellid, signal), tower_coordinates in zip(detected_tower_data, detected_coordinates):
+            if tower_coordinates:
+                lon, lat = tower_coordinates
+                detected_lons.append(lon)
+                detected_lats.append(lat)
 
-        except serial.SerialException as e:
-            print(f"Ошибка при подключении к UART: {e}")
+                # Добавляем текстовую информацию
+                detected_tower_text.append(f"Координаты: ({lon}, {lat}), Сигнал: {signal}")
 
+        # Красные маркеры всех полученных вышек без пересоздания элементов сцены
+        self.detected_towers_scatter.setData(x=detected_lons, y=detected_lats)
 
-    def parse_tower_data(self, response):
-        """Парсит данные о вышках из строки ответа и извлекает MCC, MNC, Cell ID и силу сигнала."""
-        detected_towers = []
-        lines = response.splitlines()
-        for line in lines:
-            if line.startswith("+CENG:"):
-                try:
-                    parts = line.split(",")
-                    # Извлекаем параметры: MCC, MNC, Cell ID, сигнал
-                    cell_info = parts[1].strip('"').split(',')
-                    mcc = int(cell_info[3], 16)  # MCC из 16-ричной системы
-                    mnc = int(cell_info[4])  # MNC
-                    cellid = cell_info[5]  # Cell ID в 16-ричной системе
-                    signal = int(cell_info[1])  # Уровень сигнала
-                    detected_towers.append((mcc, mnc, cellid, signal))
-                except (ValueError, IndexError) as e:
-                    print(f"Ошибка обработки строки вышки: {line} - {e}")
-        return detected_towers
+        # Отображаем текстовую информацию о вышках
+        self.display_detected_towers(detected_tower_text)
 
     def find_tower_coordinates(self, mcc, mnc, cellid):
         """Находит координаты вышки по данным из БД."""
-        cellid_dec = int(cellid, 16)  # Преобразуем Cell ID из 16-ричной системы в десятичную
-        tower = self.towers_df[(self.towers_df['mcc'] == mcc) &
-                            (self.towers_df['area'] == mnc) &
-                            (self.towers_df['cell'] == cellid_dec)]
-        if not tower.empty:
-            return tower.iloc[0]['lon'], tower.iloc[0]['lat']
-        else:
-            return None
+        return self.tower_db.find_towers_coordinates([(mcc, mnc, cellid, 0)])[0]
 
     
     def display_detected_towers(self, towers):
@@ -365,144 +232,89 @@ class Sim800Emulator(QtWidgets.QMainWindow):
                 print(tower_info)
 
     def add_background_image(self):
-        map_pixmap = QtGui.QPixmap(MAP_IMAGE_PATH)
-        if map_pixmap.isNull():
-            print("Ошибка: Не удалось загрузить изображение карты.")
+        # Фон карты - пирамида тайлов, нарезанная map_tiles.py; тайлы подгружаются по области просмотра
+        self.tile_layer = None
+        meta = read_tiles_meta(MAP_TILES_PATH)
+        if meta is None:
+            print(f"Ошибка: Не найдены тайлы карты {MAP_TILES_PATH}. Нарежьте их: python map_tiles.py {MAP_IMAGE_PATH}")
             return
-
-        map_image = map_pixmap.transformed(QtGui.QTransform().rotate(90), mode=QtCore.Qt.SmoothTransformation)
-        map_image = map_image.toImage()
-        width, height = map_image.width(), map_image.height()
-        map_image = map_image.convertToFormat(QtGui.QImage.Format_RGB32)
-        ptr = map_image.bits()
-        ptr.setsize(height * width * 4)
-        img_array = np.array(ptr).reshape((height, width, 4))
-
-        map_item = pg.ImageItem(img_array)
-        scale_factor = 13
-        map_item.setRect(MOSCOW_CENTER_LON - 0.04 * scale_factor, MOSCOW_CENTER_LAT - 0.04 * scale_factor, 0.08 * scale_factor, 0.08 * scale_factor)
-        map_item.setZValue(-1)
-        self.map_view.addItem(map_item)
+        self.tile_layer = TileLayer(self.map_view, MAP_TILES_PATH, meta)
 
     def init_drone(self):
-        self.drone_position = np.array([MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT])
+        self.simulation = DroneSimulation(self.tower_db, (MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT))
+        self.simulation.add_listener(self.on_simulation_changed)
         self.drone_marker = pg.ScatterPlotItem(
-            x=[self.drone_position[0]], y=[self.drone_position[1]], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=8
+            x=[MOSCOW_CENTER_LON], y=[MOSCOW_CENTER_LAT], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=8
         )
         self.map_view.addItem(self.drone_marker)
 
+    def on_simulation_changed(self, simulation):
+        """Отмечает, что сцену нужно перерисовать на ближайшем кадре."""
+        self.scene_dirty = True
+
+    def render_scene(self):
+        """Перерисовывает дрона, если симуляция изменилась с прошлого кадра."""
+        if not self.scene_dirty:
+            return
+        self.scene_dirty = False
+        lon, lat = self.simulation.get_position()
+        self.set_drone_marker(lon, lat)
+
     def add_waypoint(self, event):
         mouse_point = self.map_view.plotItem.vb.mapSceneToView(event.scenePos())
         waypoint_lon = mouse_point.x()
         waypoint_lat = mouse_point.y()
 
-        self.waypoints.append((waypoint_lon, waypoint_lat))
+        self.simulation.add_waypoint(waypoint_lon, waypoint_lat)
 
         waypoint_item = pg.ScatterPlotItem(
             x=[waypoint_lon], y=[waypoint_lat], pen=pg.mkPen(None), brush=pg.mkBrush(255, 255, 0, 255), size=10
         )
         self.map_view.addItem(waypoint_item)
 
-        waypoint_number = len(self.waypoints)
+        waypoint_number = len(self.simulation.waypoints)
         text_item = pg.TextItem(text=str(waypoint_number), anchor=(0.5, 0), color=(255, 255, 255))
         text_item.setPos(waypoint_lon, waypoint_lat + 0.002)
         self.map_view.addItem(text_item)
 
         self.update_trajectory()
 
-        if len(self.waypoints) == 1:
-            self.set_drone_marker(waypoint_lon, waypoint_lat)
-
     def set_drone_marker(self, lon, lat):
-        if self.drone_marker:
-            self.map_view.removeItem(self.drone_marker)
-
-        self.drone_marker = pg.ScatterPlotItem(
-            x=[lon], y=[lat], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=12
-        )
-        self.map_view.addItem(self.drone_marker)
-        self.drone_position = np.array([lon, lat])
+        self.drone_marker.setData(x=[lon], y=[lat], size=12)
         self.update_detection_radius(float(self.radius_input.text()) if self.radius_input.text() else 0)
 
     def update_trajectory(self):
-        # Удаляем старую траекторию
-        for line in self.trajectory_lines:
-            self.map_view.removeItem(line)
-        self.trajectory_lines = []
-
-        # Отрисовываем линии между вейпоинтами
-        for i in range(1, len(self.waypoints)):
-            line = pg.PlotDataItem(
-                x=[self.waypoints[i - 1][0], self.waypoints[i][0]],
-                y=[self.waypoints[i - 1][1], self.waypoints[i][1]],
-                pen=pg.mkPen(color=(255, 255, 0), width=2)
-            )
-            self.map_view.addItem(line)
-            self.trajectory_lines.append(line)
+        # Одна ломаная через все точки пути
+        waypoints = self.simulation.waypoints
+        self.trajectory_line.setData(x=[w[0] for w in waypoints], y=[w[1] for w in waypoints])
 
     def update_detection_radius(self, radius):
-        if self.detection_circle:
-            self.map_view.removeItem(self.detection_circle)
-
         self.detection_radius = radius
         if radius > 0:
-            self.detection_circle = pg.CircleROI(
-                pos=(self.drone_position[0] - radius / 111320, self.drone_position[1] - radius / 111320),
-                size=(radius * 2 / 111320, radius * 2 / 111320),
-                pen=pg.mkPen(color=(255, 0, 0), width=1),
-                movable=False
-            )
-            self.map_view.addItem(self.detection_circle)
+            drone_lon, drone_lat = self.simulation.get_position()
+            self.detection_circle.setPos((drone_lon - radius / 111320, drone_lat - radius / 111320))
+            self.detection_circle.setSize((radius * 2 / 111320, radius * 2 / 111320))
+            self.detection_circle.setVisible(True)
             self.update_tower_colors()
+        else:
+            self.detection_circle.setVisible(False)
 
     def start_simulation(self):
-        if not self.waypoints:
+        if not self.simulation.start():
             print("Не установлены точки пути для симуляции.")
             return
-        self.is_moving = True
-        self.current_waypoint_index = 0
         self.drone_timer = QtCore.QTimer(self)
         self.drone_timer.timeout.connect(self.move_drone)
-        self.drone_timer.start(1)  # Задаем таймер с интервалом в 5 миллисекунд (200 Гц)
-
-    def send_command(self, ser, command):
-        """Отправка команды на UART и получение ответа."""
-        ser.write((command + "\r\n").encode('utf-8'))
-        print(f"Отправлена команда: {command}")
-
-        # Чтение ответа
-        time.sleep(1)  # Небольшая задержка для получения ответа
-        response = ser.read_all().decode('utf-8')
-        print(f"Ответ: {response}")
-        return response
+        self.clock = SimulationClock()
+        self.clock.start()
+        self.drone_timer.start(PHYSICS_INTERVAL_MS)
 
     def move_drone(self):
-        if self.is_moving and self.waypoints:
-            current_waypoint = self.waypoints[self.current_waypoint_index]
-            distance = np.sqrt((current_waypoint[0] - self.drone_position[0]) ** 2 + (current_waypoint[1] - self.drone_position[1]) ** 2)
-
-            if distance < 0.001:
-                self.current_waypoint_index += 1
-                if self.current_waypoint_index >= len(self.waypoints):
-                    self.is_moving = False
-                    self.drone_timer.stop()  # Останавливаем таймер
-                    return
-                current_waypoint = self.waypoints[self.current_waypoint_index]
-
-            # Обновляем позицию
-            direction = (current_waypoint[0] - self.drone_position[0], current_waypoint[1] - self.drone_position[1])
-            norm = np.sqrt(direction[0] ** 2 + direction[1] ** 2)
-            if norm != 0:
-                direction = (direction[0] / norm, direction[1] / norm)
-                speed = float(self.speed_input.text()) if self.speed_input.text() else 1.0
-                self.drone_position[0] += direction[0] * speed * 0.0001
-                self.drone_position[1] += direction[1] * speed * 0.0001
-
-            self.set_drone_marker(self.drone_position[0], self.drone_position[1])
-
-            # Обновляем траекторию и радиус обнаружения
-            self.update_trajectory()
-            self.update_detection_radius(self.detection_radius)
+        self.simulation.speed = float(self.speed_input.text()) if self.speed_input.text() else DEFAULT_SPEED
+        self.clock.time_warp = float(self.time_warp_input.text()) if self.time_warp_input.text() else 1.0
+        # Шаги физики по часам симуляции; отрисовка выполняется по таймеру в render_scene
+        if not self.simulation.advance(self.clock.advance()):
+            self.drone_timer.stop()  # Останавливаем таймер
 
 
 if __name__ == "__main__":
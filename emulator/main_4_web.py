@@ -1,20 +1,23 @@
 import sys
-import pandas as pd
-import numpy as np
 import os
 import serial
-from PyQt5 import QtWidgets, QtGui, QtCore
+from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 import glob
-import time
-import threading
 
-MAP_IMAGE_PATH = "alidade_satellite.jpg"
+from map_tiles import MAP_IMAGE_PATH, MAP_TILES_PATH, TileLayer, read_tiles_meta
+from simulation import DEFAULT_SPEED, NEAREST_TOWERS_COUNT, DroneSimulation, SimulationClock
+from tower_db import TowerDatabase
+from tower_layer import TowerLayer
+from uart_server import start_uart_listener
+
 TOWERS_DATA_PATH = "250.csv"
-MAX_TOWERS_DISPLAY = 2000
+MAX_TOWERS_DISPLAY = 2000  # Максимум точек вышек, одновременно отдаваемых на отрисовку
 MOSCOW_CENTER_LON = 37.618423
 MOSCOW_CENTER_LAT = 55.751244
 MAP_ZOOM = 13
+PHYSICS_INTERVAL_MS = 10  # Период опроса часов симуляции
+RENDER_INTERVAL_MS = 16  # Период перерисовки сцены (~60 кадров в секунду)
 
 class Sim800Emulator(QtWidgets.QMainWindow):
     def __init__(self):
@@ -40,6 +43,12 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         control_layout.addWidget(QtWidgets.QLabel("Скорость:"))
         control_layout.addWidget(self.speed_input)
 
+        # Ускорение времени: 1 - реальное время, 1000 - долгий полет за секунды
+        self.time_warp_input = QtWidgets.QLineEdit()
+        self.time_warp_input.setPlaceholderText("Ускорение (1, 10, 1000)")
+        control_layout.addWidget(QtWidgets.QLabel("Ускорение:"))
+        control_layout.addWidget(self.time_warp_input)
+
         # Кнопка "Начать симуляцию"
         self.start_button = QtWidgets.QPushButton("Начать симуляцию")
         self.start_button.clicked.connect(self.start_simulation)
@@ -63,7 +72,6 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         self.map_view.setAspectLocked(True)
         self.map_view.setRange(QtCore.QRectF(MOSCOW_CENTER_LON - 0.04, MOSCOW_CENTER_LAT - 0.04, 0.08, 0.08))
 
-        self.towers = None
         self.add_background_image()
         self.load_towers()
         self.init_drone()
@@ -71,13 +79,15 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         self.coordinates_label = QtWidgets.QLabel("Текущие координаты: N/A")
         layout.addWidget(self.coordinates_label)
 
-        self.waypoints = []
-        self.trajectory_lines = []
-        self.drone_marker = None
-        self.current_waypoint_index = 0
-        self.is_moving = False
+        # Элементы сцены создаются один раз и далее обновляются на месте
+        self.trajectory_line = pg.PlotDataItem(pen=pg.mkPen(color=(255, 255, 0), width=2))
+        self.map_view.addItem(self.trajectory_line)
         self.detection_radius = 0
-        self.detection_circle = None
+        self.detection_circle = pg.CircleROI(
+            pos=(0, 0), size=(1, 1), pen=pg.mkPen(color=(255, 0, 0), width=1), movable=False
+        )
+        self.detection_circle.setVisible(False)
+        self.map_view.addItem(self.detection_circle)
         self.detected_towers_set = set()
         self.map_view.scene().sigMouseClicked.connect(self.add_waypoint)
 
@@ -92,8 +102,24 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         self.start_uart_listener()
         self.command_timer.start(1000)
 
-        # Список для хранения меток расстояний до вышек
+        # Метки расстояний до ближайших вышек, переиспользуемые на каждом кадре
         self.tower_distance_labels = []
+        for _ in range(NEAREST_TOWERS_COUNT):
+            label = pg.TextItem(text="", anchor=(0.5, -1.0), color=(255, 255, 255))
+            label.setVisible(False)
+            self.map_view.addItem(label)
+            self.tower_distance_labels.append(label)
+
+        # Отрисовка идет с частотой обновления экрана, независимо от шагов симуляции
+        self.scene_dirty = False
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.timeout.connect(self.render_scene)
+        self.render_timer.start(RENDER_INTERVAL_MS)
+
+    def closeEvent(self, event):
+        if self.tile_layer is not None:
+            self.tile_layer.stop()
+        super().closeEvent(event)
 
     def add_waypoint(self, event):
         """Добавляет точки пути и активирует кнопку запуска после добавления точки."""
@@ -101,7 +127,7 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         waypoint_lon = mouse_point.x()
         waypoint_lat = mouse_point.y()
 
-        self.waypoints.append((waypoint_lon, waypoint_lat))
+        self.simulation.add_waypoint(waypoint_lon, waypoint_lat)
 
         waypoint_item = pg.ScatterPlotItem(
             x=[waypoint_lon], y=[waypoint_lat], pen=pg.mkPen(None), brush=pg.mkBrush(255, 255, 0, 255), size=10
@@ -112,7 +138,7 @@ class Sim800Emulator(QtWidgets.QMainWindow):
         # Сохраняем маркеры для сброса
         self.tower_markers.append(waypoint_item)
 
-        waypoint_number = len(self.waypoints)
+        waypoint_number = len(self.simulation.waypoints)
         text_item = pg.TextItem(text=str(waypoint_number), anchor=(0.5, 0), color=(255, 255, 255))
         text_item.setPos(waypoint_lon, waypoint_lat + 0.002)
         self.map_view.addItem(text_item)
@@ -120,9 +146,6 @@ class Sim800Emulator(QtWidgets.QMainWindow):
 
         self.update_trajectory()
 
-        if len(self.waypoints) == 1:
-            self.set_drone_marker(waypoint_lon, waypoint_lat)
-
     def reset_simulation(self):
         """Сбрасывает все состояния, останавливает процессы и очищает карту."""
         # Останавливаем таймеры
@@ -135,27 +158,16 @@ class Sim800Emulator(QtWidgets.QMainWindow):
             self.map_view.removeItem(marker)
         self.tower_markers.clear()
 
-        for line in self.trajectory_lines:
-            self.map_view.removeItem(line)
-        self.trajectory_lines = []
-
-        if self.drone_marker:
-            self.map_view.removeItem(self.drone_marker)
-            self.drone_marker = None
+        self.trajectory_line.setData(x=[], y=[])
+        self.drone_marker.setData(x=[], y=[])
+        self.detection_circle.setVisible(False)
 
-        if self.detection_circle:
-            self.map_view.removeItem(self.detection_circle)
-            self.detection_circle = None
-
-        # Удаляем метки расстояний до вышек
+        # Скрываем метки расстояний до вышек
         for label in self.tower_distance_labels:
-            self.map_view.removeItem(label)
-        self.tower_distance_labels = []
+            label.setVisible(False)
 
         # Сбрасываем состояние симуляции
-        self.waypoints.clear()
-        self.current_waypoint_index = 0
-        self.is_moving = False
+        self.simulation.reset()
         print("Симуляция сброшена.")
 
     def setup_uart_connections(self):
@@ -168,301 +180,101 @@ class Sim800Emulator(QtWidgets.QMainWindow):
 
     def start_uart_listener(self):
         """Запускает поток для постоянного прослушивания UART-порта."""
-        uart_thread = threading.Thread(target=self.respond_to_uart_commands, daemon=True)
-        uart_thread.start()
-
-    def respond_to_uart_commands(self):
-        """Поток, который непрерывно слушает UART-порт для получения команд и немедленно отвечает."""
-        UART_PORT = self.receive_port
-        BAUD_RATE = self.baud_rate
-
-        try:
-            with serial.Serial(UART_PORT, BAUD_RATE, timeout=1) as ser:
-                print(f"Прослушивание команд на {UART_PORT}...")
-
-                # Очистка входного буфера при старте
-                ser.reset_input_buffer()
-
-                # Непрерывное чтение команд
-                while True:
-                    if ser.in_waiting > 0:
-                        # Чтение команды
-                        command = ser.readline().decode('utf-8').strip()
-                        print(f"Получена команда: {command}")
-
-                        # Обработка команды
-                        if command == "AT+CENG?":
-                            # Если команда AT+CENG?, отправляем данные вышек
-                            response = self.send_tower_data()
-                        elif command == "AT+CENG=1,1":
-                            # Команда активации режима отчета о сотах
-                            response = "OK"
-                        else:
-                            # Ответ по умолчанию на нераспознанные команды
-                            response = "ERROR"
-
-                        # Отправляем ответ
-                        ser.write((response + "\r\n").encode('utf-8'))
-                        print(f"Отправка ответа: {response}")
-
-                    # Короткая задержка для предотвращения чрезмерного использования ресурсов
-                    time.sleep(0.05)
-
-        except serial.SerialException as e:
-            print(f"Ошибка при подключении к UART: {e}")
-
-    def calculate_distance(self, lat1, lon1, lat2, lon2):
-        """Вычисляет расстояние между двумя географическими точками (в метрах)."""
-        R = 6371000  # Радиус Земли в метрах
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        dphi = np.radians(lat2 - lat1)
-        dlambda = np.radians(lon2 - lon1)
-
-        a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-
-        return R * c
-
-    def calculate_rssi(self, lat1, lon1, lat2, lon2):
-        """Вычисляет приблизительное значение RSSI на основе расстояния между двумя точками."""
-        distance = self.calculate_distance(lat1, lon1, lat2, lon2)  # Расстояние в метрах
-        if distance < 1:
-            distance = 1  # Избегаем log(0)
-        A = -40  # RSSI на расстоянии 1 метр
-        n = 3    # Коэффициент потерь
-        rssi = A - 10 * n * np.log10(distance)
-        rssi = round(rssi)
-        return rssi
-
-    def calculate_distances_vectorized(self, lat1, lon1, lat2, lon2):
-        """Векторизованное вычисление расстояний между точками."""
-        R = 6371000  # Радиус Земли в метрах
-        phi1 = np.radians(lat1)
-        phi2 = np.radians(lat2)
-        dphi = np.radians(lat2 - lat1)
-        dlambda = np.radians(lon2 - lon1)
-        a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-        distances = R * c
-        return distances
-
-    def get_nearest_towers(self):
-        """Получает 7 ближайших вышек к текущей позиции дрона."""
-        if self.drone_position is None:
-            return []
-
-        drone_lon, drone_lat = self.drone_position[0], self.drone_position[1]
-
-        tower_lons = self.tower_positions[:, 0]
-        tower_lats = self.tower_positions[:, 1]
-
-        distances = self.calculate_distances_vectorized(drone_lat, drone_lon, tower_lats, tower_lons)
-
-        # Получаем индексы 7 ближайших вышек
-        nearest_indices = np.argsort(distances)[:7]
-
-        nearest_towers = []
-        for idx in nearest_indices:
-            lon = tower_lons[idx]
-            lat = tower_lats[idx]
-            mcc = self.towers_df.iloc[idx]['mcc']
-            mnc = self.towers_df.iloc[idx]['net']
-            cell = self.towers_df.iloc[idx]['cell']
-            distance = distances[idx]
-            rssi = self.calculate_rssi(drone_lat, drone_lon, lat, lon)
-            nearest_towers.append((idx, lon, lat, mcc, mnc, cell, distance, rssi))
-        return nearest_towers
+        start_uart_listener(self.receive_port, self.baud_rate, self.simulation)
 
     def update_nearest_towers(self):
         """Обновляет цвета вышек, выделяя 7 ближайших красным цветом, и отображает расстояния."""
-        if self.drone_position is None:
-            return
-
-        nearest_towers = self.get_nearest_towers()
+        nearest_towers = self.simulation.get_nearest_towers()
         nearest_indices = [t[0] for t in nearest_towers]
 
-        # Сбрасываем все кисти в синий цвет
-        self.tower_brushes = [pg.mkBrush(0, 0, 255, 120) for _ in range(len(self.towers_df))]
         # Выделяем ближайшие вышки красным цветом
-        for idx in nearest_indices:
-            self.tower_brushes[idx] = pg.mkBrush(255, 0, 0, 255)
-
-        # Обновляем отображение вышек
-        self.tower_scatter.setBrush(self.tower_brushes)
-
-        # Удаляем существующие метки расстояний
-        for label in self.tower_distance_labels:
-            self.map_view.removeItem(label)
-        self.tower_distance_labels = []
-
-        # Добавляем метки расстояний для ближайших вышек
-        for t in nearest_towers:
-            idx, lon, lat, mcc, mnc, cell, distance, rssi = t
-            distance_text = f"{int(distance)} м"
-            text_item = pg.TextItem(text=distance_text, anchor=(0.5, -1.0), color=(255, 255, 255))
-            text_item.setPos(lon, lat)
-            self.map_view.addItem(text_item)
-            self.tower_distance_labels.append(text_item)
-
-    def send_tower_data(self):
-        """Возвращает данные о 7 ближайших вышках с вычисленным RSSI и расстоянием."""
-        if self.drone_position is None or not isinstance(self.drone_position, np.ndarray):
-            print("Ошибка: координаты дрона не установлены.")
-            return "ERROR"
-
-        nearest_towers = self.get_nearest_towers()
-        if not nearest_towers:
-            return "ERROR"
-
-        tower_data_lines = []
-        for i, (idx, lon, lat, mcc, mnc, cell, distance, rssi) in enumerate(nearest_towers):
-            distance_with_error = distance + np.random.normal(0, 5)
-            distance_with_error = max(0, int(distance_with_error))
-
-            rssi_with_error = rssi + np.random.normal(0, 2)
-            rssi_with_error = max(0, int(rssi_with_error))
-
-            if i == 0:
-                line = f'+CENG: {i},"0034,{-rssi},00,{mcc},{mnc},40,{cell:04x},01,05,6d07,255"'
+        self.tower_layer.set_highlighted(nearest_indices)
+
+        # Обновляем метки расстояний для ближайших вышек
+        for i, label in enumerate(self.tower_distance_labels):
+            if i < len(nearest_towers):
+                idx, lon, lat, mcc, mnc, cell, distance, rssi = nearest_towers[i]
+                label.setText(f"{int(distance)} м")
+                label.setPos(lon, lat)
+                label.setVisible(True)
             else:
-                line = f'+CENG: {i},"0072,{-rssi},44,{cell:04x},{mcc},{mnc},6d07"'
-            tower_data_lines.append(line)
-
-        tower_data = "\n".join(tower_data_lines)
-        print("Отправлены данные о вышках с расстоянием и RSSI:\n" + tower_data)
-        return tower_data
+                label.setVisible(False)
 
     def load_towers(self):
-        self.towers_df = pd.read_csv(TOWERS_DATA_PATH)
-        if len(self.towers_df) > MAX_TOWERS_DISPLAY:
-            self.towers_df = self.towers_df.sample(n=MAX_TOWERS_DISPLAY, random_state=1)
-        
-        latitudes = self.towers_df['lat'].values
-        longitudes = self.towers_df['lon'].values
-        mccs = self.towers_df['mcc'].values
-        mncs = self.towers_df['net'].values  # Получаем MNC
-        cells = self.towers_df['cell'].values
+        # Колонки базы отображаются в память из бинарного кэша
+        self.tower_db = TowerDatabase.from_csv(TOWERS_DATA_PATH)
 
-        self.tower_positions = np.column_stack((longitudes, latitudes))
-        self.tower_brushes = [pg.mkBrush(0, 0, 255, 120) for _ in range(len(self.towers_df))]
-
-        self.tower_scatter = pg.ScatterPlotItem(
-            x=longitudes, y=latitudes, pen=pg.mkPen(None), brush=self.tower_brushes, size=5
-        )
-        self.map_view.addItem(self.tower_scatter)
-        self.towers = list(zip(longitudes, latitudes, mccs, mncs, cells))  # Добавляем MNC в список вышек
+        # На карту попадают только вышки в области просмотра
+        self.tower_layer = TowerLayer(self.map_view, self.tower_db.spatial_index, MAX_TOWERS_DISPLAY)
 
     def add_background_image(self):
-        map_pixmap = QtGui.QPixmap(MAP_IMAGE_PATH)
-        if map_pixmap.isNull():
-            print("Ошибка: Не удалось загрузить изображение карты.")
+        # Фон карты - пирамида тайлов, нарезанная map_tiles.py; тайлы подгружаются по области просмотра
+        self.tile_layer = None
+        meta = read_tiles_meta(MAP_TILES_PATH)
+        if meta is None:
+            print(f"Ошибка: Не найдены тайлы карты {MAP_TILES_PATH}. Нарежьте их: python map_tiles.py {MAP_IMAGE_PATH}")
             return
-
-        map_image = map_pixmap.transformed(QtGui.QTransform().rotate(90), mode=QtCore.Qt.SmoothTransformation)
-        map_image = map_image.toImage()
-        width, height = map_image.width(), map_image.height()
-        map_image = map_image.convertToFormat(QtGui.QImage.Format_RGB32)
-        ptr = map_image.bits()
-        ptr.setsize(height * width * 4)
-        img_array = np.array(ptr).reshape((height, width, 4))
-
-        map_item = pg.ImageItem(img_array)
-        scale_factor = 13
-        map_item.setRect(MOSCOW_CENTER_LON - 0.04 * scale_factor, MOSCOW_CENTER_LAT - 0.04 * scale_factor, 0.08 * scale_factor, 0.08 * scale_factor)
-        map_item.setZValue(-1)
-        self.map_view.addItem(map_item)
+        self.tile_layer = TileLayer(self.map_view, MAP_TILES_PATH, meta)
 
     def init_drone(self):
-        self.drone_position = np.array([MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT])
+        self.simulation = DroneSimulation(self.tower_db, (MOSCOW_CENTER_LON, MOSCOW_CENTER_LAT))
+        self.simulation.add_listener(self.on_simulation_changed)
         self.drone_marker = pg.ScatterPlotItem(
-            x=[self.drone_position[0]], y=[self.drone_position[1]], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=8
+            x=[MOSCOW_CENTER_LON], y=[MOSCOW_CENTER_LAT], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=8
         )
         self.map_view.addItem(self.drone_marker)
 
-    def set_drone_marker(self, lon, lat):
-        if self.drone_marker:
-            self.map_view.removeItem(self.drone_marker)
+    def on_simulation_changed(self, simulation):
+        """Отмечает, что сцену нужно перерисовать на ближайшем кадре."""
+        self.scene_dirty = True
 
-        self.drone_marker = pg.ScatterPlotItem(
-            x=[lon], y=[lat], pen=pg.mkPen(None), brush=pg.mkBrush(255, 0, 0, 255), size=12
-        )
-        self.map_view.addItem(self.drone_marker)
-        self.drone_position = np.array([lon, lat])
+    def render_scene(self):
+        """Перерисовывает дрона и ближайшие вышки, если симуляция изменилась с прошлого кадра."""
+        if not self.scene_dirty:
+            return
+        self.scene_dirty = False
+        lon, lat = self.simulation.get_position()
+        self.set_drone_marker(lon, lat)
+        self.update_nearest_towers()
+
+    def set_drone_marker(self, lon, lat):
+        self.drone_marker.setData(x=[lon], y=[lat], size=12)
         self.update_detection_radius(float(self.radius_input.text()) if self.radius_input.text() else 0)
 
         # Обновляем метку с координатами
         self.coordinates_label.setText(f"Текущие координаты: {lat:.6f}, {lon:.6f}")
 
     def update_trajectory(self):
-        # Удаляем старую траекторию
-        for line in self.trajectory_lines:
-            self.map_view.removeItem(line)
-        self.trajectory_lines = []
-
-        # Отрисовываем линии между вейпоинтами
-        for i in range(1, len(self.waypoints)):
-            line = pg.PlotDataItem(
-                x=[self.waypoints[i - 1][0], self.waypoints[i][0]],
-                y=[self.waypoints[i - 1][1], self.waypoints[i][1]],
-                pen=pg.mkPen(color=(255, 255, 0), width=2)
-            )
-            self.map_view.addItem(line)
-            self.trajectory_lines.append(line)
+        # Одна ломаная через все точки пути
+        waypoints = self.simulation.waypoints
+        self.trajectory_line.setData(x=[w[0] for w in waypoints], y=[w[1] for w in waypoints])
 
     def update_detection_radius(self, radius):
-        if self.detection_circle:
-            self.map_view.removeItem(self.detection_circle)
-
         self.detection_radius = radius
         if radius > 0:
-            self.detection_circle = pg.CircleROI(
-                pos=(self.drone_position[0] - radius / 111320, self.drone_position[1] - radius / 111320),
-                size=(radius * 2 / 111320, radius * 2 / 111320),
-                pen=pg.mkPen(color=(255, 0, 0), width=1),
-                movable=False
-            )
-            self.map_view.addItem(self.detection_circle)
+            drone_lon, drone_lat = self.simulation.get_position()
+            self.detection_circle.setPos((drone_lon - radius / 111320, drone_lat - radius / 111320))
+            self.detection_circle.setSize((radius * 2 / 111320, radius * 2 / 111320))
+            self.detection_circle.setVisible(True)
+        else:
+            self.detection_circle.setVisible(False)
 
     def start_simulation(self):
-        if not self.waypoints:
+        if not self.simulation.start():
             print("Не установлены точки пути для симуляции.")
             return
-        self.is_moving = True
-        self.current_waypoint_index = 0
         self.drone_timer = QtCore.QTimer(self)
         self.drone_timer.timeout.connect(self.move_drone)
-        self.drone_timer.start(1)
+        self.clock = SimulationClock()
+        self.clock.start()
+        self.drone_timer.start(PHYSICS_INTERVAL_MS)
 
     def move_drone(self):
-        if self.is_moving and self.waypoints:
-            current_waypoint = self.waypoints[self.current_waypoint_index]
-            distance = np.sqrt((current_waypoint[0] - self.drone_position[0]) ** 2 + (current_waypoint[1] - self.drone_position[1]) ** 2)
-
-            if distance < 0.001:
-                self.current_waypoint_index += 1
-                if self.current_waypoint_index >= len(self.waypoints):
-                    self.is_moving = False
-                    self.drone_timer.stop()  # Останавливаем таймер
-                    return
-                current_waypoint = self.waypoints[self.current_waypoint_index]
-
-            # Обновляем позицию
-            direction = (current_waypoint[0] - self.drone_position[0], current_waypoint[1] - self.drone_position[1])
-            norm = np.sqrt(direction[0] ** 2 + direction[1] ** 2)
-            if norm != 0:
-                direction = (direction[0] / norm, direction[1] / norm)
-                speed = float(self.speed_input.text()) if self.speed_input.text() else 1.0
-                self.drone_position[0] += direction[0] * speed * 0.0001
-                self.drone_position[1] += direction[1] * speed * 0.0001
-
-            self.set_drone_marker(self.drone_position[0], self.drone_position[1])
-
-            # Обновляем траекторию и радиус обнаружения
-            self.update_trajectory()
-            self.update_detection_radius(self.detection_radius)
-
-            # Обновляем ближайшие вышки и метки расстояний
-            self.update_nearest_towers()
+        self.simulation.speed = float(self.speed_input.text()) if self.speed_input.text() else DEFAULT_SPEED
+        self.clock.time_warp = float(self.time_warp_input.text()) if self.time_warp_input.text() else 1.0
+        # Шаги физики по часам симуляции; отрисовка выполняется по таймеру в render_scene
+        if not self.simulation.advance(self.clock.advance()):
+            self.drone_timer.stop()  # Останавливаем таймер
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
@@ -0,0 +1,260 @@
+import argparse
+import json
+import math
+import os
+import queue
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore, QtGui
+
+MAP_IMAGE_PATH = "alidade_satellite.jpg"
+MAP_TILES_PATH = "map_tiles"
+TILES_META_FILE = "meta.json"
+MOSCOW_CENTER_LON = 37.618423
+MOSCOW_CENTER_LAT = 55.751244
+MAP_HALF_SIZE = 0.04 * 13  # Половина стороны снимка alidade_satellite.jpg в градусах
+TILE_SIZE = 256  # Сторона тайла в пикселях
+TILE_FORMAT = "jpg"
+TILE_QUALITY = 90
+TILE_CACHE_SIZE = 256  # Максимум тайлов в памяти (~64 МиБ при 256x256 RGBA)
+REFRESH_DELAY_MS = 50  # Задержка подгрузки после изменения области просмотра
+BASE_TILE_Z = -3  # Тайл нулевого уровня лежит под остальными и виден, пока они загружаются
+TILE_Z = -2
+
+
+def tile_path(tiles_dir, level, tx, ty):
+    return os.path.join(tiles_dir, str(level), str(tx), f"{ty}.{TILE_FORMAT}")
+
+
+def cut_tiles(source, tiles_dir, bounds, tile_size=TILE_SIZE, quality=TILE_QUALITY):
+    """Нарезает снимок в пирамиду тайлов tiles_dir/уровень/x/y.jpg.
+
+    Уровень z делит область bounds = (lon_min, lat_min, lon_max, lat_max)
+    на 2^z x 2^z тайлов, y отсчитывается от северного края. Последний
+    уровень - первый, на котором тайлы не мельче пикселей исходного снимка.
+    """
+    image = QtGui.QImage(source)
+    if image.isNull():
+        raise ValueError(f"Не удалось загрузить изображение {source}")
+    max_level = max(0, math.ceil(math.log2(max(image.width(), image.height()) / tile_size)))
+
+    for level in range(max_level + 1):
+        count = 2 ** level
+        scaled = image.scaled(count * tile_size, count * tile_size,
+                              QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+        for tx in range(count):
+            os.makedirs(os.path.join(tiles_dir, str(level), str(tx)), exist_ok=True)
+            for ty in range(count):
+                tile = scaled.copy(tx * tile_size, ty * tile_size, tile_size, tile_size)
+                tile.save(tile_path(tiles_dir, level, tx, ty), TILE_FORMAT.upper(), quality)
+        print(f"Уровень {level}: {count}x{count} тайлов")
+
+    meta = {
+        'bounds': [float(value) for value in bounds],
+        'tile_size': tile_size,
+        'max_level': max_level,
+        'format': TILE_FORMAT,
+    }
+    with open(os.path.join(tiles_dir, TILES_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def read_tiles_meta(tiles_dir):
+    """Метаданные пирамиды тайлов; None, если тайлы не нарезаны."""
+    try:
+        with open(os.path.join(tiles_dir, TILES_META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_tile_array(path):
+    """Читает тайл в массив RGBA (строки снизу вверх) для ImageItem с axisOrder='row-major'."""
+    image = QtGui.QImage(path)
+    if image.isNull():
+        return None
+    # Format_RGB32 хранит байты как BGRA, поэтому берем формат с порядком RGBA
+    image = image.convertToFormat(QtGui.QImage.Format_RGBA8888)
+    width, height = image.width(), image.height()
+    ptr = image.constBits()
+    ptr.setsize(image.bytesPerLine() * height)
+    rows = np.frombuffer(ptr, dtype=np.uint8).reshape(height, image.bytesPerLine())
+    # Первая строка снимка - северный край, а ось y карты направлена вверх
+    return rows[::-1, :width * 4].reshape(height, width, 4).copy()
+
+
+class TileLoader(QtCore.QThread):
+    """Фоновый поток чтения тайлов с диска.
+
+    Очередь заменяется целиком при каждом изменении области просмотра,
+    поэтому тайлы, ушедшие из кадра до загрузки, не читаются.
+    """
+
+    tile_loaded = QtCore.pyqtSignal(object, object)  # Ключ (уровень, x, y) и массив RGBA
+
+    def __init__(self, tiles_dir, parent=None):
+        super().__init__(parent)
+        self.tiles_dir = tiles_dir
+        self.requests = queue.Queue()
+
+    def request(self, keys):
+        """Заменяет очередь загрузки списком ключей тайлов."""
+        try:
+            while True:
+                self.requests.get_nowait()
+        except queue.Empty:
+            pass
+        for key in keys:
+            self.requests.put(key)
+
+    def stop(self):
+        self.request([None])
+        self.wait()
+
+    def run(self):
+        while True:
+            key = self.requests.get()
+            if key is None:
+                break
+            array = load_tile_array(tile_path(self.tiles_dir, *key))
+            if array is not None:
+                self.tile_loaded.emit(key, array)
+
+
+class TileLayer(QtCore.QObject):
+    """Фон карты из пирамиды тайлов: в памяти только тайлы области просмотра.
+
+    Уровень выбирается так, чтобы пиксель тайла был не крупнее пикселя
+    экрана. Недостающие тайлы читаются в фоновом потоке, прочитанные
+    хранятся в LRU-кэше на cache_size тайлов. Тайл нулевого уровня
+    загружается сразу и закрывает всю область, пока догружаются детальные.
+    """
+
+    def __init__(self, map_view, tiles_dir, meta, cache_size=TILE_CACHE_SIZE):
+        # QObject нужен, чтобы сигнал загрузчика доставлялся в поток интерфейса
+        super().__init__()
+        self.map_view = map_view
+        self.tiles_dir = tiles_dir
+        self.lon_min, self.lat_min, self.lon_max, self.lat_max = meta['bounds']
+        self.tile_size = meta['tile_size']
+        self.max_level = meta['max_level']
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # Ключ (уровень, x, y) -> массив RGBA
+        self.items = {}  # Тайлы на карте: ключ -> ImageItem
+        self.visible = set()
+
+        self.base_item = self.create_item((0, 0, 0), load_tile_array(tile_path(tiles_dir, 0, 0, 0)), BASE_TILE_Z)
+
+        self.loader = TileLoader(tiles_dir)
+        self.loader.tile_loaded.connect(self.on_tile_loaded)
+        self.loader.start()
+
+        # Подгружаем не на каждое событие прокрутки, а после паузы
+        self.refresh_timer = QtCore.QTimer()
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.map_view.getViewBox().sigRangeChanged.connect(self.schedule_refresh)
+        self.refresh()
+
+    def stop(self):
+        self.loader.stop()
+
+    def schedule_refresh(self, *args):
+        self.refresh_timer.start(REFRESH_DELAY_MS)
+
+    def tile_rect(self, level, tx, ty):
+        width = (self.lon_max - self.lon_min) / 2 ** level
+        height = (self.lat_max - self.lat_min) / 2 ** level
+        return self.lon_min + tx * width, self.lat_max - (ty + 1) * height, width, height
+
+    def create_item(self, key, array, z_value=TILE_Z):
+        if array is None:
+            return None
+        item = pg.ImageItem(array, axisOrder='row-major')
+        item.setRect(*self.tile_rect(*key))
+        item.setZValue(z_value)
+        self.map_view.addItem(item)
+        return item
+
+    def view_level(self):
+        """Уровень пирамиды, на котором пиксель тайла не крупнее пикселя экрана."""
+        view_box = self.map_view.getViewBox()
+        (lon_min, lon_max), (lat_min, lat_max) = view_box.viewRange()
+        levels = []
+        for span, bounds_span, pixels in ((lon_max - lon_min, self.lon_max - self.lon_min, view_box.width()),
+                                          (lat_max - lat_min, self.lat_max - self.lat_min, view_box.height())):
+            degrees_per_pixel = span / max(pixels, 1)
+            if degrees_per_pixel > 0:
+                levels.append(math.ceil(math.log2(bounds_span / (self.tile_size * degrees_per_pixel))))
+        return min(max(max(levels, default=0), 0), self.max_level)
+
+    def visible_tiles(self, level):
+        (lon_min, lon_max), (lat_min, lat_max) = self.map_view.getViewBox().viewRange()
+        count = 2 ** level
+        width = (self.lon_max - self.lon_min) / count
+        height = (self.lat_max - self.lat_min) / count
+        tx_min = max(0, math.floor((lon_min - self.lon_min) / width))
+        tx_max = min(count - 1, math.floor((lon_max - self.lon_min) / width))
+        ty_min = max(0, math.floor((self.lat_max - lat_max) / height))
+        ty_max = min(count - 1, math.floor((self.lat_max - lat_min) / height))
+        return {(level, tx, ty) for tx in range(tx_min, tx_max + 1) for ty in range(ty_min, ty_max + 1)}
+
+    def refresh(self):
+        """Показывает тайлы области просмотра и ставит в очередь недостающие."""
+        level = self.view_level()
+        self.visible = self.visible_tiles(level) if level > 0 else set()
+
+        for key in list(self.items):
+            if key not in self.visible:
+                self.map_view.removeItem(self.items.pop(key))
+
+        missing = []
+        for key in sorted(self.visible):
+            if key in self.items:
+                continue
+            array = self.cache.get(key)
+            if array is None:
+                missing.append(key)
+            else:
+                self.cache.move_to_end(key)
+                self.items[key] = self.create_item(key, array)
+        self.loader.request(missing)
+
+    def on_tile_loaded(self, key, array):
+        self.cache[key] = array
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        if key in self.visible and key not in self.items:
+            self.items[key] = self.create_item(key, array)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Нарезка снимка карты в пирамиду тайлов для эмулятора")
+    parser.add_argument("source", nargs="?", default=MAP_IMAGE_PATH, help="Исходный снимок карты")
+    parser.add_argument("--output", default=MAP_TILES_PATH, help="Каталог тайлов")
+    parser.add_argument("--bounds", type=float, nargs=4, metavar=("LON_MIN", "LAT_MIN", "LON_MAX", "LAT_MAX"),
+                        default=[MOSCOW_CENTER_LON - MAP_HALF_SIZE, MOSCOW_CENTER_LAT - MAP_HALF_SIZE,
+                                 MOSCOW_CENTER_LON + MAP_HALF_SIZE, MOSCOW_CENTER_LAT + MAP_HALF_SIZE],
+                        help="Область снимка в градусах")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help="Сторона тайла в пикселях")
+    parser.add_argument("--quality", type=int, default=TILE_QUALITY, help="Качество JPEG")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Модули форматов изображений Qt подключаются через экземпляр приложения
+    app = QtCore.QCoreApplication(sys.argv)
+    started = time.perf_counter()
+    meta = cut_tiles(args.source, args.output, args.bounds, args.tile_size, args.quality)
+    print(f"Тайлы уровней 0-{meta['max_level']} записаны в {args.output} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
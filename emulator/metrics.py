@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Верхние границы корзин гистограммы задержек в миллисекундах
+HISTOGRAM_BOUNDS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+DUMP_INTERVAL = 10.0  # Период записи JSON-файла метрик в секундах
+METRICS_HOST = "127.0.0.1"
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами, счетчиком, суммой и максимумом."""
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS_MS):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.counts = np.zeros(len(bounds) + 1, dtype=np.int64)  # Последняя корзина - выше всех границ
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms):
+        self.counts[np.searchsorted(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, q):
+        """Оценка перцентиля по верхней границе корзины."""
+        if not self.count:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return float(self.bounds[bucket]) if bucket < len(self.bounds) else self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max,
+            'buckets': {
+                **{f"le_{bound:g}": int(count) for bound, count in zip(self.bounds, self.counts)},
+                'inf': int(self.counts[-1]),
+            },
+        }
+
+
+class CommandMetrics:
+    """Счетчики и гистограммы задержек по командам и этапам обработки.
+
+    Сервер команд оборачивает обработку в command(name); этапы внутри нее
+    (stage) записываются под текущей командой потока. Вне команды stage
+    ничего не записывает, поэтому прямые вызовы симуляции из окна не
+    искажают метрики.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.current = threading.local()
+
+    @contextmanager
+    def command(self, name):
+        self.current.name = name
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            self.current.name = None
+
+    @contextmanager
+    def stage(self, stage):
+        name = getattr(self.current, 'name', None)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if name is not None:
+                self.observe(name, stage, (time.perf_counter() - started) * 1000)
+
+    def observe(self, command, stage, value_ms):
+        with self.lock:
+            histogram = self.histograms.get((command, stage))
+            if histogram is None:
+                histogram = self.histograms[(command, stage)] = LatencyHistogram()
+            histogram.observe(value_ms)
+
+    def snapshot(self):
+        with self.lock:
+            commands = {name: {'count': count, 'stages': {}} for name, count in self.counters.items()}
+            for (name, stage), histogram in self.histograms.items():
+                commands.setdefault(name, {'count': 0, 'stages': {}})['stages'][stage] = histogram.snapshot()
+        return {
+            'timestamp': time.time(),
+            'uptime_s': time.time() - self.started,
+            'commands': commands,
+        }
+
+
+# Общий реестр процесса: его используют сервер команд и симуляция
+METRICS = CommandMetrics()
+
+
+def write_metrics(path, metrics=METRICS):
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(metrics.snapshot(), f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def start_metrics_dump(path, interval=DUMP_INTERVAL, metrics=METRICS):
+    """Периодически записывает метрики в JSON-файл из фонового потока."""
+    def dump_loop():
+        while True:
+            time.sleep(interval)
+            write_metrics(path, metrics)
+
+    thread = threading.Thread(target=dump_loop, daemon=True)
+    thread.start()
+    return thread
+
+
+def start_metrics_server(port, host=METRICS_HOST, metrics=METRICS):
+    """Отдает метрики в JSON по адресу http://host:port/metrics."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Метрики доступны по адресу http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,166 @@
+import argparse
+import time
+
+import numpy as np
+
+from binlog import BINLOG_SUFFIX, read_binary_log
+from location_log import LOCATION_LOG_PATH, read_location_log
+from propagation import PATH_LOSS_EXPONENT, RSSI_AT_1M
+from spatial_index import EARTH_RADIUS, haversine_distances
+from tower_db import TowerDatabase
+
+MIN_TOWERS = 3  # Меньше вышек не дают решения методом наименьших квадратов
+DEGENERATE_RATIO = 1e-6  # Порог det/trace^2 матрицы системы, ниже которого геометрия вырождена
+
+METHOD_NONE = -1  # Нет вышек с ненулевым уровнем сигнала
+METHOD_LEAST_SQUARES = 0
+METHOD_CENTROID = 1  # Вырожденная геометрия: взвешенный центр вышек
+
+
+def estimate_distance(levels, a=RSSI_AT_1M, n=PATH_LOSS_EXPONENT):
+    """Расстояние в метрах по уровню сигнала, как estimateDistance в console_display.c."""
+    return np.power(10.0, (a + np.asarray(levels, dtype=np.float64)) / (10 * n))
+
+
+def multilaterate(tower_lats, tower_lons, levels):
+    """Определяет местоположение для пакета замеров сразу.
+
+    Аргументы - массивы (F, T) координат вышек и уровней сигнала для F
+    замеров по T вышек; пропуски задаются NaN или нулевым уровнем. Для
+    каждого замера вышки переводятся в метры в локальной проекции вокруг
+    их центра, и система уравнений дальностей решается взвешенным методом
+    наименьших квадратов (вес 1/r^2, ближние вышки точнее). Если вышек
+    меньше трех или они лежат на одной прямой, берется взвешенный центр.
+
+    Возвращает (lats, lons, methods) - массивы длины F.
+    """
+    tower_lats = np.atleast_2d(np.asarray(tower_lats, dtype=np.float64))
+    tower_lons = np.atleast_2d(np.asarray(tower_lons, dtype=np.float64))
+    levels = np.atleast_2d(np.asarray(levels, dtype=np.float64))
+
+    valid = np.isfinite(tower_lats) & np.isfinite(tower_lons) & np.isfinite(levels) & (levels != 0)
+    ranges = estimate_distance(np.where(valid, levels, 0))
+    weights = np.where(valid, 1 / ranges ** 2, 0)
+    weight_sums = weights.sum(axis=1)
+    has_towers = weight_sums > 0
+    weight_sums[~has_towers] = 1
+    norm_weights = weights / weight_sums[:, None]
+
+    # Локальная проекция вокруг взвешенного центра вышек каждого замера
+    lat0 = np.sum(norm_weights * np.where(valid, tower_lats, 0), axis=1)
+    lon0 = np.sum(norm_weights * np.where(valid, tower_lons, 0), axis=1)
+    cos_lat0 = np.cos(np.radians(lat0))[:, None]
+    x = np.where(valid, EARTH_RADIUS * np.radians(tower_lons - lon0[:, None]) * cos_lat0, 0)
+    y = np.where(valid, EARTH_RADIUS * np.radians(tower_lats - lat0[:, None]), 0)
+
+    # Вычитание взвешенного среднего уравнений (x - xi)^2 + (y - yi)^2 = ri^2
+    # убирает квадратичные члены и дает линейную систему A p = b
+    sq = x ** 2 + y ** 2 - ranges ** 2
+    a = np.stack([x, y], axis=2) * 2  # Центр вышек в нуле, поэтому среднее x, y равно нулю
+    b = sq - np.sum(norm_weights * sq, axis=1, keepdims=True)
+
+    aw = a * weights[:, :, None]
+    normal = np.einsum('fti,ftj->fij', aw, a)
+    rhs = np.einsum('fti,ft->fi', aw, b)
+
+    det = np.linalg.det(normal)
+    trace = np.trace(normal, axis1=1, axis2=2)
+    count = valid.sum(axis=1)
+    solvable = has_towers & (count >= MIN_TOWERS) & (det > DEGENERATE_RATIO * trace ** 2)
+
+    px = np.zeros(len(levels))
+    py = np.zeros(len(levels))
+    if solvable.any():
+        solution = np.linalg.solve(normal[solvable], rhs[solvable][:, :, None])[:, :, 0]
+        px[solvable], py[solvable] = solution[:, 0], solution[:, 1]
+
+    lats = lat0 + np.degrees(py / EARTH_RADIUS)
+    lons = lon0 + np.degrees(px / (EARTH_RADIUS * cos_lat0[:, 0]))
+    methods = np.where(solvable, METHOD_LEAST_SQUARES, METHOD_CENTROID)
+    methods[~has_towers] = METHOD_NONE
+    lats[~has_towers] = np.nan
+    lons[~has_towers] = np.nan
+    return lats, lons, methods
+
+
+def fixes_from_location_log(groups):
+    """Собирает замеры журнала console_display в массивы (F, T) для multilaterate."""
+    width = max((len(group['towers']) for group in groups), default=0)
+    tower_lats = np.full((len(groups), width), np.nan)
+    tower_lons = np.full((len(groups), width), np.nan)
+    levels = np.full((len(groups), width), np.nan)
+    for i, group in enumerate(groups):
+        for j, (mcc, mnc, cid, level, lat, lon) in enumerate(group['towers']):
+            tower_lats[i, j], tower_lons[i, j], levels[i, j] = lat, lon, level
+    # Вышки, не найденные в базе, приходят с координатами 0, 0
+    missing = (tower_lats == 0) & (tower_lons == 0)
+    tower_lats[missing] = np.nan
+    tower_lons[missing] = np.nan
+    return tower_lats, tower_lons, levels
+
+
+def fixes_from_records(records):
+    """Замеры бинарного журнала binlog в массивы (F, T) для multilaterate."""
+    towers = records['towers']
+    present = np.arange(towers.shape[1]) < records['tower_count'][:, None]
+    levels = np.where(present, towers['level'], np.nan)
+    return towers['lat'].astype(np.float64), towers['lon'].astype(np.float64), levels
+
+
+def fixes_from_track(tower_db, track):
+    """Замеры трека batch_simulation: координаты ближайших вышек и уровни сигнала."""
+    indices = track['tower_index']
+    return tower_db.lats[indices], tower_db.lons[indices], -np.asarray(track['rssi'], dtype=np.float64)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Пакетное определение местоположения по уровням сигнала вышек")
+    parser.add_argument("--log", default=LOCATION_LOG_PATH, help="Журнал location_log.txt или бинарный журнал .bin")
+    parser.add_argument("--track", default=None, help="Трек batch_simulation в .npz вместо журнала")
+    parser.add_argument("--towers", default="250.csv", help="CSV-файл базы вышек для --track")
+    parser.add_argument("--output", default=None, help="CSV-файл с рассчитанными координатами")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    truth = None
+    if args.track:
+        track = np.load(args.track)
+        tower_lats, tower_lons, levels = fixes_from_track(TowerDatabase.from_csv(args.towers), track)
+        truth = (track['lat'], track['lon'])
+    elif args.log.endswith(BINLOG_SUFFIX):
+        records = read_binary_log(args.log)
+        tower_lats, tower_lons, levels = fixes_from_records(records)
+        truth = (records['lat'], records['lon'])
+    else:
+        groups = read_location_log(args.log)
+        tower_lats, tower_lons, levels = fixes_from_location_log(groups)
+        fixes = np.array([group['fix'] if group['fix'] else (np.nan, np.nan) for group in groups])
+        if len(fixes):
+            truth = (fixes[:, 0], fixes[:, 1])
+
+    started = time.perf_counter()
+    lats, lons, methods = multilaterate(tower_lats, tower_lons, levels)
+    elapsed = time.perf_counter() - started
+    print(f"Замеров: {len(lats)}, время расчета: {elapsed * 1000:.1f} мс")
+    print(f"МНК: {np.sum(methods == METHOD_LEAST_SQUARES)}, центр вышек: {np.sum(methods == METHOD_CENTROID)}, "
+          f"без вышек: {np.sum(methods == METHOD_NONE)}")
+
+    if truth is not None:
+        # Для трека - ошибка относительно истинной позиции, для журнала - расхождение с console_display
+        errors = haversine_distances(lats, lons, truth[0], truth[1])
+        errors = errors[np.isfinite(errors)]
+        if len(errors):
+            p50, p95 = np.percentile(errors, [50, 95])
+            print(f"Отклонение от эталона: медиана {p50:.1f} м, 95% {p95:.1f} м")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write("lat,lon,method\n")
+            for lat, lon, method in zip(lats, lons, methods):
+                f.write(f"{lat:.6f},{lon:.6f},{method}\n")
+
+
+if __name__ == "__main__":
+    main()
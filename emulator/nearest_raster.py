@@ -0,0 +1,265 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from spatial_index import EARTH_RADIUS, haversine_distances
+from tower_db import TowerDatabase, cache_dir_for, replace_file
+
+RASTER_VERSION = 2
+RASTER_META_FILE = "meta.json"
+DEFAULT_RASTER_CELL_SIZE = 100.0  # Сторона ячейки растра в метрах
+DEFAULT_RASTER_K = 7
+RASTER_MARGIN = 2000.0  # Запас вокруг маршрута при построении растра по точкам пути, в метрах
+MAX_RASTER_CELLS = 4_000_000
+
+
+class NearestRaster:
+    """Растр кандидатов в k ближайших вышек по ячейкам метрической сетки.
+
+    Для центра c каждой ячейки хранится список вышек в радиусе
+    d_k(c) + 2h, где d_k(c) - расстояние до k-й ближайшей вышки, а h -
+    расстояние от центра до самого дальнего угла ячейки. Для любой точки
+    ячейки ее k ближайших вышек лежат в этом радиусе, поэтому запрос
+    сводится к выбору списка по номеру ячейки и точной пересортировке
+    нескольких кандидатов. Списки хранятся в формате CSR: offsets и
+    candidates. Точки вне растра и запросы с большим k уходят в
+    пространственный индекс.
+    """
+
+    def __init__(self, spatial_index, meta, offsets, candidates):
+        self.spatial_index = spatial_index
+        self.meta = meta
+        self.k = meta['k']
+        self.cell_size = meta['cell_size']
+        self.x0 = meta['x0']
+        self.y0 = meta['y0']
+        self.nx = meta['nx']
+        self.ny = meta['ny']
+        self.offsets = offsets
+        self.candidates = candidates
+        self.lons = spatial_index.lons
+        self.lats = spatial_index.lats
+
+    def __len__(self):
+        return self.nx * self.ny
+
+    def cell_of(self, lons, lats):
+        """Номер ячейки растра для точек; -1 для точек вне растра."""
+        x, y = self.spatial_index.project(lons, lats)
+        ix = np.floor((np.asarray(x) - self.x0) / self.cell_size).astype(np.int64)
+        iy = np.floor((np.asarray(y) - self.y0) / self.cell_size).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        return np.where(inside, ix * self.ny + iy, -1)
+
+    def query_nearest(self, lon, lat, k=DEFAULT_RASTER_K):
+        """Индексы k ближайших вышек и расстояния до них, как TowerSpatialIndex.query_nearest."""
+        cell = int(self.cell_of(lon, lat))
+        if cell < 0 or k > self.k:
+            return self.spatial_index.query_nearest(lon, lat, k=k)
+        candidates = self.candidates[self.offsets[cell]:self.offsets[cell + 1]]
+        distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        k = min(k, len(candidates))
+        nearest = np.argpartition(distances, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        nearest = nearest[np.argsort(distances[nearest])]
+        return candidates[nearest].astype(np.int64), distances[nearest]
+
+    def query_nearest_batch(self, lons, lats, k=DEFAULT_RASTER_K):
+        """Пакетный запрос: кандидаты всех точек дополняются до общей длины и сортируются матрицей."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        if k > self.k:
+            return self.spatial_index.query_nearest_batch(lons, lats, k=k)
+        k = min(k, len(self.spatial_index))
+        indices = np.empty((len(lons), k), dtype=np.int64)
+        distances = np.empty((len(lons), k))
+
+        cells = self.cell_of(lons, lats)
+        outside = cells < 0
+        if outside.any():
+            indices[outside], distances[outside] = self.spatial_index.query_nearest_batch(
+                lons[outside], lats[outside], k=k)
+        inside = np.flatnonzero(~outside)
+        if len(inside) == 0:
+            return indices, distances
+
+        starts = self.offsets[cells[inside]]
+        counts = self.offsets[cells[inside] + 1] - starts
+        width = int(counts.max())
+        slots = np.arange(width)
+        present = slots < counts[:, None]
+        candidates = np.where(present, self.candidates[np.minimum(starts[:, None] + slots, len(self.candidates) - 1)], 0)
+        matrix = haversine_distances(lats[inside, None], lons[inside, None],
+                                     self.lats[candidates], self.lons[candidates])
+        matrix[~present] = np.inf
+        nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k] if k < width else np.argsort(matrix, axis=1)
+        nearest_distances = np.take_along_axis(matrix, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        indices[inside] = np.take_along_axis(candidates, nearest, axis=1)
+        distances[inside] = np.take_along_axis(nearest_distances, order, axis=1)
+        return indices, distances
+
+
+def raster_signature(spatial_index):
+    """Число вышек и хэш их координат, по которым проверяется, что растр построен для этой базы.
+
+    Кандидаты растра - номера строк базы, поэтому растр устаревает при
+    любом изменении координат или порядка вышек, а не только их числа.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for values in (spatial_index.lons, spatial_index.lats):
+        digest.update(np.ascontiguousarray(values, dtype=np.float64))
+    return {'towers': len(spatial_index), 'coords': digest.hexdigest()}
+
+
+def build_nearest_raster(spatial_index, bbox, cell_size=DEFAULT_RASTER_CELL_SIZE, k=DEFAULT_RASTER_K):
+    """Строит растр кандидатов для прямоугольника bbox = (lon_min, lat_min, lon_max, lat_max)."""
+    k = min(k, len(spatial_index))
+    if k <= 0:
+        raise ValueError("Растр нельзя построить по пустой базе вышек")
+    lon_min, lat_min, lon_max, lat_max = bbox
+    x_min, y_min = spatial_index.project(lon_min, lat_min)
+    x_max, y_max = spatial_index.project(lon_max, lat_max)
+    nx = max(1, int(np.ceil((x_max - x_min) / cell_size)))
+    ny = max(1, int(np.ceil((y_max - y_min) / cell_size)))
+    if nx * ny > MAX_RASTER_CELLS:
+        raise ValueError(f"Растр {nx}x{ny} больше {MAX_RASTER_CELLS} ячеек: уменьшите область или увеличьте ячейку")
+
+    # Центры и углы ячеек в порядке номера ячейки ix * ny + iy
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny), indexing='ij')
+    center_x = float(x_min) + (ix.ravel() + 0.5) * cell_size
+    center_y = float(y_min) + (iy.ravel() + 0.5) * cell_size
+    center_lons, center_lats = spatial_index.unproject(center_x, center_y)
+    half_diagonal = np.zeros(len(center_x))
+    for dx in (-0.5, 0.5):
+        for dy in (-0.5, 0.5):
+            corner_lons, corner_lats = spatial_index.unproject(center_x + dx * cell_size, center_y + dy * cell_size)
+            half_diagonal = np.maximum(half_diagonal, haversine_distances(center_lats, center_lons,
+                                                                          corner_lats, corner_lons))
+
+    _, nearest_distances = spatial_index.query_nearest_batch(center_lons, center_lats, k=k)
+    # Небольшой запас на погрешность округления расстояний
+    radii = nearest_distances[:, -1] + 2 * half_diagonal + 1e-6 * cell_size
+
+    lists = []
+    counts = np.empty(len(radii), dtype=np.int64)
+    for cell, (lon, lat, radius) in enumerate(zip(center_lons, center_lats, radii)):
+        members, _ = spatial_index.query_radius(lon, lat, radius)
+        lists.append(members)
+        counts[cell] = len(members)
+
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    candidates = np.concatenate(lists).astype(np.int32)
+    meta = {
+        'version': RASTER_VERSION,
+        'signature': raster_signature(spatial_index),
+        'bbox': [float(value) for value in bbox],
+        'k': k,
+        'cell_size': float(cell_size),
+        'x0': float(x_min),
+        'y0': float(y_min),
+        'nx': nx,
+        'ny': ny,
+    }
+    return NearestRaster(spatial_index, meta, offsets, candidates)
+
+
+def save_nearest_raster(raster, path):
+    """Сохраняет растр в каталог: offsets.npy, candidates.npy и meta.json."""
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, RASTER_META_FILE)
+    # Метаданные удаляются первыми: недописанный растр считается недействительным
+    try:
+        os.remove(meta_path)
+    except FileNotFoundError:
+        pass
+    for name in ("offsets", "candidates"):
+        array = getattr(raster, name)
+        replace_file(os.path.join(path, f"{name}.npy"), lambda f: np.save(f, array))
+    replace_file(meta_path, lambda f: json.dump(raster.meta, f), 'w', encoding='utf-8')
+
+
+def read_nearest_raster(spatial_index, path):
+    """Открывает сохраненный растр с отображением в память; None, если его нет или он от другой базы."""
+    try:
+        with open(os.path.join(path, RASTER_META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != RASTER_VERSION or meta.get('signature') != raster_signature(spatial_index):
+        return None
+    try:
+        offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode='r')
+        candidates = np.load(os.path.join(path, "candidates.npy"), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    return NearestRaster(spatial_index, meta, offsets, candidates)
+
+
+def load_nearest_raster(spatial_index, path, bbox, cell_size=DEFAULT_RASTER_CELL_SIZE, k=DEFAULT_RASTER_K):
+    """Открывает растр из path или строит и сохраняет его, если растр устарел или покрывает другую область."""
+    raster = read_nearest_raster(spatial_index, path)
+    if (raster is not None and raster.k >= k and raster.cell_size == cell_size and
+            raster.meta['bbox'] == [float(value) for value in bbox]):
+        return raster
+    print(f"Построение растра ближайших вышек {path}...")
+    started = time.perf_counter()
+    raster = build_nearest_raster(spatial_index, bbox, cell_size, k)
+    save_nearest_raster(raster, path)
+    print(f"Растр {raster.nx}x{raster.ny} ячеек, {len(raster.candidates)} кандидатов "
+          f"за {time.perf_counter() - started:.1f} с")
+    return raster
+
+
+def route_bbox(points, margin=RASTER_MARGIN):
+    """Прямоугольник вокруг точек (lon, lat) с запасом margin метров."""
+    points = np.asarray(points, dtype=np.float64)
+    lat_margin = np.degrees(margin / EARTH_RADIUS)
+    lon_margin = lat_margin / np.cos(np.radians(np.abs(points[:, 1]).max()))
+    return (float(points[:, 0].min() - lon_margin), float(points[:, 1].min() - lat_margin),
+            float(points[:, 0].max() + lon_margin), float(points[:, 1].max() + lat_margin))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Построение растра ближайших вышек для быстрых ответов AT+CENG?")
+    parser.add_argument("--towers", default="250.csv", help="CSV-файл базы вышек")
+    parser.add_argument("--bbox", type=float, nargs=4, required=True,
+                        metavar=("LON_MIN", "LAT_MIN", "LON_MAX", "LAT_MAX"), help="Область работы в градусах")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_RASTER_CELL_SIZE, help="Сторона ячейки в метрах")
+    parser.add_argument("--k", type=int, default=DEFAULT_RASTER_K, help="Число ближайших вышек")
+    parser.add_argument("--output", default=None, help="Каталог растра (по умолчанию рядом с кэшем базы)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tower_db = TowerDatabase.from_csv(args.towers)
+    output = args.output or os.path.join(cache_dir_for(args.towers), "nearest_raster")
+    raster = load_nearest_raster(tower_db.spatial_index, output, args.bbox, args.cell_size, args.k)
+
+    # Проверка на случайных точках области: растр должен совпадать с пространственным индексом
+    rng = np.random.default_rng(0)
+    lon_min, lat_min, lon_max, lat_max = args.bbox
+    lons = rng.uniform(lon_min, lon_max, 1000)
+    lats = rng.uniform(lat_min, lat_max, 1000)
+    started = time.perf_counter()
+    for lon, lat in zip(lons, lats):
+        raster.query_nearest(lon, lat, raster.k)
+    raster_time = (time.perf_counter() - started) / len(lons)
+    started = time.perf_counter()
+    for lon, lat in zip(lons, lats):
+        tower_db.spatial_index.query_nearest(lon, lat, raster.k)
+    index_time = (time.perf_counter() - started) / len(lons)
+    expected, _ = tower_db.spatial_index.query_nearest_batch(lons, lats, raster.k)
+    actual, _ = raster.query_nearest_batch(lons, lats, raster.k)
+    mismatches = int(np.sum(np.any(np.sort(expected, axis=1) != np.sort(actual, axis=1), axis=1)))
+    print(f"Запрос: растр {raster_time * 1e6:.1f} мкс, индекс {index_time * 1e6:.1f} мкс; "
+          f"расхождений на 1000 точках: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import collections
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from location_log import read_location_log
+from tower_db import TowerDatabase
+
+GSM_SOCKET_PATH = "/tmp/gsm_socket"
+DISPLAY_SOCKET_PATH = "/tmp/display_socket"
+MAX_TOWERS = 7
+CONNECT_ATTEMPTS = 50
+CONNECT_DELAY = 0.1  # Пауза между попытками подключения в секундах
+RECV_CHUNK = 65536
+RECEIVE_TIMEOUT = 5.0  # Сколько ждать ответа main_process, прежде чем считать пакеты потерянными
+
+MSG_TOWER = 1  # Данные о вышке
+MSG_END = 2  # Конец пакета
+
+# Раскладки структур exe/main_process.c с выравниванием компилятора C
+TOWER_DATA_DTYPE = np.dtype([
+    ('mcc', np.uint16),
+    ('mnc', np.uint16),
+    ('cid', np.uint32),
+    ('receive_level', np.int32),
+], align=True)
+LEVEL_DATA_PACKET_DTYPE = np.dtype([
+    ('tower_count', np.uint8),
+    ('tower_data', TOWER_DATA_DTYPE, (MAX_TOWERS,)),
+], align=True)
+DISPLAY_MESSAGE_DTYPE = np.dtype([
+    ('msg_type', np.int64),  # long на 64-битном Linux
+    ('mcc', np.uint16),
+    ('mnc', np.uint16),
+    ('cid', np.uint32),
+    ('receive_level', np.int32),
+    ('lat', np.float32),
+    ('lon', np.float32),
+], align=True)
+
+assert LEVEL_DATA_PACKET_DTYPE.itemsize == 88
+assert DISPLAY_MESSAGE_DTYPE.itemsize == 32
+
+
+def pack_packets(tower_sets):
+    """Упаковывает наборы вышек (mcc, mnc, cid, level) в массив level_data_packet."""
+    packets = np.zeros(len(tower_sets), dtype=LEVEL_DATA_PACKET_DTYPE)
+    for packet, towers in zip(packets, tower_sets):
+        towers = towers[:MAX_TOWERS]
+        packet['tower_count'] = len(towers)
+        for slot, (mcc, mnc, cid, level) in zip(packet['tower_data'], towers):
+            slot['mcc'], slot['mnc'], slot['cid'], slot['receive_level'] = mcc, mnc, cid, level
+    return packets
+
+
+def replay_tower_sets(path):
+    """Наборы вышек из журнала location_log.txt."""
+    return [
+        [(mcc, mnc, cid, level) for mcc, mnc, cid, level, lat, lon in group['towers']]
+        for group in read_location_log(path) if group['towers']
+    ]
+
+
+def synthetic_tower_sets(count, rng, towers_path=None):
+    """Случайные наборы из 7 вышек: из базы (попадания в хеш-таблицу) или со случайными CID."""
+    if towers_path:
+        tower_db = TowerDatabase.from_csv(towers_path)
+        indices = rng.integers(0, len(tower_db), size=(count, MAX_TOWERS))
+        mccs, mncs, cids = tower_db.mccs[indices], tower_db.mncs[indices], tower_db.cells[indices]
+    else:
+        mccs = np.full((count, MAX_TOWERS), 250)
+        mncs = rng.integers(1, 100, size=(count, MAX_TOWERS))
+        cids = rng.integers(1, 2 ** 28, size=(count, MAX_TOWERS))
+    levels = rng.integers(20, 140, size=(count, MAX_TOWERS))
+    return [list(zip(*columns)) for columns in zip(mccs, mncs, cids, levels)]
+
+
+class DisplaySink:
+    """Приемник display_message вместо console_display.
+
+    main_process подключается к нему при запуске; каждое сообщение
+    msg_type=2 завершает очередной пакет, и его задержка считается от
+    момента отправки соответствующего level_data_packet.
+    """
+
+    def __init__(self, path=DISPLAY_SOCKET_PATH):
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+        self.connection = None
+        self.sent_times = collections.deque()
+        self.latencies = []
+        self.tower_messages = 0
+        self.not_found = 0
+        self.last_received = None
+
+    def accept(self):
+        print(f"Ожидание подключения main_process к {self.path}...")
+        self.connection, _ = self.server.accept()
+        print("main_process подключен к приемнику.")
+
+    def packet_sent(self, timestamp):
+        self.sent_times.append(timestamp)
+
+    def receive(self, expected_packets):
+        """Принимает сообщения, пока не придут концы всех expected_packets пакетов."""
+        buffer = bytearray()
+        while len(self.latencies) < expected_packets:
+            try:
+                data = self.connection.recv(RECV_CHUNK)
+            except socket.timeout:
+                print("Таймаут ожидания сообщений от main_process.")
+                break
+            if not data:
+                print("main_process закрыл соединение с приемником.")
+                break
+            now = time.perf_counter()
+            buffer += data
+            whole = len(buffer) - len(buffer) % DISPLAY_MESSAGE_DTYPE.itemsize
+            messages = np.frombuffer(bytes(buffer[:whole]), dtype=DISPLAY_MESSAGE_DTYPE)
+            del buffer[:whole]
+
+            towers = messages[messages['msg_type'] == MSG_TOWER]
+            self.tower_messages += len(towers)
+            self.not_found += int(np.count_nonzero((towers['lat'] == 0) & (towers['lon'] == 0)))
+            for _ in range(int(np.count_nonzero(messages['msg_type'] == MSG_END))):
+                self.latencies.append(now - self.sent_times.popleft())
+            self.last_received = now
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+        self.server.close()
+        os.unlink(self.path)
+
+
+def connect_gsm_socket(path=GSM_SOCKET_PATH):
+    for _ in range(CONNECT_ATTEMPTS):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(path)
+            return client
+        except OSError:
+            client.close()
+            time.sleep(CONNECT_DELAY)
+    raise ConnectionError(f"Не удалось подключиться к {path}")
+
+
+def send_packets(client, packets, rate, sink):
+    """Отправляет пакеты с частотой rate в секунду (0 - без пауз)."""
+    started = time.perf_counter()
+    for i, packet in enumerate(packets):
+        if rate > 0:
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sink.packet_sent(time.perf_counter())
+        client.sendall(packet.tobytes())
+    return started
+
+
+def report(sink, packets, started):
+    latencies = np.array(sink.latencies) * 1000
+    elapsed = (sink.last_received or time.perf_counter()) - started
+    towers = int(packets['tower_count'].sum())
+    result = {
+        'packets_sent': len(packets),
+        'packets_received': len(latencies),
+        'towers_sent': towers,
+        'towers_received': sink.tower_messages,
+        'towers_not_found': sink.not_found,
+        'elapsed_s': elapsed,
+        'packets_per_s': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'towers_per_s': sink.tower_messages / elapsed if elapsed > 0 else 0.0,
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result.update(latency_p50_ms=p50, latency_p95_ms=p95, latency_p99_ms=p99,
+                      latency_max_ms=float(latencies.max()))
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный генератор для main_process: пакеты в /tmp/gsm_socket, прием из /tmp/display_socket"
+    )
+    parser.add_argument("--replay", default=None, help="Журнал location_log.txt для воспроизведения наборов вышек")
+    parser.add_argument("--towers", default=None, help="CSV-файл базы вышек для синтетических наборов")
+    parser.add_argument("--count", type=int, default=10000, help="Число пакетов")
+    parser.add_argument("--rate", type=float, default=0, help="Пакетов в секунду; 0 - без пауз")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора синтетических наборов")
+    parser.add_argument("--gsm-socket", default=GSM_SOCKET_PATH)
+    parser.add_argument("--display-socket", default=DISPLAY_SOCKET_PATH)
+    parser.add_argument("--json", default=None, help="Файл для сохранения результатов в JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.replay:
+        tower_sets = replay_tower_sets(args.replay)
+        # Журнал воспроизводится по кругу до нужного числа пакетов
+        tower_sets = [tower_sets[i % len(tower_sets)] for i in range(args.count)]
+    else:
+        tower_sets = synthetic_tower_sets(args.count, np.random.default_rng(args.seed), args.towers)
+    packets = pack_packets(tower_sets)
+    print(f"Подготовлено пакетов: {len(packets)}")
+
+    # main_process подключается к дисплею при запуске, поэтому его нужно запускать после приемника
+    sink = DisplaySink(args.display_socket)
+    try:
+        sink.accept()
+        sink.connection.settimeout(RECEIVE_TIMEOUT + (1 / args.rate if args.rate > 0 else 0))
+        client = connect_gsm_socket(args.gsm_socket)
+        receiver = threading.Thread(target=sink.receive, args=(len(packets),), daemon=True)
+        receiver.start()
+        with client:
+            started = send_packets(client, packets, args.rate, sink)
+            receiver.join()
+    except KeyboardInterrupt:
+        print("Прервано.")
+        return
+    finally:
+        sink.close()
+
+    result = report(sink, packets, started)
+    for key, value in result.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
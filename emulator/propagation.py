@@ -0,0 +1,179 @@
+import numpy as np
+
+RSSI_AT_1M = -40  # RSSI на расстоянии 1 метр
+PATH_LOSS_EXPONENT = 3  # Коэффициент потерь
+RSSI_NOISE = 2  # СКО шума уровня сигнала на каждый замер, дБ
+MIN_DISTANCE = 1.0  # Меньшие расстояния в метрах приравниваются к нему, чтобы избежать log(0)
+
+# Параметры модели Окумуры-Хаты для GSM 900
+HATA_FREQUENCY = 900.0  # МГц
+HATA_BASE_HEIGHT = 30.0  # Высота антенны вышки в метрах
+HATA_MOBILE_HEIGHT = 1.5  # Высота приемника в метрах
+HATA_TX_POWER = 43.0  # Мощность передатчика вышки в дБм
+HATA_ENVIRONMENTS = ("urban", "suburban", "open")
+
+# Затенение: гауссово поле с пространственной корреляцией на периодической сетке
+SHADOWING_SIGMA = 4.0  # СКО затенения в дБ
+SHADOWING_CORRELATION = 50.0  # Расстояние, на котором корреляция падает до 1/e, в метрах
+SHADOWING_CELL_SIZE = 10.0  # Шаг сетки поля в метрах
+SHADOWING_GRID_SIZE = 256  # Сторона сетки в ячейках; поле повторяется с этим периодом
+# Сдвиги поля для вышек по последовательности R2: у каждой вышки свой участок поля
+R2_ALPHA = (0.7548776662466927, 0.5698402909980532)
+
+MODELS = ("log-distance", "hata")
+
+
+def calculate_rssi(distances):
+    """Вычисляет приблизительное значение RSSI по расстоянию до вышек (в метрах)."""
+    distances = np.maximum(np.asarray(distances, dtype=np.float64), MIN_DISTANCE)
+    return np.round(RSSI_AT_1M - 10 * PATH_LOSS_EXPONENT * np.log10(distances)).astype(int)
+
+
+def per_tower(value, indices):
+    """Скалярный параметр как есть, массив параметров по вышкам - для заданных индексов."""
+    return value if np.ndim(value) == 0 else value[indices]
+
+
+class LogDistanceModel:
+    """Логарифмическая модель потерь RSSI = A - 10 n lg(d).
+
+    a и n - скаляры или массивы длины базы вышек с параметрами каждой вышки.
+    """
+
+    def __init__(self, a=RSSI_AT_1M, n=PATH_LOSS_EXPONENT):
+        self.a = a if np.ndim(a) == 0 else np.asarray(a, dtype=np.float64)
+        self.n = n if np.ndim(n) == 0 else np.asarray(n, dtype=np.float64)
+
+    def rssi(self, indices, distances):
+        distances = np.maximum(np.asarray(distances, dtype=np.float64), MIN_DISTANCE)
+        return per_tower(self.a, indices) - 10 * per_tower(self.n, indices) * np.log10(distances)
+
+
+class OkumuraHataModel:
+    """Модель Окумуры-Хаты: RSSI = мощность передатчика - потери на трассе.
+
+    Формула рассчитана на расстояния от 1 км; ближе она продолжается той же
+    логарифмической зависимостью. Высота антенны вышки может задаваться
+    массивом по вышкам.
+    """
+
+    def __init__(self, frequency=HATA_FREQUENCY, base_height=HATA_BASE_HEIGHT, mobile_height=HATA_MOBILE_HEIGHT,
+                 tx_power=HATA_TX_POWER, environment="urban"):
+        if environment not in HATA_ENVIRONMENTS:
+            raise ValueError(f"Неизвестный тип местности: {environment}")
+        self.frequency = frequency
+        self.base_height = base_height if np.ndim(base_height) == 0 else np.asarray(base_height, dtype=np.float64)
+        self.mobile_height = mobile_height
+        self.tx_power = tx_power
+        self.environment = environment
+
+    def rssi(self, indices, distances):
+        distances_km = np.maximum(np.asarray(distances, dtype=np.float64), MIN_DISTANCE) / 1000
+        log_f = np.log10(self.frequency)
+        log_hb = np.log10(per_tower(self.base_height, indices))
+        # Поправка на высоту приемника для малого и среднего города
+        mobile_correction = (1.1 * log_f - 0.7) * self.mobile_height - (1.56 * log_f - 0.8)
+        loss = (69.55 + 26.16 * log_f - 13.82 * log_hb - mobile_correction
+                + (44.9 - 6.55 * log_hb) * np.log10(distances_km))
+        if self.environment == "suburban":
+            loss -= 2 * np.log10(self.frequency / 28) ** 2 + 5.4
+        elif self.environment == "open":
+            loss -= 4.78 * log_f ** 2 - 18.33 * log_f + 40.94
+        return self.tx_power - loss
+
+
+class ShadowingField:
+    """Заранее рассчитанное поле затенения в дБ с пространственной корреляцией.
+
+    Белый шум на сетке grid_size x grid_size сглаживается гауссовым ядром
+    через БПФ и нормируется к СКО sigma. Поле периодично, поэтому покрывает
+    любую область без краев, а запрос сводится к билинейной интерполяции.
+    Каждая вышка читает поле со своим сдвигом, так что затенение на разные
+    вышки в одной точке почти независимо.
+    """
+
+    def __init__(self, sigma=SHADOWING_SIGMA, correlation_distance=SHADOWING_CORRELATION,
+                 cell_size=SHADOWING_CELL_SIZE, grid_size=SHADOWING_GRID_SIZE, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        self.sigma = sigma
+        self.cell_size = cell_size
+        self.grid_size = grid_size
+        self.period = cell_size * grid_size
+
+        # Гауссово ядро со СКО s дает корреляцию exp(-r^2 / 4s^2), равную 1/e при r = 2s
+        kernel_sigma = correlation_distance / 2
+        freq = np.fft.fftfreq(grid_size, d=cell_size)
+        response = np.exp(-2 * (np.pi * kernel_sigma) ** 2 * (freq[:, None] ** 2 + freq[None, :] ** 2))
+        field = np.fft.ifft2(np.fft.fft2(rng.standard_normal((grid_size, grid_size))) * response).real
+        field -= field.mean()
+        std = field.std()
+        self.grid = field * (sigma / std) if std > 0 else field
+
+    def tower_offsets(self, indices):
+        indices = np.asarray(indices, dtype=np.float64)
+        return (np.modf(indices * R2_ALPHA[0])[0] * self.period,
+                np.modf(indices * R2_ALPHA[1])[0] * self.period)
+
+    def sample(self, x, y, indices):
+        """Затенение в дБ в точках (x, y) проекции для вышек indices (с трансляцией форм)."""
+        offset_x, offset_y = self.tower_offsets(indices)
+        gx = (np.asarray(x) + offset_x) / self.cell_size
+        gy = (np.asarray(y) + offset_y) / self.cell_size
+        ix = np.floor(gx)
+        iy = np.floor(gy)
+        fx = gx - ix
+        fy = gy - iy
+        ix = ix.astype(np.int64) % self.grid_size
+        iy = iy.astype(np.int64) % self.grid_size
+        ix1 = (ix + 1) % self.grid_size
+        iy1 = (iy + 1) % self.grid_size
+        grid = self.grid
+        return ((grid[ix, iy] * (1 - fx) + grid[ix1, iy] * fx) * (1 - fy)
+                + (grid[ix, iy1] * (1 - fx) + grid[ix1, iy1] * fx) * fy)
+
+
+class PropagationEngine:
+    """Расчет уровней сигнала для всех вышек-кандидатов одним вызовом.
+
+    Средний уровень складывается из модели потерь и поля затенения и не
+    зависит от вызова, поэтому его можно кэшировать; шум замера добавляется
+    отдельно из собственного генератора rng с заданным зерном.
+    """
+
+    def __init__(self, tower_db, model=None, shadowing=None, noise=RSSI_NOISE, seed=None):
+        self.tower_db = tower_db
+        self.model = model or LogDistanceModel()
+        self.shadowing = shadowing  # None - без затенения
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def mean_rssi(self, lons, lats, indices, distances):
+        """RSSI без шума для вышек indices в точках (lons, lats).
+
+        indices и distances - массивы (k,) для одной точки или (N, k) для N точек.
+        """
+        rssi = self.model.rssi(indices, distances)
+        if self.shadowing is not None:
+            x, y = self.tower_db.spatial_index.project(lons, lats)
+            rssi = rssi + self.shadowing.sample(np.asarray(x)[..., None], np.asarray(y)[..., None], indices)
+        return rssi
+
+    def noisy_levels(self, base_levels):
+        """Уровни сигнала CENG (положительные) с шумом замера."""
+        base_levels = np.asarray(base_levels, dtype=np.float64)
+        noisy = base_levels + self.rng.normal(0, self.noise, base_levels.shape)
+        return np.maximum(0, np.round(noisy)).astype(int)
+
+
+def make_propagation(tower_db, model="log-distance", shadowing_sigma=SHADOWING_SIGMA, seed=None):
+    """Собирает движок по имени модели; затенение отключается при shadowing_sigma = 0."""
+    rng = np.random.default_rng(seed)
+    if model == "hata":
+        path_loss = OkumuraHataModel()
+    elif model == "log-distance":
+        path_loss = LogDistanceModel()
+    else:
+        raise ValueError(f"Неизвестная модель распространения: {model}")
+    shadowing = ShadowingField(shadowing_sigma, rng=rng) if shadowing_sigma > 0 else None
+    # Шум замеров берет свое зерно из того же генератора, чтобы прогон повторялся целиком
+    return PropagationEngine(tower_db, path_loss, shadowing, seed=rng.integers(2 ** 63))
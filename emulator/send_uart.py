@@ -1,3 +1,5 @@
+import argparse
+import re
 import serial
 import time
 
@@ -5,31 +7,88 @@ import time
 UART_PORT = "/dev/pts/7"  # Укажите правильный порт, например, /dev/pts/3, если используете виртуальный порт с socat
 BAUD_RATE = 9600
 COMMAND_INTERVAL = 5  # Интервал между командами AT+CENG? в секундах
+RESPONSE_TIMEOUT = 2.0  # Максимальное время ожидания ответа в секундах
 
-def send_command(ser, command):
+# Финальные строки результата, после которых модем больше ничего не пришлет
+FINAL_RESULT_PATTERN = re.compile(r"^(OK|ERROR|\+CME ERROR:.*|\+CMS ERROR:.*)$")
+
+
+def last_line(data):
+    """Последняя непустая строка фрагмента ответа без пробельных символов или None."""
+    lines = [line.strip() for line in data.decode('utf-8', errors='replace').splitlines() if line.strip()]
+    return lines[-1] if lines else None
+
+
+def read_response(ser, timeout=RESPONSE_TIMEOUT):
+    """Читает ответ до финальной строки OK/ERROR или до истечения таймаута.
+
+    Таймаут порта задается один раз на весь ответ. Финальная строка ищется
+    только среди строк, завершенных последним прочитанным фрагментом, поэтому
+    проверка не зависит от длины уже полученного ответа.
+    """
+    deadline = time.monotonic() + timeout
+    ser.timeout = timeout
+    buffer = bytearray()
+    scanned = 0  # Конец последней проверенной полной строки
+    final = None  # Последняя непустая полная строка
+    while True:
+        if time.monotonic() >= deadline:
+            print(f"Таймаут ожидания ответа ({timeout} с)")
+            break
+        chunk = ser.read(ser.in_waiting or 1)
+        if not chunk:
+            continue
+        buffer += chunk
+        newline = chunk.rfind(b"\n")
+        if newline < 0:
+            continue
+        end = len(buffer) - len(chunk) + newline + 1
+        final = last_line(buffer[scanned:end]) or final
+        scanned = end
+        # Ответ закончен, если буфер завершается полной финальной строкой
+        if end == len(buffer) and final is not None and FINAL_RESULT_PATTERN.match(final):
+            break
+    return buffer.decode('utf-8', errors='replace')
+
+
+def send_command(ser, command, timeout=RESPONSE_TIMEOUT):
     """Отправка команды на UART и получение ответа."""
+    started = time.perf_counter()
     ser.write((command + "\r\n").encode('utf-8'))
     print(f"Отправлена команда: {command}")
 
-    # Чтение ответа
-    time.sleep(1)  # Небольшая задержка для получения ответа
-    response = ser.read_all().decode('utf-8')
-    print(f"Ответ: {response}")
+    # Чтение ответа до финальной строки, а не по фиксированной задержке
+    response = read_response(ser, timeout)
+    latency = (time.perf_counter() - started) * 1000
+    print(f"Ответ ({latency:.1f} мс): {response}")
     return response
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Циклический опрос модема командой AT+CENG?")
+    parser.add_argument("--port", default=UART_PORT)
+    parser.add_argument("--baud", type=int, default=BAUD_RATE)
+    parser.add_argument("--interval", type=float, default=COMMAND_INTERVAL,
+                        help="Интервал между командами AT+CENG? в секундах")
+    parser.add_argument("--timeout", type=float, default=RESPONSE_TIMEOUT,
+                        help="Максимальное время ожидания ответа в секундах")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     # Открываем UART порт
     try:
-        with serial.Serial(UART_PORT, BAUD_RATE, timeout=1) as ser:
-            print(f"Подключение к порту {UART_PORT}")
+        with serial.Serial(args.port, args.baud, timeout=1) as ser:
+            print(f"Подключение к порту {args.port}")
 
             # Отправляем команду для настройки
-            send_command(ser, "AT+CENG=1,1")
+            send_command(ser, "AT+CENG=1,1", args.timeout)
 
             # Циклическая отправка команды AT+CENG?
             while True:
-                send_command(ser, "AT+CENG?")
-                time.sleep(COMMAND_INTERVAL)
+                send_command(ser, "AT+CENG?", args.timeout)
+                time.sleep(args.interval)
     except serial.SerialException as e:
         print(f"Ошибка при подключении к UART: {e}")
 
@@ -0,0 +1,178 @@
+import threading
+import time
+
+import numpy as np
+
+from ceng import format_ceng_lines
+from ceng_cache import CengResponseCache
+from metrics import METRICS
+from propagation import make_propagation
+
+NEAREST_TOWERS_COUNT = 7
+DEFAULT_SPEED = 10.0  # Скорость дрона в м/с
+PHYSICS_STEP = 0.1  # Шаг физики в секундах времени симуляции
+MAX_STEPS_PER_ADVANCE = 10000  # Предел шагов за один вызов часов, чтобы не копить отставание
+
+
+class SimulationClock:
+    """Часы симуляции: переводят реальное время в фиксированные шаги физики.
+
+    Прошедшее реальное время умножается на time_warp и накапливается, а
+    физика всегда шагает с постоянным dt, поэтому траектория не зависит
+    ни от частоты вызовов advance, ни от коэффициента ускорения.
+    """
+
+    def __init__(self, time_warp=1.0, dt=PHYSICS_STEP, max_steps=MAX_STEPS_PER_ADVANCE):
+        self.time_warp = time_warp
+        self.dt = dt
+        self.max_steps = max_steps
+        self.sim_time = 0.0
+        self.accumulator = 0.0
+        self.last = None
+
+    def start(self):
+        self.last = time.monotonic()
+        self.accumulator = 0.0
+
+    def advance(self):
+        """Возвращает число шагов физики, накопившихся с прошлого вызова."""
+        now = time.monotonic()
+        if self.last is None:
+            self.last = now
+        self.accumulator += (now - self.last) * self.time_warp
+        self.last = now
+
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_steps:
+            # Не успеваем за ускорением: отбрасываем отставание, а не копим его
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        self.sim_time += steps * self.dt
+        return steps
+
+
+class DroneSimulation:
+    """Симуляция полета дрона и ответов модема SIM800 без графического интерфейса.
+
+    Хранит позицию дрона, точки пути и базу вышек. Окно Qt подписывается на
+    изменения через add_listener и только отрисовывает состояние, поэтому
+    симуляцию можно запускать без дисплея и шагать с любой скоростью.
+    Уровни сигнала считает propagation (по умолчанию логарифмическая модель
+    с затенением).
+    """
+
+    def __init__(self, tower_db, start_position, propagation=None):
+        self.tower_db = tower_db
+        self.lock = threading.Lock()  # Позицию читает поток UART
+        self.position = np.array(start_position, dtype=np.float64)
+        self.waypoints = []
+        self.current_waypoint_index = 0
+        self.is_moving = False
+        self.speed = DEFAULT_SPEED
+        self.listeners = []
+        self.propagation = propagation or make_propagation(tower_db)
+        self.ceng_cache = CengResponseCache(tower_db, self.propagation, NEAREST_TOWERS_COUNT)
+
+    def add_listener(self, callback):
+        """Подписывает callback(simulation) на изменение позиции и точек пути."""
+        self.listeners.append(callback)
+
+    def notify(self):
+        for callback in self.listeners:
+            callback(self)
+
+    def get_position(self):
+        """Возвращает копию текущей позиции дрона (долгота, широта)."""
+        with self.lock:
+            return self.position.copy()
+
+    def set_position(self, lon, lat):
+        with self.lock:
+            self.position = np.array([lon, lat], dtype=np.float64)
+        self.notify()
+
+    def add_waypoint(self, lon, lat):
+        """Добавляет точку пути; первая точка становится стартовой позицией дрона."""
+        self.waypoints.append((lon, lat))
+        if len(self.waypoints) == 1:
+            self.set_position(lon, lat)
+        else:
+            self.notify()
+
+    def reset(self):
+        self.waypoints.clear()
+        self.current_waypoint_index = 0
+        self.is_moving = False
+
+    def start(self):
+        """Запускает движение по точкам пути; возвращает False, если точек нет."""
+        if not self.waypoints:
+            return False
+        self.is_moving = True
+        self.current_waypoint_index = 0
+        return True
+
+    def step(self, dt=PHYSICS_STEP):
+        """Перемещает дрон вдоль точек пути на speed * dt метров; возвращает True, пока дрон движется."""
+        if not self.is_moving or not self.waypoints:
+            return False
+
+        # Движение считается в метрах в той же проекции, что и выборка маршрута в batch_simulation
+        index = self.tower_db.spatial_index
+        lon, lat = self.get_position()
+        x, y = index.project(lon, lat)
+        remaining = self.speed * dt
+        while True:
+            target_x, target_y = index.project(*self.waypoints[self.current_waypoint_index])
+            distance = np.hypot(target_x - x, target_y - y)
+            if distance > remaining:
+                x += (target_x - x) / distance * remaining
+                y += (target_y - y) / distance * remaining
+                break
+            # Точка пути достигнута: остаток шага идет к следующей
+            x, y = target_x, target_y
+            remaining -= distance
+            self.current_waypoint_index += 1
+            if self.current_waypoint_index >= len(self.waypoints):
+                self.is_moving = False
+                break
+
+        lon, lat = index.unproject(x, y)
+        self.set_position(float(lon), float(lat))
+        return self.is_moving
+
+    def advance(self, steps, dt=PHYSICS_STEP):
+        """Выполняет до steps шагов физики; возвращает True, пока дрон движется."""
+        for _ in range(steps):
+            if not self.step(dt):
+                break
+        return self.is_moving
+
+    def get_nearest_towers(self, k=NEAREST_TOWERS_COUNT):
+        """Возвращает k ближайших вышек: (idx, lon, lat, mcc, mnc, cell, distance, rssi)."""
+        lon, lat = self.get_position()
+        db = self.tower_db
+        nearest_indices, distances = db.query_nearest(lon, lat, k=k)
+        rssis = np.round(self.propagation.mean_rssi(lon, lat, nearest_indices, distances)).astype(int)
+        return [
+            (idx, db.lons[idx], db.lats[idx], db.mccs[idx], db.mncs[idx], db.cells[idx], distance, rssi)
+            for idx, distance, rssi in zip(nearest_indices, distances, rssis)
+        ]
+
+    def send_tower_data(self):
+        """Возвращает ответ на AT+CENG? с данными о 7 ближайших вышках.
+
+        Вышки и строки ответа берутся из кэша по ячейке позиции, шум уровня
+        сигнала добавляется заново на каждый запрос.
+        """
+        with METRICS.stage("position_lock"):
+            lon, lat = self.get_position()
+        with METRICS.stage("nearest"):
+            parts, base_levels = self.ceng_cache.lookup(lon, lat)
+        if not parts:
+            return "ERROR"
+
+        with METRICS.stage("format"):
+            return format_ceng_lines(parts, self.propagation.noisy_levels(base_levels))
@@ -0,0 +1,206 @@
+import numpy as np
+
+EARTH_RADIUS = 6371000  # Радиус Земли в метрах
+DEFAULT_CELL_SIZE = 500  # Размер ячейки сетки в метрах
+
+# Упаковка номера ячейки (ix, iy) в один ключ int64
+CELL_KEY_OFFSET = 2 ** 30
+CELL_KEY_STRIDE = 2 ** 31
+BATCH_CHUNK = 1024  # Максимум точек в одной матрице расстояний пакетного запроса
+
+
+def haversine_distances(lat1, lon1, lat2, lon2):
+    """Векторизованное вычисление расстояний между точками (в метрах)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+class TowerSpatialIndex:
+    """Равномерная сетка по вышкам в локальной метрической проекции.
+
+    Строится один раз при загрузке базы и отвечает на запросы k ближайших
+    вышек и вышек в радиусе, просматривая только соседние ячейки сетки.
+    Хранятся только непустые ячейки, поэтому размер индекса не зависит
+    от площади покрываемой территории.
+    """
+
+    def __init__(self, lons, lats, cell_size=DEFAULT_CELL_SIZE):
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.cell_size = float(cell_size)
+
+        if len(self.lats):
+            self.lon0 = float(self.lons.mean())
+            self.lat0 = float(self.lats.mean())
+        else:
+            self.lon0 = self.lat0 = 0.0
+        self.cos_lat0 = np.cos(np.radians(self.lat0))
+
+        # Проекция растягивает долготу на краях базы; минимальный масштаб
+        # нужен, чтобы граница поиска по кольцам ячеек оставалась точной
+        max_abs_lat = float(np.abs(self.lats).max()) if len(self.lats) else self.lat0
+        self.min_scale = min(1.0, np.cos(np.radians(max_abs_lat)) / self.cos_lat0)
+
+        x, y = self.project(self.lons, self.lats)
+        ix, iy = self.cell_coords(x, y)
+        keys = self._cell_keys(ix, iy)
+
+        self.order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[self.order]
+        self.cell_keys, self.cell_starts = np.unique(sorted_keys, return_index=True)
+        self.cell_ends = np.append(self.cell_starts[1:], len(sorted_keys))
+        self.cell_ix = self.cell_keys // CELL_KEY_STRIDE - CELL_KEY_OFFSET
+        self.cell_iy = self.cell_keys % CELL_KEY_STRIDE - CELL_KEY_OFFSET
+
+    def __len__(self):
+        return len(self.lons)
+
+    def project(self, lons, lats):
+        """Переводит долготу и широту в метры относительно центра базы."""
+        x = EARTH_RADIUS * np.radians(np.asarray(lons, dtype=np.float64) - self.lon0) * self.cos_lat0
+        y = EARTH_RADIUS * np.radians(np.asarray(lats, dtype=np.float64) - self.lat0)
+        return x, y
+
+    def unproject(self, x, y):
+        """Обратное преобразование метров относительно центра базы в долготу и широту."""
+        lons = self.lon0 + np.degrees(np.asarray(x, dtype=np.float64) / (EARTH_RADIUS * self.cos_lat0))
+        lats = self.lat0 + np.degrees(np.asarray(y, dtype=np.float64) / EARTH_RADIUS)
+        return lons, lats
+
+    def cell_coords(self, x, y):
+        """Номер ячейки сетки для метрических координат."""
+        ix = np.floor(np.asarray(x) / self.cell_size).astype(np.int64)
+        iy = np.floor(np.asarray(y) / self.cell_size).astype(np.int64)
+        return ix, iy
+
+    def _cell_keys(self, ix, iy):
+        return (ix + CELL_KEY_OFFSET) * CELL_KEY_STRIDE + (iy + CELL_KEY_OFFSET)
+
+    def _cell_members(self, keys):
+        """Индексы вышек, лежащих в перечисленных ячейках."""
+        if len(self.cell_keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        pos = np.searchsorted(self.cell_keys, keys)
+        pos = np.clip(pos, 0, len(self.cell_keys) - 1)
+        pos = pos[self.cell_keys[pos] == keys]
+        return self._members_of_cells(pos)
+
+    def _members_of_cells(self, pos):
+        starts = self.cell_starts[pos]
+        lengths = self.cell_ends[pos] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        return self.order[offsets]
+
+    def _ring_members(self, ix, iy, ring):
+        """Вышки из квадрата ячеек со стороной 2 * ring + 1 вокруг (ix, iy)."""
+        if (2 * ring + 1) ** 2 >= len(self.cell_keys):
+            # Квадрат больше числа непустых ячеек: дешевле отфильтровать их напрямую
+            mask = ((np.abs(self.cell_ix - ix) <= ring) & (np.abs(self.cell_iy - iy) <= ring))
+            return self._members_of_cells(np.nonzero(mask)[0])
+        d = np.arange(-ring, ring + 1)
+        dx, dy = np.meshgrid(d, d)
+        return self._cell_members(self._cell_keys(ix + dx.ravel(), iy + dy.ravel()))
+
+    def _covers_all(self, ix, iy, ring):
+        return (len(self.cell_keys) == 0 or
+                (ix - ring <= self.cell_ix.min() and ix + ring >= self.cell_ix.max() and
+                 iy - ring <= self.cell_iy.min() and iy + ring >= self.cell_iy.max()))
+
+    def query_nearest(self, lon, lat, k=7):
+        """Возвращает индексы k ближайших вышек и расстояния до них (в метрах)."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        x, y = self.project(lon, lat)
+        ix, iy = self.cell_coords(x, y)
+        ix, iy = int(ix), int(iy)
+
+        ring = 1
+        while True:
+            candidates = self._ring_members(ix, iy, ring)
+            if len(candidates) >= k:
+                distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+                nearest = np.argpartition(distances, k - 1)[:k]
+                nearest = nearest[np.argsort(distances[nearest])]
+                # Все вышки за пределами квадрата дальше, чем ring ячеек
+                if (distances[nearest[-1]] <= ring * self.cell_size * self.min_scale or
+                        self._covers_all(ix, iy, ring)):
+                    return candidates[nearest], distances[nearest]
+            ring *= 2
+
+    def query_nearest_batch(self, lons, lats, k=7):
+        """Возвращает индексы и расстояния k ближайших вышек для массива точек.
+
+        Точки группируются по ячейкам сетки: для всех точек одной ячейки
+        кандидаты собираются один раз, а расстояния считаются матрицей.
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        k = min(k, len(self))
+        indices = np.empty((len(lons), max(k, 0)), dtype=np.int64)
+        distances = np.empty((len(lons), max(k, 0)))
+        if k <= 0 or len(lons) == 0:
+            return indices, distances
+
+        x, y = self.project(lons, lats)
+        ix, iy = self.cell_coords(x, y)
+        _, inverse, counts = np.unique(self._cell_keys(ix, iy), return_inverse=True, return_counts=True)
+        groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+
+        for group in groups:
+            cx, cy = int(ix[group[0]]), int(iy[group[0]])
+            for start in range(0, len(group), BATCH_CHUNK):
+                points = group[start:start + BATCH_CHUNK]
+                indices[points], distances[points] = self._nearest_in_cell(cx, cy, lons[points], lats[points], k)
+        return indices, distances
+
+    def _nearest_in_cell(self, ix, iy, lons, lats, k):
+        ring = 1
+        while True:
+            candidates = self._ring_members(ix, iy, ring)
+            if len(candidates) >= k:
+                matrix = haversine_distances(lats[:, None], lons[:, None],
+                                             self.lats[candidates][None, :], self.lons[candidates][None, :])
+                nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+                nearest_distances = np.take_along_axis(matrix, nearest, axis=1)
+                order = np.argsort(nearest_distances, axis=1)
+                nearest = np.take_along_axis(nearest, order, axis=1)
+                nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+                if (nearest_distances[:, -1].max() <= ring * self.cell_size * self.min_scale or
+                        self._covers_all(ix, iy, ring)):
+                    return candidates[nearest], nearest_distances
+            ring *= 2
+
+    def query_radius(self, lon, lat, radius):
+        """Возвращает индексы вышек в радиусе radius метров, отсортированные по расстоянию."""
+        x, y = self.project(lon, lat)
+        ix, iy = self.cell_coords(x, y)
+        ring = int(np.floor(radius / (self.cell_size * self.min_scale))) + 1
+        candidates = self._ring_members(int(ix), int(iy), ring)
+        distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = np.nonzero(distances <= radius)[0]
+        inside = inside[np.argsort(distances[inside])]
+        return candidates[inside], distances[inside]
+
+    def query_bbox(self, lon_min, lat_min, lon_max, lat_max):
+        """Возвращает индексы вышек внутри прямоугольника в градусах."""
+        x_min, y_min = self.project(lon_min, lat_min)
+        x_max, y_max = self.project(lon_max, lat_max)
+        ix_min, iy_min = self.cell_coords(x_min, y_min)
+        ix_max, iy_max = self.cell_coords(x_max, y_max)
+        mask = ((self.cell_ix >= ix_min) & (self.cell_ix <= ix_max) &
+                (self.cell_iy >= iy_min) & (self.cell_iy <= iy_max))
+        candidates = self._members_of_cells(np.nonzero(mask)[0])
+        lons = self.lons[candidates]
+        lats = self.lats[candidates]
+        inside = (lons >= lon_min) & (lons <= lon_max) & (lats >= lat_min) & (lats <= lat_max)
+        return candidates[inside]
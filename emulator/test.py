@@ -1,4 +1,4 @@
-import pandas as pd
+from tower_db import load_tower_columns
 import pyqtgraph as pg
 
 MAP_IMAGE_PATH = "alidade_satellite.jpg"
@@ -8,15 +8,13 @@ MOSCOW_CENTER_LON = 37.618423
 MOSCOW_CENTER_LAT = 55.751244
 MAP_ZOOM = 13
 
-towers_df = pd.read_csv(TOWERS_DATA_PATH)
-if len(towers_df) > MAX_TOWERS_DISPLAY:
-    towers_df = towers_df.sample(n=MAX_TOWERS_DISPLAY, random_state=1)
+tower_columns = load_tower_columns(TOWERS_DATA_PATH)
 
-latitudes = towers_df['lat'].values
-longitudes = towers_df['lon'].values
-mccs = towers_df['mcc'].values
-mncs = towers_df['area'].values  # Получаем MNC
-cells = towers_df['cell'].values
+latitudes = tower_columns['lat']
+longitudes = tower_columns['lon']
+mccs = tower_columns['mcc']
+mncs = tower_columns['net']  # Получаем MNC
+cells = tower_columns['cell']
 
 tower_scatter = pg.ScatterPlotItem(
     x=longitudes, y=latitudes, pen=pg.mkPen(None), brush=pg.mkBrush(0, 0, 255, 120), size=5
@@ -1,5 +1,8 @@
-import serial
-import time
+import asyncio
+import os
+from functools import partial
+
+from uart_server import UartCommandServer, open_serial_port
 
 # Настройки порта (измените по необходимости)
 UART_PORT = "/dev/pts/6"  # Укажите нужный порт или виртуальный порт
@@ -25,29 +28,13 @@ def simulate_response(command):
         return "ERROR"  # Ошибка для нераспознанной команды
 
 def main():
-    # Открываем UART порт
-    with serial.Serial(UART_PORT, BAUD_RATE, timeout=1) as ser:
-        print(f"Ожидание команд на {UART_PORT}...")
-
-        # Очистка входного буфера при старте
-        ser.reset_input_buffer()
-        
-        # Читаем команды в бесконечном цикле
-        while True:
-            if ser.in_waiting > 0:
-                # Читаем команду
-                command = ser.readline().decode('utf-8').strip()
-                print(f"Получена команда: {command}")
-                
-                # Генерируем ответ
-                response = simulate_response(command)
-                print(f"Отправка ответа: {response}")
-                
-                # Отправляем ответ обратно
-                ser.write((response + "\r\n").encode('utf-8'))
-
-            # Небольшая задержка для циклического опроса
-            time.sleep(0.1)
+    # Открываем UART порт и отвечаем на команды по мере их поступления
+    fd = open_serial_port(UART_PORT, BAUD_RATE)
+    commands = {command: partial(simulate_response, command) for command in ("AT+CENG=1,1", "AT+CENG?")}
+    try:
+        asyncio.run(UartCommandServer(fd, commands, name=UART_PORT).serve())
+    finally:
+        os.close(fd)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули эмулятора лежат плоско в каталоге emulator и импортируются по имени
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from binlog import (HEADER_SIZE, MAX_TOWERS, RECORD_DTYPE, BinaryLogWriter, make_records, read_binary_log,
+                    read_header)
+
+ROWS = [
+    (1700000000.0, 55.75, 37.6, [(250, 1, 4660, 50, 55.751, 37.601), (250, 1, 4661, 40, np.nan, np.nan)]),
+    (np.nan, np.nan, np.nan, []),
+    (1700000001.5, 55.76, 37.61, [(250, 2, i, 30 + i, 55.7 + i / 100, 37.6) for i in range(MAX_TOWERS + 2)]),
+]
+
+
+def assert_records_equal(actual, expected):
+    assert len(actual) == len(expected)
+    # NaN в записях сравниваются как равные
+    assert actual.tobytes() == expected.tobytes()
+
+
+def test_make_records():
+    records = make_records(ROWS)
+    assert list(records['tower_count']) == [2, 0, MAX_TOWERS]
+    assert records[0]['towers'][1]['cid'] == 4661
+    assert np.isnan(records[1]['towers']['lat']).all()
+    assert records[2]['towers'][-1]['cid'] == MAX_TOWERS - 1
+
+
+def test_write_and_read_round_trip(tmp_path):
+    path = str(tmp_path / "log.bin")
+    with BinaryLogWriter(path) as writer:
+        writer.append(make_records(ROWS[:2]))
+    # Дописывание в существующий журнал не повторяет заголовок
+    with BinaryLogWriter(path) as writer:
+        writer.write(*ROWS[2])
+    records = read_binary_log(path)
+    assert_records_equal(records, make_records(ROWS))
+
+
+def test_partial_record_is_skipped(tmp_path):
+    path = str(tmp_path / "log.bin")
+    with BinaryLogWriter(path) as writer:
+        writer.append(make_records(ROWS))
+    with open(path, 'ab') as f:
+        f.write(b"\0" * (RECORD_DTYPE.itemsize // 2))
+    assert_records_equal(read_binary_log(path), make_records(ROWS))
+
+
+def test_append_after_partial_record(tmp_path):
+    path = str(tmp_path / "log.bin")
+    with BinaryLogWriter(path) as writer:
+        writer.append(make_records(ROWS[:1]))
+    with open(path, 'ab') as f:
+        f.write(b"\xff" * 50)
+    with BinaryLogWriter(path) as writer:
+        writer.append(make_records(ROWS[1:]))
+    assert_records_equal(read_binary_log(path), make_records(ROWS))
+    assert (tmp_path / "log.bin").stat().st_size == HEADER_SIZE + len(ROWS) * RECORD_DTYPE.itemsize
+
+
+def test_empty_and_invalid_files(tmp_path):
+    path = str(tmp_path / "log.bin")
+    BinaryLogWriter(path).close()
+    assert len(read_binary_log(path)) == 0
+
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"NOTALOG\0" + b"\0" * (HEADER_SIZE - 8))
+    with pytest.raises(ValueError):
+        read_header(str(bad))
+    short = tmp_path / "short.bin"
+    short.write_bytes(b"SIMLOG")
+    with pytest.raises(ValueError):
+        read_binary_log(str(short))
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from ceng import format_ceng_response, parse_ceng_batch, parse_ceng_response
+
+TOWERS = [(250, 1, 0x0250, 50), (250, 2, 0x1a2b, 31), (250, 99, 0xffff, 0), (1, 0, 0x0001, 63)]
+EXPECTED = [(mcc, mnc, f"{cell:04x}", level) for mcc, mnc, cell, level in TOWERS]
+
+# Соседняя сота: номер, "arfcn, уровень, bsic, cellid, mcc, mnc, lac"
+MALFORMED = [
+    '+CENG: 1,"0072,+50,44,1a2b,250,2,6d07"',
+    '+CENG: 1,"0072,5_0,44,1a2b,250,2,6d07"',
+    '+CENG: 1,"0072,50,44,1a2b,250,2,6d0g"',
+    '+CENG: 1,"0072,50,44,1a2b,250,2,-6d0"',
+    '+CENG: 1,"0072,50,44,1a2b,250,2,"',
+    '+CENG: 1,"0072,50,44,1x2b,250,2,6d07"',
+    '+CENG: 1,"0072,3x,44,1a2b,250,2,6d07"',
+    '+CENG: -1,"0072,50,44,1a2b,250,2,6d07"',
+    '+CENG: 1,"0072,50,44,1a2b,250,2"',
+    '+CENG: 1,"0072,50,44,1a2b,250,2,6d07',
+    '+CENG: 1,"0072,50,44,1a2b,250,2;6d07"',
+    '+CENG: 1,"0072,50,44,0123456789,250,2,6d07"',
+    '+CENG: 1,"0072,1234567890,44,1a2b,250,2,6d07"',
+    '+CENG: 1,1',
+    '+CENG: 0,"0034,50,00,250,1,40,0250,01,05,6d0x,255"',
+]
+# Корректные строки с пробелами и экранированными кавычками разбираются обоими парсерами
+ACCEPTED = [
+    '+CENG: 1,"0072,50,44,1a2b,250,2,6d07"',
+    '+CENG: 1, "0072, 50, 44, 1A2B, 250, 2, 6d07"\r\n',
+    '+CENG: 0,\\"0034,50,00,250,1,40,0250,01,05,6d07,255\\"',
+]
+
+
+def batch_towers(records):
+    return [(int(r['mcc']), int(r['mnc']), f"{int(r['cell']):04x}", int(r['level'])) for r in records]
+
+
+def test_round_trip():
+    response = format_ceng_response(TOWERS)
+    assert parse_ceng_response(response) == EXPECTED
+    assert batch_towers(parse_ceng_batch(response)) == EXPECTED
+
+
+def test_batch_numbers_responses():
+    records = parse_ceng_batch("\r\n".join([format_ceng_response(TOWERS)] * 3))
+    assert len(records) == 3 * len(TOWERS)
+    assert list(records['response']) == [0] * 4 + [1] * 4 + [2] * 4
+    assert list(records['serving']) == [True, False, False, False] * 3
+
+
+def test_escaped_quotes_in_jsonl():
+    line = json.dumps({'response': format_ceng_response(TOWERS)})
+    assert batch_towers(parse_ceng_batch(line)) == EXPECTED
+
+
+@pytest.mark.parametrize("line", MALFORMED + ACCEPTED)
+def test_parsers_agree(line):
+    assert batch_towers(parse_ceng_batch(line)) == parse_ceng_response(line)
+
+
+@pytest.mark.parametrize("line", MALFORMED)
+def test_malformed_line_rejected(line):
+    assert parse_ceng_response(line) == []
+
+
+@pytest.mark.parametrize("line", ACCEPTED)
+def test_accepted_line(line):
+    assert len(parse_ceng_response(line)) == 1
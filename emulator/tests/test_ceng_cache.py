@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from ceng import format_ceng_lines, parse_ceng_response
+from ceng_cache import CACHE_CELL_SIZE, CengResponseCache
+from propagation import PropagationEngine
+from spatial_index import haversine_distances
+from tower_db import TowerDatabase
+
+K = 7
+
+
+@pytest.fixture(scope="module")
+def tower_db():
+    rng = np.random.default_rng(8)
+    count = 300
+    return TowerDatabase({
+        'lon': 37.6 + rng.uniform(-0.05, 0.05, count),
+        'lat': 55.75 + rng.uniform(-0.03, 0.03, count),
+        'mcc': np.full(count, 250),
+        'net': rng.integers(1, 3, count),
+        'area': rng.integers(1, 100, count),
+        'cell': np.arange(1, count + 1),
+    })
+
+
+def make_cache(tower_db, **kwargs):
+    return CengResponseCache(tower_db, PropagationEngine(tower_db), K, **kwargs)
+
+
+def position(tower_db, x, y):
+    """Долгота и широта точки (x, y) в метрах проекции пространственного индекса."""
+    lon, lat = tower_db.spatial_index.unproject(x, y)
+    return float(lon), float(lat)
+
+
+def test_cell_keying(tower_db):
+    cache = make_cache(tower_db)
+    assert cache.cell_size == CACHE_CELL_SIZE == 5.0
+    assert cache.cell_key(*position(tower_db, 0.5, 0.5)) == (0, 0)
+    assert cache.cell_key(*position(tower_db, 4.5, 4.5)) == (0, 0)
+    assert cache.cell_key(*position(tower_db, 5.5, 0.5)) == (1, 0)
+    assert cache.cell_key(*position(tower_db, -0.5, 12.0)) == (-1, 2)
+
+
+def test_hits_and_misses(tower_db):
+    cache = make_cache(tower_db)
+    first = cache.lookup(*position(tower_db, 1.0, 1.0))
+    assert cache.lookup(*position(tower_db, 3.0, 4.0)) is first
+    cache.lookup(*position(tower_db, 7.0, 1.0))
+    assert cache.stats() == {'size': 2, 'hits': 1, 'misses': 2, 'hit_rate': 1 / 3}
+    cache.clear()
+    assert cache.stats() == {'size': 0, 'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+
+
+def test_least_recently_used_cell_is_evicted(tower_db):
+    cache = make_cache(tower_db, capacity=2)
+    a, b, c = (position(tower_db, 2.5 + 5 * i, 2.5) for i in range(3))
+    cache.lookup(*a)
+    cache.lookup(*b)
+    cache.lookup(*a)  # a становится самой свежей
+    cache.lookup(*c)  # вытесняется b
+    assert len(cache) == 2
+    assert set(cache.entries) == {cache.cell_key(*a), cache.cell_key(*c)}
+    misses = cache.misses
+    cache.lookup(*a)
+    assert cache.misses == misses
+    cache.lookup(*b)
+    assert cache.misses == misses + 1
+
+
+def test_entry_matches_cell_centre_and_error_bound(tower_db):
+    cache = make_cache(tower_db, cell_size=200.0)
+    half_diagonal = 200.0 / np.sqrt(2)
+    rng = np.random.default_rng(9)
+    for x, y in rng.uniform(-2000, 2000, (50, 2)):
+        lon, lat = position(tower_db, x, y)
+        parts, base_levels = cache.lookup(lon, lat)
+        key = cache.cell_key(lon, lat)
+        centre = position(tower_db, (key[0] + 0.5) * 200.0, (key[1] + 0.5) * 200.0)
+        indices, distances = tower_db.spatial_index.query_nearest(*centre, k=K)
+        cells = [f"{cell:04x}" for cell in tower_db.cells[indices]]
+        levels = np.round(base_levels).astype(int)
+        assert [tower[2] for tower in parse_ceng_response(format_ceng_lines(parts, levels))] == cells
+        np.testing.assert_allclose(base_levels, -cache.propagation.mean_rssi(*centre, indices, distances))
+
+        # Выданные вышки не дальше точной k-й ближайшей более чем на 2h
+        all_distances = haversine_distances(lat, lon, tower_db.lats, tower_db.lons)
+        kth = np.sort(all_distances)[K - 1]
+        assert all_distances[indices].max() <= kth + 2 * half_diagonal
@@ -0,0 +1,79 @@
+import math
+import os
+
+import pytest
+
+from location_log import read_location_log
+from log_tailer import LocationLogTailer
+
+TOWER_LINE = "Вышка {}: MCC=250, MNC=1, CID={}, Уровень сигнала={}, LAT=55.75, LONG=37.6\n"
+FIX_LINE = "Рассчитанное местоположение устройства: LAT={}, LONG={}\n"
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_missing_file(tmp_path):
+    tailer = LocationLogTailer(str(tmp_path / "location_log.txt"))
+    assert tailer.poll() is False
+    assert tailer.snapshot()['towers'] == []
+
+
+def test_incremental_poll(tmp_path):
+    path = str(tmp_path / "location_log.txt")
+    tailer = LocationLogTailer(path)
+    append(path, TOWER_LINE.format(1, 100, 50) + TOWER_LINE.format(2, 101, 40))
+    assert tailer.poll()
+    # Замер не завершен: снимок еще пуст
+    assert tailer.snapshot()['towers'] == []
+
+    line = FIX_LINE.format("55.751000", "37.602000")
+    append(path, line[:20])
+    tailer.poll()
+    assert 'error' in tailer.snapshot()['device_location']
+    append(path, line[20:])
+    tailer.poll()
+    snapshot = tailer.snapshot()
+    assert snapshot['device_location'] == {'lat': 55.751, 'lon': 37.602}
+    assert [tower['CID'] for tower in snapshot['towers']] == [100, 101]
+    assert tailer.offset == os.path.getsize(path)
+
+    # "Вышка 1" без строки местоположения тоже завершает предыдущий замер
+    append(path, TOWER_LINE.format(1, 200, 30) + TOWER_LINE.format(1, 300, 20))
+    tailer.poll()
+    snapshot = tailer.snapshot()
+    assert [tower['CID'] for tower in snapshot['towers']] == [200]
+    assert snapshot['device_location'] == {'lat': 55.751, 'lon': 37.602}
+
+
+@pytest.mark.parametrize("nan", ["nan", "-nan"])
+def test_nan_fix_keeps_previous_location(tmp_path, nan):
+    path = str(tmp_path / "location_log.txt")
+    tailer = LocationLogTailer(path)
+    append(path, TOWER_LINE.format(1, 100, 50) + FIX_LINE.format("55.5", "37.5"))
+    append(path, TOWER_LINE.format(1, 101, 50) + FIX_LINE.format(nan, nan))
+    append(path, TOWER_LINE.format(1, 102, 50))
+    tailer.poll()
+    snapshot = tailer.snapshot()
+    assert snapshot['device_location'] == {'lat': 55.5, 'lon': 37.5}
+    assert [tower['CID'] for tower in snapshot['towers']] == [101]
+    # Строка с nan распознается как местоположение, а не пропускается
+    groups = read_location_log(path)
+    assert [len(group['towers']) for group in groups] == [1, 1, 1]
+    assert all(math.isnan(value) for value in groups[1]['fix'])
+    assert groups[2]['fix'] is None
+
+
+def test_truncated_file_is_reread(tmp_path):
+    path = str(tmp_path / "location_log.txt")
+    tailer = LocationLogTailer(path)
+    append(path, TOWER_LINE.format(1, 100, 50) * 5 + FIX_LINE.format("55.5", "37.5"))
+    tailer.poll()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TOWER_LINE.format(1, 400, 50) + FIX_LINE.format("55.6", "37.6"))
+    tailer.poll()
+    snapshot = tailer.snapshot()
+    assert snapshot['device_location'] == {'lat': 55.6, 'lon': 37.6}
+    assert [tower['CID'] for tower in snapshot['towers']] == [400]
@@ -0,0 +1,56 @@
+import numpy as np
+
+from multilateration import (METHOD_CENTROID, METHOD_LEAST_SQUARES, METHOD_NONE, estimate_distance,
+                             multilaterate)
+from propagation import calculate_rssi
+from spatial_index import haversine_distances
+
+
+def exact_levels(tower_lats, tower_lons, lat, lon):
+    """Уровни сигнала без округления, для которых estimate_distance дает точное расстояние."""
+    distances = haversine_distances(lat, lon, tower_lats, tower_lons)
+    return 40 + 30 * np.log10(distances)
+
+
+def test_estimate_distance_inverts_rssi():
+    distances = np.array([10.0, 150.0, 2000.0])
+    np.testing.assert_allclose(estimate_distance(-calculate_rssi(distances)), distances, rtol=0.1)
+
+
+def test_exact_ranges_recover_position():
+    rng = np.random.default_rng(6)
+    fixes = 50
+    true_lats = 55.75 + rng.uniform(-0.05, 0.05, fixes)
+    true_lons = 37.6 + rng.uniform(-0.05, 0.05, fixes)
+    tower_lats = true_lats[:, None] + rng.uniform(-0.01, 0.01, (fixes, 5))
+    tower_lons = true_lons[:, None] + rng.uniform(-0.02, 0.02, (fixes, 5))
+    levels = exact_levels(tower_lats, tower_lons, true_lats[:, None], true_lons[:, None])
+
+    lats, lons, methods = multilaterate(tower_lats, tower_lons, levels)
+    assert np.all(methods == METHOD_LEAST_SQUARES)
+    # Ошибка остается только от локальной проекции
+    assert haversine_distances(lats, lons, true_lats, true_lons).max() < 5.0
+
+
+def test_each_fix_matches_single_solution():
+    rng = np.random.default_rng(7)
+    tower_lats = 55.75 + rng.uniform(-0.01, 0.01, (20, 6))
+    tower_lons = 37.6 + rng.uniform(-0.02, 0.02, (20, 6))
+    levels = rng.uniform(60, 120, (20, 6))
+    levels[:, 4:] = np.nan  # Пропуски не должны влиять на решение
+    lats, lons, _ = multilaterate(tower_lats, tower_lons, levels)
+    for i in range(20):
+        lat, lon, _ = multilaterate(tower_lats[i, :4], tower_lons[i, :4], levels[i, :4])
+        np.testing.assert_allclose((lat[0], lon[0]), (lats[i], lons[i]))
+
+
+def test_degenerate_and_empty_fixes():
+    tower_lats = np.array([[55.75, 55.76, 55.77], [55.75, 55.76, np.nan], [np.nan, np.nan, np.nan]])
+    tower_lons = np.array([[37.60, 37.61, 37.62], [37.60, 37.61, np.nan], [np.nan, np.nan, np.nan]])
+    levels = np.array([[80.0, 80.0, 80.0], [80.0, 80.0, 0.0], [80.0, 80.0, 80.0]])
+    lats, lons, methods = multilaterate(tower_lats, tower_lons, levels)
+    assert list(methods) == [METHOD_CENTROID, METHOD_CENTROID, METHOD_NONE]
+    # Равные уровни: центр вышек
+    np.testing.assert_allclose((lats[0], lons[0]), (55.76, 37.61), atol=1e-6)
+    np.testing.assert_allclose((lats[1], lons[1]), (55.755, 37.605), atol=1e-6)
+    assert np.isnan(lats[2]) and np.isnan(lons[2])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from nearest_raster import build_nearest_raster, read_nearest_raster, save_nearest_raster
+from spatial_index import TowerSpatialIndex
+
+BBOX = (37.5, 55.7, 37.7, 55.8)
+
+
+@pytest.fixture(scope="module")
+def spatial_index():
+    rng = np.random.default_rng(4)
+    return TowerSpatialIndex(37.6 + rng.uniform(-0.15, 0.15, 800), 55.75 + rng.uniform(-0.08, 0.08, 800))
+
+
+@pytest.fixture(scope="module")
+def raster(spatial_index):
+    return build_nearest_raster(spatial_index, BBOX, cell_size=250.0, k=7)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(5)
+    # Большая часть точек внутри растра, часть - снаружи
+    return 37.6 + rng.uniform(-0.13, 0.13, 500), 55.75 + rng.uniform(-0.07, 0.07, 500)
+
+
+@pytest.mark.parametrize("k", [1, 3, 7, 9])
+def test_batch_matches_spatial_index(spatial_index, raster, queries, k):
+    expected, expected_distances = spatial_index.query_nearest_batch(*queries, k=k)
+    indices, distances = raster.query_nearest_batch(*queries, k=k)
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(distances, expected_distances)
+
+
+def test_single_matches_spatial_index(spatial_index, raster, queries):
+    for lon, lat in zip(*queries):
+        expected, expected_distances = spatial_index.query_nearest(lon, lat, k=7)
+        found, distances = raster.query_nearest(lon, lat, k=7)
+        np.testing.assert_array_equal(found, expected)
+        np.testing.assert_allclose(distances, expected_distances)
+
+
+def test_cell_of_outside(raster):
+    assert raster.cell_of(37.4, 55.75) == -1
+    assert raster.cell_of(37.6, 55.9) == -1
+    assert 0 <= raster.cell_of(37.6, 55.75) < len(raster)
+
+
+def test_save_and_read(spatial_index, raster, queries, tmp_path):
+    path = str(tmp_path / "raster")
+    save_nearest_raster(raster, path)
+    loaded = read_nearest_raster(spatial_index, path)
+    assert loaded is not None and loaded.meta == raster.meta
+    np.testing.assert_array_equal(loaded.offsets, raster.offsets)
+    np.testing.assert_array_equal(loaded.candidates, raster.candidates)
+    np.testing.assert_array_equal(loaded.query_nearest_batch(*queries)[0], raster.query_nearest_batch(*queries)[0])
+
+
+def test_read_rejects_other_towers(spatial_index, raster, tmp_path):
+    path = str(tmp_path / "raster")
+    save_nearest_raster(raster, path)
+    lons = spatial_index.lons.copy()
+    lons[[0, 1]] = lons[[1, 0]]
+    lats = spatial_index.lats.copy()
+    lats[[0, 1]] = lats[[1, 0]]
+    assert read_nearest_raster(TowerSpatialIndex(lons, lats), path) is None
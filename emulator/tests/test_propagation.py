@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from propagation import (HATA_TX_POWER, RSSI_AT_1M, LogDistanceModel, OkumuraHataModel, ShadowingField,
+                         calculate_rssi, make_propagation)
+from spatial_index import TowerSpatialIndex
+
+
+class TowerBase:
+    def __init__(self):
+        rng = np.random.default_rng(10)
+        self.spatial_index = TowerSpatialIndex(37.6 + rng.uniform(-0.05, 0.05, 50),
+                                               55.75 + rng.uniform(-0.03, 0.03, 50))
+
+
+def test_log_distance_reference_points():
+    model = LogDistanceModel()
+    rssi = model.rssi(0, np.array([0.0, 1.0, 10.0, 100.0, 1000.0]))
+    # Ближе MIN_DISTANCE уровень равен уровню на 1 м, дальше -30 дБ на декаду
+    np.testing.assert_allclose(rssi, [RSSI_AT_1M, -40, -70, -100, -130])
+    np.testing.assert_array_equal(calculate_rssi([1.0, 10.0, 100.0]), [-40, -70, -100])
+
+
+def test_log_distance_per_tower_parameters():
+    model = LogDistanceModel(a=np.array([-40.0, -50.0, -60.0]), n=np.array([2.0, 3.0, 4.0]))
+    np.testing.assert_allclose(model.rssi(np.array([2, 0]), np.array([10.0, 10.0])), [-100, -60])
+
+
+@pytest.mark.parametrize("environment, loss_1km", [("urban", 126.40), ("suburban", 116.46), ("open", 97.90)])
+def test_hata_reference_loss(environment, loss_1km):
+    # 900 МГц, вышка 30 м, приемник 1.5 м: табличные потери модели на 1 км
+    model = OkumuraHataModel(environment=environment)
+    loss = HATA_TX_POWER - model.rssi(0, np.array([1000.0, 10000.0]))
+    assert loss[0] == pytest.approx(loss_1km, abs=0.01)
+    # Наклон 44.9 - 6.55 lg(30) дБ на декаду расстояния
+    assert loss[1] - loss[0] == pytest.approx(44.9 - 6.55 * np.log10(30.0))
+
+
+def test_hata_rejects_unknown_environment():
+    with pytest.raises(ValueError):
+        OkumuraHataModel(environment="forest")
+
+
+def test_shadowing_field_statistics_and_period():
+    field = ShadowingField(sigma=4.0, rng=np.random.default_rng(11))
+    assert field.grid.std() == pytest.approx(4.0)
+    assert field.grid.mean() == pytest.approx(0.0, abs=1e-9)
+    x = np.array([0.0, 12.5, 333.3])
+    indices = np.array([0, 1, 2])
+    np.testing.assert_allclose(field.sample(x + field.period, x - 2 * field.period, indices),
+                               field.sample(x, x, indices))
+    # В узлах сетки интерполяция возвращает значения поля
+    assert field.sample(0.0, 0.0, 0)[()] == pytest.approx(field.grid[0, 0])
+
+
+@pytest.mark.parametrize("model", ["log-distance", "hata"])
+def test_make_propagation_is_deterministic(model):
+    db = TowerBase()
+    indices = np.array([[0, 1, 2], [3, 4, 5]])
+    distances = np.array([[100.0, 250.0, 900.0], [50.0, 75.0, 3000.0]])
+    lons, lats = np.array([37.6, 37.61]), np.array([55.75, 55.76])
+
+    runs = []
+    for seed in (1, 1, 2):
+        engine = make_propagation(db, model=model, seed=seed)
+        base = -engine.mean_rssi(lons, lats, indices, distances)
+        runs.append((base, engine.noisy_levels(base), engine.noisy_levels(base)))
+    for first, repeated in zip(runs[0], runs[1]):
+        np.testing.assert_array_equal(first, repeated)
+    assert not np.array_equal(runs[0][0], runs[2][0])
+    assert not np.array_equal(runs[0][1], runs[0][2])
+
+
+def test_zero_shadowing_sigma_disables_field():
+    db = TowerBase()
+    engine = make_propagation(db, shadowing_sigma=0, seed=3)
+    assert engine.shadowing is None
+    np.testing.assert_allclose(engine.mean_rssi(37.6, 55.75, np.array([0, 1]), np.array([1.0, 10.0])), [-40, -70])
+    with pytest.raises(ValueError):
+        make_propagation(db, model="free-space")
@@ -0,0 +1,47 @@
+import pytest
+
+from send_uart import read_response
+
+
+class ChunkedSerial:
+    """Порт, отдающий ответ заранее заданными фрагментами, а затем ничего."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.timeout = None
+        self.reads = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size):
+        self.reads += 1
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+@pytest.mark.parametrize("chunks", [
+    [b"OK\r\n"],
+    [b"\r\nERROR\r\n"],
+    [b"+CME ERROR: 10\r\n"],
+    [b"+CMS ERROR: 304\r\n"],
+    [b'+CENG: 0,"0034,50"\r\n', b"+CENG: 1,", b'"0072,31"\r\n\r\nO', b"K\r", b"\n"],
+    [b"+CENG: 1\r\nOK", b"\r\n\r\n"],
+])
+def test_stops_at_final_line(chunks):
+    ser = ChunkedSerial(chunks + [b"tail\r\n"])
+    assert read_response(ser, timeout=1.0) == b"".join(chunks).decode('ascii')
+    assert ser.chunks == [b"tail\r\n"]
+    assert ser.timeout == 1.0
+
+
+@pytest.mark.parametrize("chunks", [
+    [b"OK"],  # Строка не завершена
+    [b"OK\r\n+CENG: 1\r\n"],  # Финальная строка не последняя
+    [b"OKAY\r\n"],
+    [b"+CENG: 0,\"OK\"\r\n"],
+])
+def test_waits_for_complete_final_line(chunks):
+    ser = ChunkedSerial(chunks)
+    assert read_response(ser, timeout=0.05) == b"".join(chunks).decode('ascii')
+    assert ser.reads > len(chunks)
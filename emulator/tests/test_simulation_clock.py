@@ -0,0 +1,64 @@
+import pytest
+
+import simulation
+from simulation import MAX_STEPS_PER_ADVANCE, PHYSICS_STEP, SimulationClock
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(simulation.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def test_steps_accumulate_across_calls(fake_time):
+    # dt и интервалы точно представимы в двоичном виде
+    clock = SimulationClock(dt=0.25)
+    clock.start()
+    steps = []
+    for _ in range(6):
+        fake_time.now += 0.125
+        steps.append(clock.advance())
+    assert steps == [0, 1, 0, 1, 0, 1]
+    assert clock.sim_time == 0.75
+    assert clock.accumulator == 0.0
+
+
+def test_trajectory_does_not_depend_on_call_rate(fake_time):
+    coarse = SimulationClock(time_warp=4.0, dt=0.25)
+    fine = SimulationClock(time_warp=4.0, dt=0.25)
+    coarse.start()
+    fine.start()
+    start = fake_time.now
+    fine_steps = 0
+    for i in range(1, 41):
+        fake_time.now = start + i * 0.0625
+        fine_steps += fine.advance()
+    assert coarse.advance() == fine_steps == 40
+    assert coarse.sim_time == fine.sim_time == 10.0
+
+
+def test_backlog_is_clamped_and_dropped(fake_time):
+    clock = SimulationClock(time_warp=1000.0)
+    clock.start()
+    fake_time.now += 10 * MAX_STEPS_PER_ADVANCE * PHYSICS_STEP
+    assert clock.advance() == MAX_STEPS_PER_ADVANCE
+    # Отставание не переносится на следующий вызов
+    assert clock.accumulator == 0.0
+    assert clock.advance() == 0
+    assert clock.sim_time == pytest.approx(MAX_STEPS_PER_ADVANCE * PHYSICS_STEP)
+
+
+def test_first_advance_without_start(fake_time):
+    clock = SimulationClock()
+    assert clock.advance() == 0
+    fake_time.now += 1.0
+    assert clock.advance() == pytest.approx(1.0 / PHYSICS_STEP, abs=1)
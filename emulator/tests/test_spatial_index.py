@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from spatial_index import TowerSpatialIndex, haversine_distances
+
+
+@pytest.fixture(scope="module")
+def towers():
+    rng = np.random.default_rng(1)
+    lons = 37.6 + rng.uniform(-0.2, 0.2, 2000)
+    lats = 55.75 + rng.uniform(-0.1, 0.1, 2000)
+    # Скопление вышек в одной ячейке и одиночные вышки далеко от остальных
+    lons[:50] = 37.6 + rng.uniform(-0.001, 0.001, 50)
+    lats[:50] = 55.75 + rng.uniform(-0.001, 0.001, 50)
+    lons[50:53] = (36.0, 39.5, 37.6)
+    lats[50:53] = (55.75, 56.5, 54.9)
+    return lons, lats
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(2)
+    lons = np.concatenate((37.6 + rng.uniform(-0.3, 0.3, 300), [37.6, 36.0, 40.0]))
+    lats = np.concatenate((55.75 + rng.uniform(-0.15, 0.15, 300), [55.75, 55.7, 57.0]))
+    return lons, lats
+
+
+def brute_force_nearest(lons, lats, lon, lat, k):
+    distances = haversine_distances(lat, lon, lats, lons)
+    nearest = np.argsort(distances, kind='stable')[:k]
+    return nearest, distances[nearest]
+
+
+@pytest.mark.parametrize("k", [1, 7, 60])
+def test_query_nearest_matches_brute_force(towers, queries, k):
+    index = TowerSpatialIndex(*towers)
+    for lon, lat in zip(*queries):
+        expected, expected_distances = brute_force_nearest(*towers, lon, lat, k)
+        found, distances = index.query_nearest(lon, lat, k=k)
+        np.testing.assert_array_equal(found, expected)
+        np.testing.assert_allclose(distances, expected_distances)
+
+
+@pytest.mark.parametrize("k", [1, 7, 60])
+def test_query_nearest_batch_matches_single(towers, queries, k):
+    index = TowerSpatialIndex(*towers)
+    indices, distances = index.query_nearest_batch(*queries, k=k)
+    for row, (lon, lat) in enumerate(zip(*queries)):
+        expected, expected_distances = brute_force_nearest(*towers, lon, lat, k)
+        np.testing.assert_array_equal(indices[row], expected)
+        np.testing.assert_allclose(distances[row], expected_distances)
+
+
+def test_query_radius_matches_brute_force(towers, queries):
+    index = TowerSpatialIndex(*towers)
+    lons, lats = towers
+    for lon, lat in zip(*queries):
+        for radius in (300.0, 2500.0):
+            distances = haversine_distances(lat, lon, lats, lons)
+            expected = set(np.flatnonzero(distances <= radius))
+            found, found_distances = index.query_radius(lon, lat, radius)
+            assert set(found) == expected
+            assert np.all(np.diff(found_distances) >= 0)
+
+
+def test_query_bbox_matches_brute_force(towers):
+    index = TowerSpatialIndex(*towers)
+    lons, lats = towers
+    found = index.query_bbox(37.55, 55.72, 37.7, 55.8)
+    expected = np.flatnonzero((lons >= 37.55) & (lons <= 37.7) & (lats >= 55.72) & (lats <= 55.8))
+    assert set(found) == set(expected)
+
+
+def test_small_and_empty_index():
+    index = TowerSpatialIndex([37.6, 37.7], [55.7, 55.8])
+    found, _ = index.query_nearest(37.6, 55.7, k=7)
+    assert list(found) == [0, 1]
+    empty = TowerSpatialIndex([], [])
+    found, distances = empty.query_nearest(37.6, 55.7)
+    assert len(found) == 0 and len(distances) == 0
+    indices, _ = empty.query_nearest_batch([37.6], [55.7])
+    assert indices.shape == (1, 0)
+
+
+def test_project_round_trip(towers):
+    index = TowerSpatialIndex(*towers)
+    lons, lats = index.unproject(*index.project(*towers))
+    np.testing.assert_allclose(lons, towers[0])
+    np.testing.assert_allclose(lats, towers[1])
+
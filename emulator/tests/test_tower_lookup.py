@@ -0,0 +1,30 @@
+import numpy as np
+
+from tower_lookup import TowerKeyIndex, pack_tower_keys
+
+
+def test_tower_key_index_matches_dict():
+    rng = np.random.default_rng(3)
+    mccs = rng.choice([250, 255, 257], 500)
+    mncs = rng.integers(0, 100, 500)
+    cells = rng.integers(0, 2 ** 28, 500)
+    # Дубликат: находится первая строка базы
+    mccs[10], mncs[10], cells[10] = mccs[3], mncs[3], cells[3]
+    index = TowerKeyIndex(mccs, mncs, cells)
+    first = {}
+    for row, key in enumerate(zip(mccs.tolist(), mncs.tolist(), cells.tolist())):
+        first.setdefault(key, row)
+
+    queries = list(first) + [(250, 100, 1), (1, 1, 1), (999, 99, 2 ** 28)]
+    expected = [first.get(key, -1) for key in queries]
+    q_mccs, q_mncs, q_cells = zip(*queries)
+    assert list(index.lookup_batch(q_mccs, q_mncs, q_cells)) == expected
+    assert [index.lookup(*key) for key in queries] == expected
+    assert index.lookup(mccs[10], mncs[10], cells[10]) == 3
+
+
+def test_packed_keys_are_distinct():
+    keys = pack_tower_keys([250, 250, 251, 250], [1, 2, 1, 1], [7, 7, 7, 2 ** 32 - 1])
+    assert len(set(keys.tolist())) == 4
+    empty = TowerKeyIndex([], [], [])
+    assert empty.lookup(250, 1, 7) == -1
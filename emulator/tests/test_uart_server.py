@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+from metrics import CommandMetrics
+from uart_server import UartCommandServer, configure_raw
+
+COMMANDS = {"AT": lambda: "OK", "AT+CENG?": lambda: "+CENG: 0,\"x\"\r\nOK"}
+
+
+def run_session(commands, chunks, expected, pause=0.02):
+    """Отправляет байты chunks на подчиненную сторону pty и ждет ответа длиной expected."""
+    async def session():
+        master, slave = os.openpty()
+        configure_raw(master)
+        configure_raw(slave)
+        os.set_blocking(master, False)
+        os.set_blocking(slave, False)
+        server = UartCommandServer(master, commands, metrics=CommandMetrics())
+        task = asyncio.create_task(server.serve())
+        received = bytearray()
+        try:
+            await asyncio.sleep(pause)
+            for chunk in chunks:
+                os.write(slave, chunk)
+                await asyncio.sleep(pause)
+            for _ in range(500):
+                if len(received) >= len(expected):
+                    break
+                try:
+                    received += os.read(slave, 65536)
+                except BlockingIOError:
+                    await asyncio.sleep(0.005)
+            return bytes(received), server
+        finally:
+            server.close()
+            await task
+            os.close(master)
+            os.close(slave)
+
+    return asyncio.run(session())
+
+
+def test_split_command_is_reassembled():
+    expected = b"+CENG: 0,\"x\"\r\nOK\r\n"
+    received, _ = run_session(COMMANDS, [b"A", b"T+CE", b"NG?\r"], expected)
+    assert received == expected
+
+
+def test_merged_commands_and_line_endings():
+    # Несколько команд в одном чтении, \r\n и \n\r не дают пустых команд
+    expected = b"OK\r\n+CENG: 0,\"x\"\r\nOK\r\nOK\r\nERROR\r\n"
+    received, _ = run_session(COMMANDS, [b"AT\r\nAT+CENG?\n\rAT\rBAD\r"], expected)
+    assert received == expected
+
+
+def test_incomplete_command_waits_for_terminator():
+    received, server = run_session(COMMANDS, [b"AT"], b"")
+    assert received == b""
+    assert server.buffer == bytearray(b"AT")
+
+
+def test_pending_writes_are_flushed_in_order():
+    # Ответ больше буфера pty: остаток уходит через add_writer, следующий ответ - после него
+    big = "X" * 200000
+    commands = {"BIG": lambda: big, "AT": lambda: "OK"}
+    expected = (big + "\r\nOK\r\n").encode('ascii')
+    received, server = run_session(commands, [b"BIG\rAT\r"], expected)
+    assert received == expected
+    assert server.pending == bytearray()
@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import TowerSpatialIndex
+from tower_lookup import TowerKeyIndex
+
+CACHE_VERSION = 1
+CACHE_META_FILE = "meta.json"
+
+# Колонки базы вышек, попадающие в кэш, и их типы
+TOWER_COLUMNS = {
+    'mcc': np.int32,
+    'net': np.int32,
+    'area': np.int32,
+    'cell': np.int64,
+    'lon': np.float64,
+    'lat': np.float64,
+}
+
+
+def cache_dir_for(csv_path):
+    """Каталог бинарного кэша рядом с CSV-файлом базы."""
+    return csv_path + ".cache"
+
+
+def csv_signature(csv_path):
+    """Время изменения и размер CSV, по которым проверяется актуальность кэша."""
+    stat = os.stat(csv_path)
+    return {'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def is_cache_valid(csv_path, cache_dir):
+    try:
+        with open(os.path.join(cache_dir, CACHE_META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get('signature') != csv_signature(csv_path):
+        return False
+    return all(os.path.exists(os.path.join(cache_dir, f"{name}.npy")) for name in TOWER_COLUMNS)
+
+
+def replace_file(path, write, mode='wb', encoding=None):
+    """Записывает файл через write(f) во временный файл рядом и атомарно подменяет им path.
+
+    Имя временного файла содержит PID, поэтому процессы, одновременно
+    собирающие один кэш, не пишут в общий файл.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_tower_cache(csv_path, cache_dir=None):
+    """Один раз разбирает CSV и сохраняет каждую колонку в отдельный .npy файл."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    signature = csv_signature(csv_path)
+    towers_df = pd.read_csv(csv_path, usecols=list(TOWER_COLUMNS))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, CACHE_META_FILE)
+    # Метаданные удаляются первыми: недописанный кэш считается недействительным
+    try:
+        os.remove(meta_path)
+    except FileNotFoundError:
+        pass
+
+    for name, dtype in TOWER_COLUMNS.items():
+        column = towers_df[name].to_numpy(dtype=dtype)
+        replace_file(os.path.join(cache_dir, f"{name}.npy"), lambda f: np.save(f, column))
+
+    meta = {'signature': signature, 'rows': len(towers_df)}
+    replace_file(meta_path, lambda f: json.dump(meta, f), 'w', encoding='utf-8')
+
+
+def load_tower_columns(csv_path, cache_dir=None):
+    """Возвращает колонки базы вышек как отображенные в память массивы NumPy.
+
+    При первом запуске или после изменения CSV кэш пересобирается. Страницы
+    отображенных файлов разделяются между одновременно запущенными эмуляторами.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    if not is_cache_valid(csv_path, cache_dir):
+        print(f"Построение бинарного кэша базы вышек {cache_dir}...")
+        build_tower_cache(csv_path, cache_dir)
+
+    return {
+        name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r')
+        for name in TOWER_COLUMNS
+    }
+
+
+class TowerDatabase:
+    """База вышек вместе с индексами для поиска ближайших вышек и вышек по ключу."""
+
+    def __init__(self, columns):
+        self.lons = columns['lon']
+        self.lats = columns['lat']
+        self.mccs = columns['mcc']
+        self.mncs = columns['net']
+        self.lacs = columns['area']
+        self.cells = columns['cell']
+        self.spatial_index = TowerSpatialIndex(self.lons, self.lats)
+        self.key_index = TowerKeyIndex(self.mccs, self.mncs, self.cells)
+        self.nearest_raster = None  # nearest_raster.NearestRaster для области работы, если построен
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        return cls(load_tower_columns(csv_path))
+
+    def __len__(self):
+        return len(self.lons)
+
+    def query_nearest(self, lon, lat, k=7):
+        """k ближайших вышек: через растр, если он подключен, иначе через пространственный индекс."""
+        if self.nearest_raster is not None:
+            return self.nearest_raster.query_nearest(lon, lat, k=k)
+        return self.spatial_index.query_nearest(lon, lat, k=k)
+
+    def query_nearest_batch(self, lons, lats, k=7):
+        if self.nearest_raster is not None:
+            return self.nearest_raster.query_nearest_batch(lons, lats, k=k)
+        return self.spatial_index.query_nearest_batch(lons, lats, k=k)
+
+    def find_towers_coordinates(self, detected_towers):
+        """Находит координаты вышек (mcc, mnc, cellid, signal) одним векторизованным запросом."""
+        if not detected_towers:
+            return []
+        mccs = [mcc for mcc, mnc, cellid, signal in detected_towers]
+        mncs = [mnc for mcc, mnc, cellid, signal in detected_towers]
+        cells = [int(cellid, 16) for mcc, mnc, cellid, signal in detected_towers]
+        indices = self.key_index.lookup_batch(mccs, mncs, cells)
+        return [(self.lons[idx], self.lats[idx]) if idx >= 0 else None for idx in indices]
+
+    def lookup_ceng_records(self, records):
+        """Индексы вышек для массива ceng.parse_ceng_batch; -1 для отсутствующих в базе."""
+        return self.key_index.lookup_batch(records['mcc'], records['mnc'], records['cell'])
@@ -0,0 +1,81 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore
+
+REFRESH_DELAY_MS = 50  # Задержка перерисовки после изменения области просмотра
+TOWER_SIZE = 5
+TOWER_BRUSH = (0, 0, 255, 120)
+HIGHLIGHT_BRUSH = (255, 0, 0, 255)
+HIGHLIGHT_SIZE = 8
+
+
+class TowerLayer:
+    """Слой вышек на карте: отдает pyqtgraph только вышки в области просмотра.
+
+    Полная база вышек остается в пространственном индексе. При отдалении,
+    когда в кадр попадает больше max_points вышек, область просмотра
+    разбивается на сетку и от каждой ячейки рисуется одна вышка, размер
+    маркера которой растет с числом вышек в ячейке. Выделенные вышки
+    рисуются отдельным небольшим слоем поверх основного.
+    """
+
+    def __init__(self, map_view, spatial_index, max_points):
+        self.map_view = map_view
+        self.spatial_index = spatial_index
+        self.max_points = max_points
+        self.visible_indices = np.empty(0, dtype=np.int64)
+        self.highlighted = np.empty(0, dtype=np.int64)
+
+        self.scatter = pg.ScatterPlotItem(pen=pg.mkPen(None), brush=pg.mkBrush(*TOWER_BRUSH), size=TOWER_SIZE)
+        self.map_view.addItem(self.scatter)
+        self.highlight_scatter = pg.ScatterPlotItem(
+            pen=pg.mkPen(None), brush=pg.mkBrush(*HIGHLIGHT_BRUSH), size=HIGHLIGHT_SIZE
+        )
+        self.highlight_scatter.setZValue(1)
+        self.map_view.addItem(self.highlight_scatter)
+
+        # Перерисовываем не на каждое событие прокрутки, а после паузы
+        self.refresh_timer = QtCore.QTimer()
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.map_view.getViewBox().sigRangeChanged.connect(self.schedule_refresh)
+        self.refresh()
+
+    def schedule_refresh(self, *args):
+        self.refresh_timer.start(REFRESH_DELAY_MS)
+
+    def refresh(self):
+        """Выбирает вышки в области просмотра и обновляет точки на карте."""
+        (lon_min, lon_max), (lat_min, lat_max) = self.map_view.getViewBox().viewRange()
+        indices = self.spatial_index.query_bbox(lon_min, lat_min, lon_max, lat_max)
+        sizes = np.full(len(indices), TOWER_SIZE, dtype=np.float64)
+
+        if len(indices) > self.max_points:
+            indices, counts = self.thin(indices, lon_min, lat_min, lon_max, lat_max)
+            sizes = TOWER_SIZE + 2 * np.log2(counts)
+
+        self.visible_indices = indices
+        self.scatter.setData(
+            x=self.spatial_index.lons[indices], y=self.spatial_index.lats[indices],
+            size=sizes
+        )
+
+    def thin(self, indices, lon_min, lat_min, lon_max, lat_max):
+        """Оставляет по одной вышке на ячейку экранной сетки и число вышек в ячейке."""
+        grid = max(1, int(np.sqrt(self.max_points)))
+        bx = (self.spatial_index.lons[indices] - lon_min) / max(lon_max - lon_min, 1e-12) * grid
+        by = (self.spatial_index.lats[indices] - lat_min) / max(lat_max - lat_min, 1e-12) * grid
+        bx = np.clip(bx.astype(np.int64), 0, grid - 1)
+        by = np.clip(by.astype(np.int64), 0, grid - 1)
+        _, first, counts = np.unique(by * grid + bx, return_index=True, return_counts=True)
+        return indices[first], counts
+
+    def set_highlighted(self, indices):
+        """Выделяет вышки цветом; слой перерисовывается, только если набор вышек изменился."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.array_equal(np.sort(indices), np.sort(self.highlighted)):
+            return
+        self.highlighted = indices
+        self.highlight_scatter.setData(
+            x=self.spatial_index.lons[indices], y=self.spatial_index.lats[indices]
+        )
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def pack_tower_keys(mccs, mncs, cells):
+    """Упаковывает (MCC, MNC, CellID) в ключ int64: 16 | 16 | 32 бита."""
+    mccs = np.asarray(mccs, dtype=np.int64) & 0xFFFF
+    mncs = np.asarray(mncs, dtype=np.int64) & 0xFFFF
+    cells = np.asarray(cells, dtype=np.int64) & 0xFFFFFFFF
+    return (mccs << 48) | (mncs << 32) | cells
+
+
+class TowerKeyIndex:
+    """Отсортированный массив упакованных ключей вышек для поиска через searchsorted.
+
+    Аналог search_in_hash_table из exe/hashutils.c: поиск одной вышки стоит
+    O(log N), а целый ответ CENG разрешается одним векторизованным вызовом.
+    """
+
+    def __init__(self, mccs, mncs, cells):
+        keys = pack_tower_keys(mccs, mncs, cells)
+        # Стабильная сортировка: при дубликатах находится первая строка базы
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.sorted_keys)
+
+    def lookup_batch(self, mccs, mncs, cells):
+        """Возвращает индексы строк базы для набора вышек, -1 для ненайденных."""
+        keys = pack_tower_keys(mccs, mncs, cells)
+        if len(self.sorted_keys) == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.sorted_keys, keys)
+        pos = np.clip(pos, 0, len(self.sorted_keys) - 1)
+        found = self.sorted_keys[pos] == keys
+        return np.where(found, self.order[pos], -1)
+
+    def lookup(self, mcc, mnc, cell):
+        """Возвращает индекс строки базы для одной вышки или -1."""
+        return int(self.lookup_batch([mcc], [mnc], [cell])[0])
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from uart_server import UartCommandServer, configure_raw
+
+CAPTURE_PATH = "uart_capture.jsonl"
+UART_PORT = "/dev/pts/7"
+BAUD_RATE = 9600
+SETUP_COMMANDS = ("AT+CENG=1,1",)  # Команды настройки, отправляемые один раз перед опросом
+QUERY_COMMAND = "AT+CENG?"
+COMMAND_INTERVAL = 1.0  # Интервал между командами AT+CENG? при записи в секундах
+
+
+def record_session(ser, path, count=None, interval=COMMAND_INTERVAL, timeout=None):
+    """Записывает сеанс модема в JSONL: по строке на пару команда/ответ.
+
+    Каждая запись содержит время отправки от начала сеанса t, команду,
+    ответ без изменений и задержку ответа latency_ms. Файл дописывается
+    и сбрасывается после каждой записи, поэтому прерванный сеанс не теряется.
+    """
+    from send_uart import RESPONSE_TIMEOUT, read_response
+
+    timeout = timeout or RESPONSE_TIMEOUT
+    started = time.monotonic()
+    recorded = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        def exchange(command):
+            sent_at = time.monotonic()
+            ser.write((command + "\r\n").encode('utf-8'))
+            response = read_response(ser, timeout)
+            entry = {
+                't': round(sent_at - started, 6),
+                'command': command,
+                'response': response,
+                'latency_ms': round((time.monotonic() - sent_at) * 1000, 3),
+            }
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"{entry['t']:10.3f} {command} ({entry['latency_ms']:.1f} мс, {len(response)} байт)")
+
+        for command in SETUP_COMMANDS:
+            exchange(command)
+        while count is None or recorded < count:
+            exchange(QUERY_COMMAND)
+            recorded += 1
+            if count is None or recorded < count:
+                time.sleep(interval)
+    return recorded
+
+
+def read_capture(path):
+    """Читает записи сеанса из JSONL; пустые строки пропускаются."""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+class CaptureReplayServer(UartCommandServer):
+    """Сервер команд, отвечающий записанными ответами модема.
+
+    Для каждой команды ответы выдаются по порядку записи. В режиме
+    realtime ответ задерживается на записанную задержку latency_ms, иначе
+    отдается сразу, и скорость определяется только потребителем. Когда
+    ответы на команду заканчиваются, запись повторяется по кругу (repeat)
+    или сервер завершает работу.
+    """
+
+    def __init__(self, fd, entries, realtime=False, repeat=False, name=None, **kwargs):
+        self.responses = {}
+        for entry in entries:
+            # Сервер сам дописывает \r\n после ответа
+            response = entry['response']
+            if response.endswith("\r\n"):
+                response = response[:-2]
+            self.responses.setdefault(entry['command'], []).append((entry.get('latency_ms', 0.0), response))
+        self.positions = dict.fromkeys(self.responses, 0)
+        self.realtime = realtime
+        self.repeat = repeat
+        self.served = 0
+        self.first_served_at = None  # time.perf_counter() первого ответа
+        commands = {command: (lambda command=command: self.next_response(command)) for command in self.responses}
+        super().__init__(fd, commands, name=name, **kwargs)
+
+    def next_response(self, command):
+        responses = self.responses[command]
+        position = self.positions[command]
+        if position >= len(responses):
+            if not self.repeat:
+                self.close()
+                return "ERROR"
+            position = 0
+        self.positions[command] = position + 1
+        latency_ms, response = responses[position]
+        if self.realtime and latency_ms > 0:
+            # Потребитель ждет ответа на команду, поэтому задержка в цикле событий допустима
+            time.sleep(latency_ms / 1000)
+        if self.first_served_at is None:
+            self.first_served_at = time.perf_counter()
+        self.served += 1
+        return response
+
+
+def open_replay_pty(link=None):
+    """Создает pty для воспроизведения; потребитель подключается к подчиненной стороне.
+
+    Подчиненная сторона остается открытой, чтобы отключение потребителя не
+    закрывало pty. link - необязательная символическая ссылка на нее,
+    например путь UART_PATH из config.h; существующая ссылка заменяется,
+    а обычный файл или устройство по этому пути - нет.
+    """
+    if link and os.path.lexists(link) and not os.path.islink(link):
+        raise FileExistsError(f"{link} существует и не является символической ссылкой")
+    master, slave = os.openpty()
+    configure_raw(master)
+    configure_raw(slave)
+    os.set_blocking(master, False)
+    name = os.ttyname(slave)
+    if link:
+        if os.path.islink(link):
+            os.remove(link)
+        os.symlink(name, link)
+    return master, slave, name
+
+
+async def replay_capture(entries, realtime, repeat, link=None):
+    master, slave, name = open_replay_pty(link)
+    server = CaptureReplayServer(master, entries, realtime=realtime, repeat=repeat, name=name)
+    try:
+        await server.serve()
+    finally:
+        # Время до первой команды - ожидание подключения потребителя, в скорость оно не входит
+        started = server.first_served_at
+        elapsed = time.perf_counter() - started if started is not None else 0
+        os.close(master)
+        os.close(slave)
+        if link and os.path.islink(link):
+            os.remove(link)
+        print(f"Отправлено ответов: {server.served} за {elapsed:.1f} с "
+              f"({server.served / elapsed if elapsed > 0 else 0:.1f} в секунду)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Запись сеанса AT-команд модема и его воспроизведение на pty")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    record = subparsers.add_parser("record", help="Записать сеанс эмулятора или настоящего SIM800")
+    record.add_argument("--port", default=UART_PORT, help="UART-порт модема")
+    record.add_argument("--baud", type=int, default=BAUD_RATE)
+    record.add_argument("--output", default=CAPTURE_PATH, help="JSONL-файл записи (дописывается)")
+    record.add_argument("--count", type=int, default=None, help="Число запросов AT+CENG?; по умолчанию до Ctrl+C")
+    record.add_argument("--interval", type=float, default=COMMAND_INTERVAL,
+                        help="Интервал между командами AT+CENG? в секундах")
+    record.add_argument("--timeout", type=float, default=None, help="Максимальное время ожидания ответа в секундах")
+
+    replay = subparsers.add_parser("replay", help="Воспроизвести запись на новом pty")
+    replay.add_argument("--input", default=CAPTURE_PATH, help="JSONL-файл записи")
+    replay.add_argument("--realtime", action="store_true",
+                        help="Задерживать ответы как при записи; по умолчанию отвечать сразу")
+    replay.add_argument("--repeat", action="store_true", help="Повторять запись по кругу")
+    replay.add_argument("--link", default=None, help="Символическая ссылка на pty, например /dev/pts/12")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.mode == "record":
+        import serial
+
+        try:
+            with serial.Serial(args.port, args.baud, timeout=1) as ser:
+                print(f"Запись сеанса {args.port} в {args.output}")
+                recorded = record_session(ser, args.output, args.count, args.interval, args.timeout)
+                print(f"Записано запросов: {recorded}")
+        except serial.SerialException as e:
+            print(f"Ошибка при подключении к UART: {e}")
+        except KeyboardInterrupt:
+            print("Запись остановлена.")
+        return
+
+    entries = read_capture(args.input)
+    print(f"Загружено записей: {len(entries)} из {args.input}")
+    try:
+        asyncio.run(replay_capture(entries, args.realtime, args.repeat, args.link))
+    except FileExistsError as e:
+        print(f"Ошибка: {e}")
+    except KeyboardInterrupt:
+        print("Воспроизведение остановлено.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import asyncio
+import errno
+import os
+import termios
+import threading
+import time
+import tty
+
+from metrics import METRICS
+
+READ_CHUNK = 4096
+REOPEN_DELAY = 0.5  # Пауза перед повторным чтением, если на другой стороне pty никого нет
+
+
+def open_serial_port(path, baud_rate):
+    """Открывает UART или pty в неблокирующем режиме без обработки строк терминалом."""
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    configure_raw(fd, baud_rate)
+    return fd
+
+
+def configure_raw(fd, baud_rate=None):
+    tty.setraw(fd)
+    if baud_rate is not None and hasattr(termios, f"B{baud_rate}"):
+        attrs = termios.tcgetattr(fd)
+        attrs[4] = attrs[5] = getattr(termios, f"B{baud_rate}")
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+
+def simulation_commands(simulation):
+    """Таблица команд модема SIM800, отвечающих данными симуляции."""
+    def ceng_query():
+        tower_data = simulation.send_tower_data()
+        if tower_data == "ERROR":
+            return tower_data
+        print("Отправлены данные о вышках:\n" + tower_data)
+        return tower_data + "\r\nOK"
+
+    return {
+        "AT": lambda: "OK",
+        "ATE0": lambda: "OK",
+        "AT+CENG=1,1": lambda: "OK",  # Команда активации режима отчета о сотах
+        "AT+CENG?": ceng_query,
+    }
+
+
+class UartCommandServer:
+    """Событийный сервер AT-команд поверх файлового дескриптора UART или pty.
+
+    Байты обрабатываются сразу по готовности дескриптора в цикле asyncio,
+    команды выделяются по \\r или \\n и разбираются по таблице commands,
+    которую можно расширять через register. Ответ, не поместившийся в
+    буфер порта, дописывается по готовности дескриптора к записи, не
+    блокируя цикл. Задержки этапов обработки каждой команды записываются
+    в metrics.
+    """
+
+    def __init__(self, fd, commands, name=None, metrics=METRICS):
+        self.fd = fd
+        self.commands = dict(commands)
+        self.name = name or f"fd {fd}"
+        self.metrics = metrics
+        self.buffer = bytearray()
+        self.pending = bytearray()  # Неотправленный хвост ответов
+        self.loop = None
+        self.closed = None
+
+    def register(self, command, handler):
+        """Добавляет или заменяет обработчик команды; handler() возвращает текст ответа."""
+        self.commands[command] = handler
+
+    def dispatch(self, command):
+        handler = self.commands.get(command)
+        if handler is None:
+            # Ответ по умолчанию на нераспознанные команды
+            return "ERROR"
+        return handler()
+
+    async def serve(self):
+        """Обслуживает команды, пока не будет вызван close()."""
+        self.loop = asyncio.get_running_loop()
+        self.closed = self.loop.create_future()
+        self.loop.add_reader(self.fd, self.on_readable)
+        print(f"Прослушивание команд на {self.name}...")
+        try:
+            await self.closed
+        finally:
+            self.loop.remove_reader(self.fd)
+            self.loop.remove_writer(self.fd)
+
+    def close(self):
+        if self.closed is not None and not self.closed.done():
+            self.closed.set_result(None)
+
+    def on_readable(self):
+        try:
+            data = os.read(self.fd, READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno != errno.EIO:
+                raise
+            # Сторона pty закрыта: ждем, пока к порту снова подключатся
+            self.loop.remove_reader(self.fd)
+            self.loop.call_later(REOPEN_DELAY, self.loop.add_reader, self.fd, self.on_readable)
+            return
+
+        received_at = time.perf_counter()
+        self.buffer += data
+        while True:
+            ends = [i for i in (self.buffer.find(b"\r"), self.buffer.find(b"\n")) if i >= 0]
+            if not ends:
+                break
+            end = min(ends)
+            line = bytes(self.buffer[:end])
+            del self.buffer[:end + 1]
+            command = line.decode('utf-8', errors='replace').strip()
+            if command:
+                self.handle_command(command, received_at)
+
+    def handle_command(self, command, received_at=None):
+        started = time.perf_counter()
+        # Неизвестные команды учитываются вместе, чтобы мусор на линии не плодил метрики
+        name = command if command in self.commands else "unknown"
+        with self.metrics.command(name):
+            if received_at is not None:
+                # Ожидание разбора: команды из одного чтения обрабатываются по очереди
+                self.metrics.observe(name, "receive", (started - received_at) * 1000)
+            print(f"Получена команда: {command}")
+            with self.metrics.stage("dispatch"):
+                response = self.dispatch(command)
+            with self.metrics.stage("write"):
+                self.write((response + "\r\n").encode('utf-8'))
+            latency = (time.perf_counter() - started) * 1000
+            self.metrics.observe(name, "total", (time.perf_counter() - (received_at or started)) * 1000)
+        print(f"Отправка ответа: {response} ({latency:.2f} мс)")
+
+    def write(self, data):
+        if self.pending:
+            # Предыдущий ответ еще не ушел: сохраняем порядок байтов
+            self.pending += data
+            return
+        try:
+            written = os.write(self.fd, data)
+        except BlockingIOError:
+            written = 0
+        if written < len(data):
+            # Буфер порта заполнен: остаток отправит on_writable
+            self.pending += data[written:]
+            self.loop.add_writer(self.fd, self.on_writable)
+
+    def on_writable(self):
+        try:
+            written = os.write(self.fd, self.pending)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno != errno.EIO:
+                raise
+            # Сторона pty закрыта: ответы некому доставить
+            written = len(self.pending)
+        del self.pending[:written]
+        if not self.pending:
+            self.loop.remove_writer(self.fd)
+
+
+async def serve_port(port, baud_rate, simulation):
+    fd = open_serial_port(port, baud_rate)
+    try:
+        await UartCommandServer(fd, simulation_commands(simulation), name=port).serve()
+    finally:
+        os.close(fd)
+
+
+def respond_to_uart_commands(port, baud_rate, simulation):
+    """Обслуживает UART-порт в собственном цикле asyncio."""
+    try:
+        asyncio.run(serve_port(port, baud_rate, simulation))
+    except OSError as e:
+        print(f"Ошибка при подключении к UART: {e}")
+
+
+def start_uart_listener(port, baud_rate, simulation):
+    """Запускает поток с сервером команд UART."""
+    uart_thread = threading.Thread(
+        target=respond_to_uart_commands, args=(port, baud_rate, simulation), daemon=True
+    )
+    uart_thread.start()
+    return uart_thread
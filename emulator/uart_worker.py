@@ -0,0 +1,68 @@
+import queue
+import threading
+
+import serial
+from PyQt5 import QtCore
+
+from send_uart import send_command
+
+ERROR_RESPONSE = "ERROR"  # Ответ на команду, которую не удалось выполнить из-за ошибки порта
+
+
+class UartWorker(QtCore.QThread):
+    """Поток, владеющий единственным соединением UART.
+
+    Команды принимаются через request и выполняются по одной; ответ
+    возвращается в поток интерфейса сигналом response_received. Пока
+    предыдущий запрос не завершен, новые отклоняются, поэтому отрисовка
+    и шаги симуляции никогда не ждут порт. Ошибка порта во время команды
+    возвращается ответом ERROR_RESPONSE.
+    """
+
+    response_received = QtCore.pyqtSignal(str, str)  # Команда и ответ модема
+
+    def __init__(self, port, baud_rate, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.baud_rate = baud_rate
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.in_flight = False
+        self.stopped = False  # run завершился: порт закрыт или не открылся
+
+    def request(self, command):
+        """Ставит команду в очередь; возвращает False, если запрос уже выполняется или поток не работает."""
+        with self.lock:
+            if self.in_flight or self.stopped or not self.isRunning():
+                return False
+            self.in_flight = True
+        self.requests.put(command)
+        return True
+
+    def stop(self):
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        try:
+            with serial.Serial(self.port, self.baud_rate, timeout=1) as ser:
+                print(f"Подключение к порту {self.port}")
+                while True:
+                    command = self.requests.get()
+                    if command is None:
+                        break
+                    try:
+                        response = send_command(ser, command)
+                    except (serial.SerialException, OSError) as e:
+                        print(f"Ошибка UART при выполнении {command}: {e}")
+                        response = ERROR_RESPONSE
+                    finally:
+                        with self.lock:
+                            self.in_flight = False
+                    self.response_received.emit(command, response)
+        except serial.SerialException as e:
+            print(f"Ошибка при подключении к UART: {e}")
+        finally:
+            with self.lock:
+                self.in_flight = False
+                self.stopped = True